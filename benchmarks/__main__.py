@@ -0,0 +1,38 @@
+import argparse
+import json
+import logging
+import sys
+
+from benchmarks import suite
+from remoteclick.codec import CODECS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmark the remoteclick client against the bundled mock api.")
+    parser.add_argument("scenarios", nargs="*", choices=[[]] + sorted(suite.SCENARIOS),
+                        help="scenarios to run (default: all)")
+    parser.add_argument("-n", "--operations", type=int, default=200, help="measured operations per scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated api latency in seconds")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--history-size", type=int, default=2000)
+    parser.add_argument("--codec", choices=sorted(CODECS), help="json codec of the client (default: fastest installed)")
+    parser.add_argument("--metrics", action="store_true", help="enable the client's request metrics while measuring")
+    parser.add_argument("-o", "--output", help="write the json report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = suite.run(args.scenarios, operations=args.operations, latency=args.latency, pool_size=args.pool_size,
+                       batch_size=args.batch_size, history_size=args.history_size, metrics=args.metrics,
+                       codec=args.codec)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
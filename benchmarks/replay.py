@@ -0,0 +1,183 @@
+import argparse
+import collections
+import json
+import logging
+import platform
+import re
+import sys
+import threading
+import time
+import urllib.parse
+
+from benchmarks.suite import percentile
+from remoteclick import RemoteClickClient
+from remoteclick.exceptions import TransportError
+from remoteclick.mock_server import MockRemoteClickServer
+from remoteclick.recording import read_recording
+from remoteclick.transport import TRANSPORTS
+
+_DATA_NODE_ID = re.compile(r"(?<=/datanodes/)(\d+)")
+
+
+def load(path):
+    # tokens are fetched by every virtual device itself and event streams stay open for the whole run
+    return [request for request in read_recording(path)
+            if "/oauth/" not in request.target and not request.target.split("?")[0].endswith("/values/events")]
+
+
+def data_node_ids(requests):
+    ids = set()
+    for request in requests:
+        path, _, query = request.target.partition("?")
+        ids.update(int(data_node_id) for data_node_id in _DATA_NODE_ID.findall(path))
+        for name, value in urllib.parse.parse_qsl(query):
+            if name == "ids":
+                ids.update(int(data_node_id) for data_node_id in value.split(","))
+    return ids
+
+
+def rewrite(target, ids):
+    path, _, query = target.partition("?")
+    path = _DATA_NODE_ID.sub(lambda match: str(ids[int(match.group(1))]), path)
+    if query:
+        query = urllib.parse.urlencode([(name, _rewrite_ids(value, ids) if name == "ids" else value)
+                                        for name, value in urllib.parse.parse_qsl(query)])
+    # the endpoint is resolved against the server root, the mock api accepts any base path
+    return path.lstrip("/") + ("?" + query if query else "")
+
+
+def _rewrite_ids(value, ids):
+    return ",".join(str(ids[int(data_node_id)]) for data_node_id in value.split(","))
+
+
+def route(method, target):
+    return "{0} {1}".format(method, _DATA_NODE_ID.sub("{id}", target.split("?")[0]))
+
+
+def run(path, devices=10, speed=10.0, transport="http.client", latency=0.0, pool_size=2):
+    requests = load(path)
+    if not requests:
+        raise ValueError("{0} contains no requests to replay".format(path))
+    span = requests[-1].offset - requests[0].offset
+    with MockRemoteClickServer(latency=latency, streaming=False) as server:
+        # every virtual device writes to its own copy of the recorded data nodes
+        device_ids = []
+        for device in range(devices):
+            ids = {}
+            for data_node_id in sorted(data_node_ids(requests)):
+                ids[data_node_id] = server.add_data_node("Node{0}".format(data_node_id),
+                                                         "Replay/Device{0}".format(device), read_only=False)
+                server.add_value(ids[data_node_id], 0.0)
+            device_ids.append(ids)
+        base_url = server.base_url.rsplit("/api/", 1)[0] + "/"
+        ready = threading.Barrier(devices + 1)
+        results = [None] * devices
+        threads = [threading.Thread(target=_device, args=(index, requests, device_ids[index], base_url, transport,
+                                                          pool_size, speed, ready, results),
+                                    name="replay-device-{0}".format(index)) for index in range(devices)]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    return _report(requests, results, elapsed, span, {'devices': devices, 'speed': speed, 'transport': transport,
+                                                       'latency': latency, 'pool_size': pool_size})
+
+
+def _device(index, requests, ids, base_url, transport, pool_size, speed, ready, results):
+    client = RemoteClickClient(transport=transport, pool_size=pool_size)
+    client.set_base_url(base_url)
+    client.set_credentials("replay{0}".format(index), "replay")
+    samples = []
+    try:
+        try:
+            client.connect()
+        except Exception:
+            ready.abort()
+            raise
+        ready.wait()
+        start = time.perf_counter()
+        first = requests[0].offset
+        for request in requests:
+            # the recorded cadence is compressed by speed. a device which falls behind sends without waiting
+            due = start + (request.offset - first) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent = time.perf_counter()
+            try:
+                response = client._request(request.method, rewrite(request.target, ids),
+                                           data=request.body.encode("utf-8") if request.body is not None else None,
+                                           headers=request.headers, operation=route(request.method, request.target))
+                status = response.status_code
+            except TransportError:
+                status = None
+            samples.append((route(request.method, request.target), status, time.perf_counter() - sent,
+                            max(sent - due, 0.0)))
+    finally:
+        client.close()
+        results[index] = samples
+
+
+def _report(requests, results, elapsed, span, parameters):
+    samples = [sample for device in results for sample in device or ()]
+    routes = collections.defaultdict(list)
+    for sample in samples:
+        routes[sample[0]].append(sample)
+    statuses = collections.Counter(str(sample[1]) for sample in samples)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'recording': {'requests': len(requests), 'span_s': span,
+                      'routes': len({route(request.method, request.target) for request in requests}),
+                      'sent_bytes': sum(request.sent for request in requests)},
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[1] is None or sample[1] >= 400),
+        'elapsed_s': elapsed,
+        'requests_per_sec': len(samples) / elapsed if elapsed else None,
+        'statuses': dict(statuses),
+        'latency_ms': _latencies([sample[2] for sample in samples]),
+        'lag_ms': _latencies([sample[3] for sample in samples]),
+        'routes': {name: dict(requests=len(route_samples), **_latencies([sample[2] for sample in route_samples]))
+                   for name, route_samples in sorted(routes.items())},
+    }
+
+
+def _latencies(seconds):
+    seconds = sorted(seconds)
+    if not seconds:
+        return {}
+    return {'mean': sum(seconds) / len(seconds) * 1000.0, 'p50': percentile(seconds, 50) * 1000.0,
+            'p90': percentile(seconds, 90) * 1000.0, 'p99': percentile(seconds, 99) * 1000.0,
+            'p999': percentile(seconds, 99.9) * 1000.0, 'max': seconds[-1] * 1000.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay",
+                                     description="Replay a recorded workload with parallel virtual devices against the "
+                                                 "bundled mock api.")
+    parser.add_argument("recording", help="recording written by remoteclick.recording.RecordingTransport")
+    parser.add_argument("-d", "--devices", type=int, default=10, help="parallel virtual devices")
+    parser.add_argument("-s", "--speed", type=float, default=10.0, help="replay speed relative to the recording")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="http.client")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated api latency in seconds")
+    parser.add_argument("--pool-size", type=int, default=2, help="connections per virtual device")
+    parser.add_argument("-o", "--output", help="write the json report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run(args.recording, devices=args.devices, speed=args.speed, transport=args.transport,
+                 latency=args.latency, pool_size=args.pool_size)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
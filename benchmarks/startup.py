@@ -0,0 +1,104 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from remoteclick.client import TRANSPORTS
+from remoteclick.mock_server import MockRemoteClickServer
+
+# runs in a fresh interpreter for every sample, so every import is a cold import
+CHILD = """
+import sys, time
+start = time.perf_counter()
+modules = len(sys.modules)
+from remoteclick import RemoteClickClient, DataNode
+imported = time.perf_counter()
+client = RemoteClickClient(transport=sys.argv[2])
+client.set_base_url(sys.argv[1])
+client.set_credentials("startup", "startup")
+created = time.perf_counter()
+client.connect()
+connected = time.perf_counter()
+data_node = DataNode(name="Startup", path="Benchmark")
+data_node.id = int(sys.argv[3])
+client.save_data_node_value(data_node.new_value(21.5))
+written = time.perf_counter()
+import json
+print(json.dumps({'import': imported - start, 'create': created - imported, 'connect': connected - created,
+                  'first_write': written - connected, 'modules': len(sys.modules) - modules,
+                  'requests_imported': 'requests' in sys.modules}))
+"""
+
+PHASES = ('import', 'create', 'connect', 'first_write')
+
+
+def run(transports=TRANSPORTS, samples=10, latency=0.0):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    with MockRemoteClickServer(latency=latency, streaming=False) as server:
+        data_node_id = server.add_data_node("Startup", "Benchmark")
+        interpreter = [_spawn([sys.executable, "-c", "pass"], root)[0] for _ in range(samples)]
+        for transport in transports:
+            runs = []
+            for _ in range(samples):
+                elapsed, output = _spawn([sys.executable, "-c", CHILD, server.base_url, transport, str(data_node_id)],
+                                         root)
+                phases = json.loads(output)
+                phases['process'] = elapsed
+                runs.append(phases)
+            results.append(_summarize(transport, runs))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'samples': samples, 'latency': latency},
+        'interpreter_ms': _stats(interpreter),
+        'results': results,
+    }
+
+
+def _spawn(command, cwd):
+    start = time.perf_counter()
+    output = subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return time.perf_counter() - start, output
+
+
+def _summarize(transport, runs):
+    summary = {'transport': transport, 'modules_imported': runs[0]['modules'],
+               'requests_imported': runs[0]['requests_imported']}
+    for phase in PHASES + ('process',):
+        summary[phase + '_ms'] = _stats([run[phase] for run in runs])
+    return summary
+
+
+def _stats(seconds):
+    milliseconds = sorted(value * 1000.0 for value in seconds)
+    return {'mean': statistics.mean(milliseconds), 'p50': statistics.median(milliseconds), 'max': milliseconds[-1]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup",
+                                     description="Measure cold start cost: import, connect and first write.")
+    parser.add_argument("-n", "--samples", type=int, default=10, help="cold starts per transport")
+    parser.add_argument("--transport", action="append", choices=TRANSPORTS,
+                        help="transport to measure, may be repeated (default: all)")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated api latency in seconds")
+    parser.add_argument("-o", "--output", help="write the json report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run(args.transport or TRANSPORTS, samples=args.samples, latency=args.latency)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import gc
+import math
+import platform
+import time
+import tracemalloc
+
+import remoteclick
+from remoteclick import RemoteClickClient
+from remoteclick.codec import get_codec
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue
+from remoteclick.mock_server import MockRemoteClickServer
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(setup):
+        SCENARIOS[name] = setup
+        return setup
+
+    return register
+
+
+class Result:
+    def __init__(self, name, operations, items_per_operation, latencies, allocations, connections):
+        self.name = name
+        self.operations = operations
+        self.items_per_operation = items_per_operation
+        self.latencies = sorted(latencies)
+        self.allocations = allocations
+        self.connections = connections
+
+    def to_dict(self):
+        total = sum(self.latencies)
+        return {
+            'name': self.name,
+            'operations': self.operations,
+            'ops_per_sec': self.operations / total if total else None,
+            'items_per_sec': self.operations * self.items_per_operation / total if total else None,
+            'latency_ms': {
+                'mean': total / len(self.latencies) * 1000.0,
+                'p50': percentile(self.latencies, 50) * 1000.0,
+                'p99': percentile(self.latencies, 99) * 1000.0,
+                'max': self.latencies[-1] * 1000.0,
+            },
+            'allocations': self.allocations,
+            'connections': self.connections,
+        }
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    rank = max(int(math.ceil(percent / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+def run(names=None, operations=200, latency=0.0, pool_size=10, batch_size=100, history_size=2000, metrics=False,
+        codec=None):
+    results = []
+    for name in names or sorted(SCENARIOS):
+        with MockRemoteClickServer(latency=latency, streaming=False) as server:
+            client = RemoteClickClient(pool_size=pool_size, codec=codec)
+            client.set_base_url(server.base_url)
+            client.set_credentials("benchmark", "benchmark")
+            if metrics:
+                client.enable_metrics()
+            client.connect()
+            try:
+                operation, items_per_operation = SCENARIOS[name](client, server, batch_size=batch_size,
+                                                                 history_size=history_size)
+                results.append(measure(name, client, server, operation, operations, items_per_operation))
+            finally:
+                client.close()
+    return {
+        'remoteclick': remoteclick.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'operations': operations, 'latency': latency, 'pool_size': pool_size,
+                       'batch_size': batch_size, 'history_size': history_size, 'metrics': metrics,
+                       'codec': get_codec(codec).name},
+        'results': [result.to_dict() for result in results],
+    }
+
+
+def measure(name, client, server, operation, operations, items_per_operation):
+    # warm up connections and caches so that the first request does not skew the percentiles
+    operation()
+    client_connections = client.connection_stats()['connections_opened']
+    server_connections = server.connections
+    requests = server.request_count()
+
+    gc.collect()
+    latencies = []
+    for _ in range(operations):
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+    connections = {
+        'opened': client.connection_stats()['connections_opened'] - client_connections,
+        'accepted_by_server': server.connections - server_connections,
+        'requests': server.request_count() - requests,
+    }
+
+    # tracemalloc slows down every allocation, so allocations are measured in a separate, shorter run
+    sample = max(operations // 10, 1)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(sample):
+        operation()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    statistics = after.compare_to(before, 'filename')
+    allocations = {
+        'retained_blocks_per_operation': sum(max(stat.count_diff, 0) for stat in statistics) / sample,
+        'retained_bytes_per_operation': sum(max(stat.size_diff, 0) for stat in statistics) / sample,
+        'peak_bytes': peak,
+    }
+    return Result(name, operations, items_per_operation, latencies, allocations, connections)
+
+
+def _create_data_node(client, name, path="Benchmark"):
+    data_node = DataNode(name=name, path=path, read_only=False)
+    return client.save_data_node(data_node)
+
+
+@scenario("single_writes")
+def single_writes(client, server, **kwargs):
+    data_node = _create_data_node(client, "SingleWrites")
+    return (lambda: client.save_data_node_value(DataNodeValue(value=1.5, data_node=data_node))), 1
+
+
+@scenario("batched_writes")
+def batched_writes(client, server, batch_size, **kwargs):
+    data_node = _create_data_node(client, "BatchedWrites")
+
+    def operation():
+        client.save_data_node_values([DataNodeValue(value=float(index), data_node=data_node)
+                                      for index in range(batch_size)])
+
+    return operation, batch_size
+
+
+@scenario("history_pagination")
+def history_pagination(client, server, history_size, **kwargs):
+    data_node = _create_data_node(client, "History")
+    for index in range(history_size):
+        timestamp = "2019-01-01T00:00:{0:02d}.{1:06d}+00:00".format(index % 60, index)
+        server.add_value(data_node.id, float(index), timestamp)
+
+    def operation():
+        for _ in client.iter_data_node_values(data_node, page_size=500):
+            pass
+
+    return operation, history_size
+
+
+@scenario("node_lookups")
+def node_lookups(client, server, **kwargs):
+    for index in range(500):
+        server.add_data_node("Node{0}".format(index), "Benchmark/Line{0}".format(index % 10))
+    client.refresh_data_nodes(page_size=500)
+    names = [("Benchmark/Line{0}".format(index % 10), "Node{0}".format(index)) for index in range(500)]
+
+    def operation():
+        for path, name in names:
+            client.get_data_node_by_name(path=path, name=name)
+
+    return operation, len(names)
+
+
+@scenario("node_lookups_by_id")
+def node_lookups_by_id(client, server, **kwargs):
+    data_node = _create_data_node(client, "LookupById")
+    return (lambda: client.get_data_node_by_id(data_node.id)), 1
+
+
+@scenario("encode_values")
+def encode_values(client, server, batch_size, **kwargs):
+    data_node = DataNode(name="Encode", path="Benchmark")
+    data_node_values = [DataNodeValue(value=index * 0.5, timestamp="2019-01-01T00:00:00.000000+00:00",
+                                      data_node=data_node) for index in range(batch_size)]
+
+    def operation():
+        client.codec.encode([data_node_value.to_dict() for data_node_value in data_node_values])
+
+    return operation, batch_size
+
+
+@scenario("decode_values")
+def decode_values(client, server, history_size, **kwargs):
+    data_node = DataNode(name="Decode", path="Benchmark")
+    body = client.codec.encode({'values': [
+        {'id': index, 'value': index * 0.5, 'timestamp': "2019-01-01T00:00:00.000000+00:00"}
+        for index in range(history_size)]})
+
+    def operation():
+        DataNodeValue.from_list(client.codec.decode(body)['values'], data_node)
+
+    return operation, history_size
@@ -0,0 +1,219 @@
+import threading
+from array import array
+
+from remoteclick.datanode_value import DataNodeValue, ns_to_datetime, timestamp_to_ns
+from remoteclick.value_type import ValueType
+
+STATISTICS = ("min", "max", "mean", "sum", "count", "first", "last")
+
+
+class AggregationPolicy:
+    def __init__(self, window, step=None, statistics="mean", target=None, capacity=4096, keep_raw=False):
+        # windows are tumbling unless a shorter step makes them slide
+        if window <= 0:
+            raise ValueError("window must be positive")
+        if step is not None and not 0 < step <= window:
+            raise ValueError("step must be positive and not longer than the window")
+        names = [statistics] if isinstance(statistics, str) else list(statistics)
+        for name in names:
+            if name not in STATISTICS:
+                raise ValueError("unknown statistic: {0}. use one of {1}".format(name, ", ".join(STATISTICS)))
+        self.window = window
+        self.step = step or window
+        # a single statistic is sent to `target`, several statistics map each statistic to its own data node
+        self.statistics = statistics
+        self.target = target
+        self.capacity = capacity
+        self.keep_raw = keep_raw
+
+    def is_sliding(self):
+        return self.step < self.window
+
+    def targets(self, data_node):
+        if isinstance(self.statistics, str):
+            return {self.statistics: self.target or data_node}
+        return dict(self.statistics)
+
+    def __str__(self):
+        return self.__dict__.__str__()
+
+
+class Aggregator:
+    def __init__(self):
+        self.received = 0
+        self.emitted = 0
+        self.late = 0
+        self.overwritten = 0
+        self._policies = {}
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def set_policy(self, data_node, policy):
+        if data_node.value_type == ValueType.STRING:
+            raise ValueError("values of data node {0} are not numeric".format(data_node.full_name()))
+        targets = policy.targets(data_node)
+        if policy.keep_raw and any(target is data_node or target.id == data_node.id for target in targets.values()):
+            raise ValueError("raw values are kept on the data node itself, aggregates need other data nodes")
+        with self._lock:
+            self._policies[data_node.id] = policy
+            self._windows[data_node.id] = _Window(policy, targets)
+
+    def remove_policy(self, data_node):
+        with self._lock:
+            self._policies.pop(data_node.id, None)
+            self._windows.pop(data_node.id, None)
+
+    def get_policy(self, data_node):
+        return self._policies.get(data_node.id)
+
+    def is_aggregated(self, data_node):
+        return data_node.id in self._policies
+
+    def add(self, data_node_value):
+        if data_node_value.value is None:
+            return []
+        timestamp = timestamp_to_ns(data_node_value.timestamp)
+        with self._lock:
+            window = self._windows.get(data_node_value.data_node.id)
+            if window is None:
+                return []
+            self.received += 1
+            aggregates = window.add(timestamp, float(data_node_value.value))
+            if window.late:
+                self.late += window.late
+                window.late = 0
+            if window.samples.overwritten:
+                self.overwritten += window.samples.overwritten
+                window.samples.overwritten = 0
+            self.emitted += len(aggregates)
+        return aggregates
+
+    def flush(self, data_node=None):
+        # emits the windows which are still open, e.g. before shutting down
+        with self._lock:
+            if data_node is None:
+                windows = list(self._windows.values())
+            else:
+                windows = [self._windows[data_node.id]] if data_node.id in self._windows else []
+            aggregates = [aggregate for window in windows for aggregate in window.flush()]
+            self.emitted += len(aggregates)
+        return aggregates
+
+    def stats(self):
+        with self._lock:
+            return {
+                'received': self.received,
+                'emitted': self.emitted,
+                'late': self.late,
+                'overwritten': self.overwritten,
+                'data_nodes': {data_node_id: len(window.samples) for data_node_id, window in self._windows.items()},
+            }
+
+
+class RingBuffer:
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.overwritten = 0
+        self._start = 0
+        self._size = 0
+
+    def append(self, timestamp, value):
+        if self._size == self.capacity:
+            # a full buffer loses its oldest sample rather than growing
+            self._start = (self._start + 1) % self.capacity
+            self._size -= 1
+            self.overwritten += 1
+        index = (self._start + self._size) % self.capacity
+        self.timestamps[index] = timestamp
+        self.values[index] = value
+        self._size += 1
+
+    def oldest(self):
+        return self.timestamps[self._start] if self._size else None
+
+    def drop_before(self, timestamp):
+        while self._size and self.timestamps[self._start] < timestamp:
+            self._start = (self._start + 1) % self.capacity
+            self._size -= 1
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def statistics(self, since, until):
+        count = 0
+        total = 0.0
+        minimum = maximum = first = last = None
+        timestamps, values, capacity = self.timestamps, self.values, self.capacity
+        for offset in range(self._size):
+            index = (self._start + offset) % capacity
+            if not since <= timestamps[index] < until:
+                continue
+            value = values[index]
+            if count == 0:
+                minimum = maximum = first = value
+            elif value < minimum:
+                minimum = value
+            elif value > maximum:
+                maximum = value
+            last = value
+            total += value
+            count += 1
+        if count == 0:
+            return None
+        return {'min': minimum, 'max': maximum, 'mean': total / count, 'sum': total, 'count': count, 'first': first,
+                'last': last}
+
+    def __len__(self):
+        return self._size
+
+
+class _Window:
+    def __init__(self, policy, targets):
+        self.policy = policy
+        self.targets = targets
+        self.length = int(policy.window * 1e9)
+        self.step = int(policy.step * 1e9)
+        self.samples = RingBuffer(policy.capacity)
+        self.end = None
+        self.late = 0
+
+    def add(self, timestamp, value):
+        aggregates = []
+        if self.end is None:
+            self.end = self._end_of(timestamp)
+        while timestamp >= self.end:
+            aggregates.extend(self._emit())
+            self.end += self.step
+            self.samples.drop_before(self.end - self.length)
+            if not len(self.samples):
+                # nothing was sampled for a while, skip the empty windows
+                self.end = max(self.end, self._end_of(timestamp))
+        if timestamp < self.end - self.length:
+            self.late += 1
+            return aggregates
+        self.samples.append(timestamp, value)
+        return aggregates
+
+    def flush(self):
+        if self.end is None:
+            return []
+        aggregates = self._emit()
+        self.samples.clear()
+        self.end = None
+        return aggregates
+
+    def _emit(self):
+        statistics = self.samples.statistics(self.end - self.length, self.end)
+        if statistics is None:
+            return []
+        timestamp = ns_to_datetime(self.end).isoformat()
+        return [DataNodeValue(value=statistics[name], timestamp=timestamp, data_node=data_node)
+                for name, data_node in self.targets.items()]
+
+    def _end_of(self, timestamp):
+        return timestamp - timestamp % self.step + self.step
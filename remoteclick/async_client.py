@@ -0,0 +1,432 @@
+import asyncio
+import logging
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from remoteclick.codec import CONTENT_TYPE, get_codec
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue, parse_timestamp
+from remoteclick.exceptions import TransportError, error_for_status
+from remoteclick.instrumentation import Instrumentation, Metrics, OpenTelemetryHooks
+from remoteclick.ratelimit import (IDEMPOTENT_METHODS, RETRY_STATUS_CODES, THROTTLING_STATUS_CODES,
+                                   AdaptiveRateLimiter, Backoff, TokenBucket, parse_retry_after)
+
+
+class AsyncRemoteClickClient:
+    def __init__(self, pool_size=10, max_concurrency=10, timeout=30, keep_alive=True, codec=None, max_retries=3,
+                 backoff_factor=0.3, max_backoff=30.0, rate_limit=None):
+        if aiohttp is None:
+            raise ImportError("AsyncRemoteClickClient requires aiohttp. "
+                              "install it with: pip install remoteclick[async]")
+        self.logger = logging.getLogger("AsyncRemoteclickClient")
+        self.password = ""
+        self.username = ""
+        self.base_url = "https://api.remoteclick.ch/api/"
+        self.connected = False
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.codec = get_codec(codec)
+        self.max_retries = max_retries
+        self.backoff = Backoff(backoff_factor, max_backoff)
+        if rate_limit is None or isinstance(rate_limit, TokenBucket):
+            self.rate_limiter = rate_limit
+        else:
+            self.rate_limiter = AdaptiveRateLimiter(rate_limit)
+        self.session = None
+        self._semaphore = None
+        # the largest page the api returned per kind of list. it may return fewer items than requested
+        self._page_sizes = {}
+        self.instrumentation = None
+        self.metrics = None
+
+        self.name = ""
+        self.manufacturer = ""
+        self.device_type = ""
+        self.description = ""
+        self.data_nodes = {}
+        self.id = ""
+        self.token = ""
+
+    def set_credentials(self, username, password):
+        self.password = password
+        self.username = username
+
+    def set_base_url(self, base_url):
+        self.base_url = base_url
+
+    def add_request_hooks(self, pre=None, post=None):
+        instrumentation = self.instrumentation or Instrumentation()
+        instrumentation.add_hooks(pre, post)
+        self.instrumentation = instrumentation
+
+    def remove_request_hooks(self, pre=None, post=None):
+        if self.instrumentation is None:
+            return
+        self.instrumentation.remove_hooks(pre, post)
+        if not self.instrumentation.is_enabled():
+            self.instrumentation = None
+
+    def enable_metrics(self, buckets=None):
+        if self.metrics is None:
+            self.metrics = Metrics(buckets) if buckets else Metrics()
+            self.add_request_hooks(post=self.metrics)
+        return self.metrics
+
+    def disable_metrics(self):
+        if self.metrics is not None:
+            self.remove_request_hooks(post=self.metrics)
+            self.metrics = None
+
+    def enable_tracing(self, tracer=None):
+        hooks = OpenTelemetryHooks(tracer)
+        self.add_request_hooks(pre=hooks.pre, post=hooks.post)
+        return hooks
+
+    async def connect(self):
+        if self.connected:
+            self.logger.warning("already connected!")
+            return self.connected
+
+        self.logger.debug("connecting..")
+        status, response_content = await self._request(
+            "POST", "oauth/device/token",
+            data={'username': self.username, 'password': self.password, 'grant_type': 'password'},
+            authenticated=False, operation="authenticate"
+        )
+        if status != 200:
+            raise ConnectionError(self._make_error_message(status, response_content))
+        self.name = response_content["name"]
+        self.device_type = response_content["deviceType"]
+        self.manufacturer = response_content["manufacturer"]
+        self.id = response_content["id"]
+        self.token = response_content["access_token"]
+        self.connected = True
+        self.logger.debug("successfully connected and authenticated.")
+        return self.connected
+
+    def is_connected(self):
+        return self.connected
+
+    async def disconnect(self):
+        self.connected = False
+        self.name = ""
+        self.manufacturer = ""
+        self.device_type = ""
+        self.description = ""
+        self.data_nodes = {}
+        self.id = ""
+        self.token = ""
+
+    async def update(self):
+        self.logger.debug("updating..")
+        await self.disconnect()
+        await self.connect()
+
+    async def close(self):
+        await self.disconnect()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def get_data_nodes(self, limit=50, offset=0):
+        self.logger.debug("requesting data nodes.. (limit=%s, offset=%s)", limit, offset)
+        status, response_content = await self._request("GET", "datanodes", params={'limit': limit, 'offset': offset},
+                                                       operation="get_data_nodes")
+        if status != 200:
+            raise error_for_status(status, response_content)
+        self.data_nodes = {}
+        for raw_data_node in response_content['dataNodes']:
+            data_node = DataNode.from_dict(raw_data_node)
+            self.data_nodes[data_node.id] = data_node
+        self.logger.debug("successfully got %s data nodes.", len(self.data_nodes))
+        return list(self.data_nodes.values())
+
+    async def iter_data_nodes(self, page_size=50):
+        async for raw_data_node in self._iter_pages("datanodes", "dataNodes", page_size, "iter_data_nodes"):
+            data_node = DataNode.from_dict(raw_data_node)
+            self.data_nodes[data_node.id] = data_node
+            yield data_node
+
+    async def get_data_node_by_name(self, path="", name=""):
+        if not path and not name:
+            self.logger.error("invalid parameters. name and path cannot both be empty!")
+            return None
+
+        async for data_node in self.iter_data_nodes():
+            if data_node.name == name and data_node.path == path:
+                return data_node
+        return None
+
+    async def get_data_node_by_id(self, data_node_id):
+        if not data_node_id:
+            self.logger.error("invalid parameters. id must not be empty!")
+            return None
+        if data_node_id in self.data_nodes:
+            return self.data_nodes[data_node_id]
+
+        status, response_content = await self._request("GET", "datanodes/{0}".format(data_node_id),
+                                                       operation="get_data_node_by_id")
+        if status != 200:
+            raise error_for_status(status, response_content)
+        return DataNode.from_dict(response_content)
+
+    async def save_data_node(self, data_node):
+        if data_node.id and isinstance(data_node.id, int):
+            self.logger.debug("updating existing data node with id: %s", data_node.id)
+            return await self.update_data_node(data_node)
+
+        async for existing_data_node in self.iter_data_nodes():
+            if existing_data_node.full_name() == data_node.full_name():
+                self.logger.warning("data node with same name and path already exists! not saving data node.")
+                return existing_data_node
+
+        self.logger.debug("saving data node..")
+        status, response_content = await self._request("POST", "datanodes", content=data_node.to_dict(),
+                                                       operation="save_data_node")
+        if status != 201:
+            raise error_for_status(status, response_content)
+        data_node = DataNode.from_dict(response_content)
+        self.data_nodes[data_node.id] = data_node
+        self.logger.debug("successfully saved data node. received id: %s", data_node.id)
+        return data_node
+
+    async def update_data_node(self, data_node):
+        if not data_node.id or not isinstance(data_node.id, int):
+            self.logger.error("cannot update non-existing data node! data node must be saved first.")
+            return False
+        self.logger.debug("updating data node with id: %s ..", data_node.id)
+        status, response_content = await self._request("PATCH", "datanodes/" + str(data_node.id),
+                                                       content=data_node.to_dict(),
+                                                       operation="update_data_node")
+        if status != 202:
+            raise error_for_status(status, response_content)
+        data_node = DataNode.from_dict(response_content)
+        self.data_nodes[data_node.id] = data_node
+        self.logger.debug("successfully updated data node with id: %s", data_node.id)
+        return data_node
+
+    async def delete_data_node(self, data_node):
+        if not data_node.id or not isinstance(data_node.id, int):
+            self.logger.error("cannot delete non-existing data node!")
+            return False
+        self.logger.debug("deleting data node with id: %s ..", data_node.id)
+        status, response_content = await self._request("DELETE", "datanodes/" + str(data_node.id),
+                                                       operation="delete_data_node")
+        if status != 200:
+            raise error_for_status(status, response_content)
+        self.data_nodes.pop(data_node.id, None)
+        return True
+
+    async def save_data_node_value(self, data_node_value):
+        if data_node_value.id and isinstance(data_node_value.id, int):
+            self.logger.debug("updating existing data node value with id: %s", data_node_value.id)
+            return await self.update_data_node_value(data_node_value)
+
+        if not data_node_value.data_node:
+            raise ValueError("data-node of value cannot be none")
+
+        self.logger.debug("saving data node value..")
+        status, response_content = await self._request(
+            "POST", "datanodes/{0}/values".format(data_node_value.data_node.id),
+            content=data_node_value.to_dict(), operation="save_data_node_value"
+        )
+        if status != 201:
+            raise error_for_status(status, response_content)
+        saved_data_node_value = DataNodeValue.from_dict(response_content, data_node_value.data_node)
+        data_node_value.data_node.values[saved_data_node_value.id] = saved_data_node_value
+
+        self.logger.debug("successfully saved value of data-node. received id: %s", saved_data_node_value.id)
+        return saved_data_node_value
+
+    async def save_data_node_values(self, data_node_values):
+        return await asyncio.gather(*[self.save_data_node_value(v) for v in data_node_values])
+
+    async def get_data_node_values(self, data_node, limit=50, offset=0):
+        if not data_node.id or not isinstance(data_node.id, int):
+            self.logger.error("cannot request data node values for data node without id!")
+            return False
+
+        self.logger.debug("requesting values of data node..")
+        status, response_content = await self._request("GET", "datanodes/{0}/values".format(data_node.id),
+                                                       params={'limit': limit, 'offset': offset},
+                                                       operation="get_data_node_values")
+        if status != 200:
+            raise error_for_status(status, response_content)
+
+        values = DataNodeValue.from_list(response_content['values'], data_node)
+        for data_node_value in values:
+            data_node.values[data_node_value.id] = data_node_value
+        self.logger.debug("successfully got %s values for data node with id:%s", len(values), data_node.id)
+        return values
+
+    async def iter_data_node_values(self, data_node, since=None, until=None, page_size=50):
+        if not data_node.id or not isinstance(data_node.id, int):
+            raise ValueError("cannot request data node values for data node without id!")
+        since = parse_timestamp(since) if since is not None else None
+        until = parse_timestamp(until) if until is not None else None
+
+        # the api returns the newest values first
+        async for raw_value in self._iter_pages("datanodes/{0}/values".format(data_node.id), "values", page_size,
+                                                "iter_data_node_values"):
+            if since is not None or until is not None:
+                timestamp = parse_timestamp(raw_value["timestamp"])
+                if until is not None and timestamp > until:
+                    continue
+                if since is not None and timestamp < since:
+                    return
+            yield DataNodeValue.from_dict(raw_value, data_node)
+
+    async def get_current_data_node_value(self, data_node):
+        if not data_node.id or not isinstance(data_node.id, int):
+            self.logger.error("cannot request data node values for data node without id!")
+            return False
+        self.logger.debug("requesting current value of data node..")
+        status, response_content = await self._request("GET", "datanodes/{0}/values/current".format(data_node.id),
+                                                       operation="get_current_data_node_value")
+        if status != 200:
+            raise error_for_status(status, response_content)
+
+        return DataNodeValue.from_dict(response_content)
+
+    async def update_data_node_value(self, data_node_value):
+        if not data_node_value.data_node or not isinstance(data_node_value.data_node.id, int):
+            self.logger.error("invalid parameters! data_node_value must belong to existing data_node with an id!")
+            return False
+        self.logger.debug("updating current value of data node..")
+        status, response_content = await self._request(
+            "PATCH", "datanodes/{0}/values/current".format(data_node_value.data_node.id),
+            content=data_node_value.to_dict(), operation="update_data_node_value"
+        )
+        if status != 200:
+            raise error_for_status(status, response_content)
+
+        updated_data_node_value = DataNodeValue.from_dict(response_content, data_node_value.data_node)
+        return updated_data_node_value
+
+    async def _iter_pages(self, endpoint, key, page_size, operation=None):
+        offset = 0
+        page = await self._get_page(endpoint, key, page_size, offset, operation)
+        while page:
+            offset += len(page)
+            next_page = None
+            if not self._is_last_page(key, page, page_size):
+                next_page = asyncio.ensure_future(self._get_page(endpoint, key, page_size, offset, operation))
+            try:
+                for item in page:
+                    yield item
+            except GeneratorExit:
+                if next_page is not None:
+                    next_page.cancel()
+                raise
+            if next_page is None:
+                return
+            page = await next_page
+
+    def _is_last_page(self, key, page, page_size):
+        # a server which caps the page size returns fewer items than requested although more follow. a short page is
+        # only the last one if the api returned longer pages of the same list before
+        largest = self._page_sizes.get(key, 0)
+        if len(page) > largest:
+            self._page_sizes[key] = len(page)
+        return len(page) < page_size and len(page) < largest
+
+    async def _get_page(self, endpoint, key, limit, offset, operation=None):
+        self.logger.debug("requesting page of %s.. (limit=%s, offset=%s)", endpoint, limit, offset)
+        status, response_content = await self._request("GET", endpoint, params={'limit': limit, 'offset': offset},
+                                                       operation=operation or "get_page")
+        if status != 200:
+            raise error_for_status(status, response_content)
+        return response_content[key]
+
+    def _get_session(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive)
+            self.session = aiohttp.ClientSession(connector=connector,
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.session
+
+    async def _request(self, method, endpoint, data=None, params=None, authenticated=True, operation="request",
+                       content=None):
+        headers = {'Authorization': self.token} if authenticated else {}
+        if content is not None:
+            data = self.codec.encode(content)
+            headers['Content-Type'] = CONTENT_TYPE
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return (await self._send_with_retries(method, endpoint, data, params, headers))[:2]
+
+        info = instrumentation.start(operation, method, endpoint, data if isinstance(data, (str, bytes)) else None)
+        try:
+            status, content, size, retries = await self._send_with_retries(method, endpoint, data, params, headers)
+        except Exception as e:
+            instrumentation.finish(info, error=e)
+            raise
+        instrumentation.finish(info, status, size, retries)
+        return status, content
+
+    async def _send_with_retries(self, method, endpoint, data, params, headers):
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await asyncio.sleep(self.rate_limiter.reserve())
+            try:
+                status, content, size, retry_after = await self._send(method, endpoint, data, params, headers)
+            except TransportError as e:
+                # a connection which could not be opened carried nothing, other failures are only repeated for
+                # idempotent requests
+                if attempt >= self.max_retries or (method not in IDEMPOTENT_METHODS
+                                                   and not isinstance(e.__cause__, aiohttp.ClientConnectorError)):
+                    raise
+                delay = self.backoff.delay(attempt)
+                self.logger.debug("request failed, retrying in %.2fs: %s", delay, e)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            retry_after = parse_retry_after(retry_after) if status in THROTTLING_STATUS_CODES else None
+            if self.rate_limiter is not None:
+                if status == 429 or retry_after is not None:
+                    self.rate_limiter.on_throttle(retry_after)
+                elif status < 500:
+                    self.rate_limiter.on_success()
+
+            if status not in RETRY_STATUS_CODES or attempt >= self.max_retries or \
+                    (status != 429 and method not in IDEMPOTENT_METHODS):
+                return status, content, size, attempt
+            delay = self.backoff.delay(attempt, retry_after)
+            if delay is None:
+                return status, content, size, attempt
+            self.logger.debug("api returned status code %s, retrying in %.2fs..", status, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(self, method, endpoint, data, params, headers):
+        session = self._get_session()
+        try:
+            async with self._semaphore:
+                async with session.request(method, self.base_url + endpoint, data=data, params=params,
+                                           headers=headers) as response:
+                    body = await response.read()
+        except aiohttp.ClientError as e:
+            raise TransportError(str(e)) from e
+        except asyncio.TimeoutError as e:
+            raise TransportError("request timed out after {0}s".format(self.timeout)) from e
+        try:
+            content = self.codec.decode(body) if body else None
+        except ValueError:
+            content = body
+        return response.status, content, len(body), response.headers.get('Retry-After')
+
+    def _make_error_message(self, status, content):
+        return "api returned status code: {0} with message: {1}".format(status, content)
@@ -0,0 +1,981 @@
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from remoteclick.aggregation import Aggregator
+from remoteclick.codec import CONTENT_TYPE, get_codec
+from remoteclick.compression import ENCODINGS, compress
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue, parse_timestamp
+from remoteclick.exceptions import NotFoundError, RequestError, TransientError, TransportError, error_for_status
+from remoteclick.instrumentation import Instrumentation, Metrics, OpenTelemetryHooks, TrafficCounters
+from remoteclick.ratelimit import (IDEMPOTENT_METHODS, RETRY_STATUS_CODES, THROTTLING_STATUS_CODES,
+                                   AdaptiveRateLimiter, Backoff, TokenBucket, parse_retry_after)
+from remoteclick.registry import DataNodeRegistry
+from remoteclick.reporting import ReportingFilter
+from remoteclick.transport import TRANSPORTS, Transport, create_transport
+from remoteclick.value_series import ValueSeries
+
+JSON_HEADERS = {'Content-Type': CONTENT_TYPE}
+# asks the api to confirm writes without echoing the saved entity (RFC 7240)
+PREFER_MINIMAL = {'Prefer': 'return=minimal'}
+
+
+class OAuth2:
+    def __init__(self, token):
+        self.token = token
+
+    def __call__(self, r):
+        r.headers['Authorization'] = self.token
+        return r
+
+
+class RemoteClickClient:
+    def __init__(self, pool_size=10, timeout=(5, 30), max_retries=3, backoff_factor=0.3, keep_alive=True,
+                 registry_ttl=60.0, refresh_margin=60.0, refresh_jitter=0.1, codec=None, session=None, executor=None,
+                 rate_limit=None, max_backoff=30.0, transport="requests", max_workers=None, compression=None,
+                 compression_threshold=1024, minimal_responses=False):
+        if not isinstance(transport, Transport) and transport not in TRANSPORTS:
+            raise ValueError("unknown transport: {0}. use one of {1}".format(transport, ", ".join(TRANSPORTS)))
+        if compression is not None and compression not in ENCODINGS:
+            raise ValueError("unknown compression: {0}. use one of {1}".format(compression, ", ".join(ENCODINGS)))
+        self.logger = logging.getLogger("RemoteclickClient")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.codec = get_codec(codec)
+        self.bulk_values_supported = None
+        self.bulk_current_values_supported = None
+        # request bodies of at least compression_threshold bytes are compressed, until the api rejects them once
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_supported = None
+        self.minimal_responses = minimal_responses
+        # the largest page the api returned per kind of list. it may return fewer items than requested
+        self._page_sizes = {}
+        self.traffic = TrafficCounters()
+        self._current_values = {}
+        self.outbox = None
+        self._outbox_drainer = None
+        self.reporting = ReportingFilter()
+        self.aggregation = Aggregator()
+        self.history_cache = None
+        self.instrumentation = None
+        self.metrics = None
+        # a transport, a session and an executor passed in are shared with other clients and are not closed by this
+        # client
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._executor_lock = threading.Lock()
+        # submitted operations get their own pool. they may wait for work the client parallelizes internally on the
+        # executor, sharing it could let submitted operations occupy every worker and wait for each other forever
+        self.max_workers = max_workers or pool_size
+        self._workers = None
+        self._owns_transport = session is None and not isinstance(transport, Transport)
+        if isinstance(session, Transport):
+            transport = session
+        elif session is not None:
+            from remoteclick.session import RequestsTransport
+            transport = RequestsTransport(session)
+        elif self._owns_transport:
+            transport = create_transport(transport, pool_size=pool_size, max_retries=max_retries,
+                                         backoff_factor=backoff_factor, keep_alive=keep_alive)
+        self.transport = transport
+        self.stats = transport.stats
+        self.auth_limiter = None
+        self.max_retries = max_retries
+        self.backoff = Backoff(backoff_factor, max_backoff)
+        if rate_limit is None or isinstance(rate_limit, TokenBucket):
+            self.rate_limiter = rate_limit
+        else:
+            self.rate_limiter = AdaptiveRateLimiter(rate_limit)
+        self._auth = None
+        self._auth_lock = threading.RLock()
+        self._registry_lock = threading.Lock()
+        self._refresh_timer = None
+        self.refresh_margin = refresh_margin
+        self.refresh_jitter = refresh_jitter
+        self.password = ""
+        self.username = ""
+        self.base_url = "https://api.remoteclick.ch/api/"
+        self.connected = False
+
+        self.name = ""
+        self.manufacturer = ""
+        self.device_type = ""
+        self.description = ""
+        self.registry = DataNodeRegistry(ttl=registry_ttl)
+        self.id = ""
+        self.token = ""
+        self.refresh_token = ""
+        self.token_expires_at = None
+
+    @property
+    def data_nodes(self):
+        return self.registry.nodes
+
+    def set_credentials(self, username, password):
+        self.password = password
+        self.username = username
+
+    def set_base_url(self, base_url):
+        self.base_url = base_url
+
+    @property
+    def session(self):
+        # the requests.Session of the requests transport, other transports are their own session
+        return getattr(self.transport, 'session', self.transport)
+
+    def connection_stats(self):
+        return self.stats.to_dict()
+
+    def set_reporting_policy(self, data_node, policy):
+        if policy is None:
+            self.reporting.remove_policy(data_node)
+        else:
+            self.reporting.set_policy(data_node, policy)
+
+    def set_aggregation_policy(self, data_node, policy):
+        if policy is None:
+            self.aggregation.remove_policy(data_node)
+            return
+        if policy.keep_raw and self.outbox is None:
+            raise ValueError("keeping raw values requires an outbox")
+        self.aggregation.set_policy(data_node, policy)
+
+    def flush_aggregates(self):
+        return [self._report(aggregate) for aggregate in self.aggregation.flush()]
+
+    def add_request_hooks(self, pre=None, post=None):
+        instrumentation = self.instrumentation or Instrumentation()
+        instrumentation.add_hooks(pre, post)
+        self.instrumentation = instrumentation
+
+    def remove_request_hooks(self, pre=None, post=None):
+        if self.instrumentation is None:
+            return
+        self.instrumentation.remove_hooks(pre, post)
+        if not self.instrumentation.is_enabled():
+            # requests skip instrumentation entirely while no hooks are registered
+            self.instrumentation = None
+
+    def enable_metrics(self, buckets=None):
+        if self.metrics is None:
+            self.metrics = Metrics(buckets) if buckets else Metrics()
+            self.add_request_hooks(post=self.metrics)
+        return self.metrics
+
+    def disable_metrics(self):
+        if self.metrics is not None:
+            self.remove_request_hooks(post=self.metrics)
+            self.metrics = None
+
+    def enable_tracing(self, tracer=None):
+        hooks = OpenTelemetryHooks(tracer)
+        self.add_request_hooks(pre=hooks.pre, post=hooks.post)
+        return hooks
+
+    def enable_outbox(self, path, max_values=100000, overflow="drop_oldest", batch_size=500, retry_interval=5.0):
+        from remoteclick.outbox import Outbox, OutboxDrainer
+        self.disable_outbox()
+        self.outbox = Outbox(path, max_values=max_values, overflow=overflow)
+        self._outbox_drainer = OutboxDrainer(self, self.outbox, batch_size=batch_size,
+                                             retry_interval=retry_interval).start()
+        return self.outbox
+
+    def disable_outbox(self):
+        if self._outbox_drainer:
+            self._outbox_drainer.stop()
+            self._outbox_drainer = None
+        if self.outbox:
+            self.outbox.close()
+            self.outbox = None
+
+    def enable_history_cache(self, path=":memory:", max_age=None, max_values=None, sync_interval=0.0, page_size=1000):
+        from remoteclick.history_cache import HistoryCache
+        self.disable_history_cache()
+        self.history_cache = HistoryCache(path, max_age=max_age, max_values=max_values, sync_interval=sync_interval,
+                                          page_size=page_size)
+        return self.history_cache
+
+    def disable_history_cache(self):
+        if self.history_cache:
+            self.history_cache.close()
+            self.history_cache = None
+
+    def submit(self, operation, *args, **kwargs):
+        # runs a client method (or its name) on the worker pool, so many producers can share one client
+        if isinstance(operation, str):
+            operation = getattr(self, operation)
+        return self._get_workers().submit(operation, *args, **kwargs)
+
+    def close(self):
+        with self._executor_lock:
+            workers, self._workers = self._workers, None
+        if workers is not None:
+            workers.shutdown(wait=True)
+        if self.connected:
+            try:
+                self.flush_aggregates()
+            except RequestError as e:
+                self.logger.warning("could not save aggregates of open windows: %s", e)
+        self.disable_outbox()
+        self.disable_history_cache()
+        self.disconnect()
+        with self._executor_lock:
+            executor = self._executor if self._owns_executor else None
+            if executor is not None:
+                self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def connect(self):
+        with self._auth_lock:
+            if self.connected:
+                self.logger.warning("already connected!")
+                return self.connected
+
+            self.logger.debug("connecting..")
+            self._authenticate()
+            self.connected = True
+        self.logger.debug("successfully connected and authenticated.")
+        return self.connected
+
+    def is_connected(self):
+        return self.connected
+
+    def disconnect(self):
+        with self._auth_lock:
+            self.connected = False
+            self._cancel_refresh()
+            self.registry.clear()
+            self.name = ""
+            self.manufacturer = ""
+            self.device_type = ""
+            self.description = ""
+            self.id = ""
+            self.token = ""
+            self.refresh_token = ""
+            self.token_expires_at = None
+            self._auth = None
+
+    def update(self):
+        self.logger.debug("updating..")
+        if not self.connected:
+            return self.connect()
+        self._authenticate(refresh=True)
+        return self.connected
+
+    def get_data_nodes(self, limit=50, offset=0):
+        self.logger.debug("requesting data nodes.. (limit=%s, offset=%s)", limit, offset)
+        response = self._request("GET", "datanodes", params={'limit': limit, 'offset': offset},
+                                 operation="get_data_nodes")
+        if response.status_code != 200:
+            raise self._make_error(response)
+        data_nodes = self.registry.add_many([DataNode.from_dict(raw_data_node)
+                                             for raw_data_node in self._decode(response)['dataNodes']])
+        self.logger.debug("successfully got %s data nodes.", len(data_nodes))
+        return data_nodes
+
+    def iter_data_nodes(self, page_size=50):
+        for page in self._iter_data_node_pages(page_size):
+            yield from self.registry.add_many(page)
+
+    def refresh_data_nodes(self, page_size=50):
+        self.logger.debug("refreshing data node registry..")
+        self.registry.replace([data_node for page in self._iter_data_node_pages(page_size) for data_node in page])
+        return list(self.registry)
+
+    def _iter_data_node_pages(self, page_size):
+        for page in self._iter_page_lists("datanodes", "dataNodes", page_size, "iter_data_nodes"):
+            yield [DataNode.from_dict(raw_data_node) for raw_data_node in page]
+
+    def get_data_nodes_by_prefix(self, prefix):
+        self._ensure_registry()
+        return self.registry.get_by_prefix(prefix)
+
+    def get_data_nodes_by_pattern(self, pattern):
+        self._ensure_registry()
+        return self.registry.match(pattern)
+
+    def get_subtree(self, path=""):
+        self._ensure_registry()
+        return self.registry.get_subtree(path)
+
+    def get_current_values_by_prefix(self, prefix):
+        return self.get_current_values(data_node for data_node in self.get_data_nodes_by_prefix(prefix)
+                                       if data_node.id is not None)
+
+    def delete_subtree(self, prefix):
+        if not prefix.strip("/"):
+            raise ValueError("prefix must not be empty! refusing to delete all data nodes.")
+        data_nodes = self.get_data_nodes_by_prefix(prefix)
+        self.logger.debug("deleting %s data nodes under %s ..", len(data_nodes), prefix)
+        executor = self._get_executor()
+        futures = [executor.submit(self.delete_data_node, data_node) for data_node in data_nodes]
+        deleted, errors = [], []
+        for data_node, future in zip(data_nodes, futures):
+            try:
+                future.result()
+            except NotFoundError:
+                # deleted by someone else in the meantime
+                self.registry.remove(data_node)
+            except RequestError as e:
+                errors.append(e)
+                continue
+            deleted.append(data_node)
+        if errors:
+            self.logger.warning("%s of %s data nodes under %s could not be deleted.", len(errors), len(data_nodes),
+                                prefix)
+            raise errors[0]
+        return deleted
+
+    def get_data_node_by_name(self, path="", name=""):
+        if not path and not name:
+            self.logger.error("invalid parameters. name and path cannot both be empty!")
+            return None
+
+        self._ensure_registry()
+        return self.registry.get_by_full_name(DataNode(name=name, path=path).full_name())
+
+    def get_data_node_by_id(self, data_node_id):
+        if not data_node_id:
+            self.logger.error("invalid parameters. id must not be empty!")
+            return None
+        data_node = self.registry.get_by_id(data_node_id)
+        if data_node:
+            return data_node
+
+        response = self._request("GET", "/datanodes/{0}".format(data_node_id), operation="get_data_node_by_id")
+
+        if response.status_code != 200:
+            raise self._make_error(response)
+
+        return self.registry.add(DataNode.from_dict(self._decode(response)))
+
+    def save_data_node(self, data_node):
+        if data_node.id and isinstance(data_node.id, int):
+            self.logger.debug("updating existing data node with id: %s", data_node.id)
+            return self.update_data_node(data_node)
+
+        self._ensure_registry()
+        existing_data_node = self.registry.get_by_full_name(data_node.full_name())
+        if existing_data_node:
+            self.logger.warning("data node with same name and path already exists! not saving data node.")
+            return existing_data_node
+        return self._create_data_node(data_node)
+
+    def sync_data_nodes(self, spec, delete_missing=False, dry_run=False):
+        from remoteclick import provisioning
+        return provisioning.sync_data_nodes(self, spec, delete_missing=delete_missing, dry_run=dry_run)
+
+    def _create_data_node(self, data_node):
+        self.logger.debug("saving data node..")
+        response = self._request("POST", "datanodes", content=data_node.to_dict(), operation="save_data_node")
+
+        if response.status_code != 201:
+            raise self._make_error(response)
+        data_node = self.registry.add(DataNode.from_dict(self._decode(response)))
+        self.logger.debug("successfully saved data node. received id: %s", data_node.id)
+        return data_node
+
+    def update_data_node(self, data_node):
+        if not data_node.id or not isinstance(data_node.id, int):
+            self.logger.error("cannot update non-existing data node! data node must be saved first.")
+            return False
+        self.logger.debug("updating data node with id: %s ..", data_node.id)
+        minimal = self.minimal_responses
+        response = self._request("PATCH", "datanodes/" + str(data_node.id), content=data_node.to_dict(),
+                                 headers=PREFER_MINIMAL if minimal else None, operation="update_data_node")
+        if not self._is_success(response, 202, minimal):
+            raise self._make_error(response)
+        data_node = self.registry.add(data_node if minimal else DataNode.from_dict(self._decode(response)))
+        self.logger.debug("successfully updated data node with id: %s", data_node.id)
+        return data_node
+
+    def delete_data_node(self, data_node):
+        if not data_node.id or not isinstance(data_node.id, int):
+            self.logger.error("cannot delete non-existing data node!")
+            return False
+        self.logger.debug("deleting data node with id: %s ..", data_node.id)
+        response = self._request("DELETE", "datanodes/" + str(data_node.id), operation="delete_data_node")
+        if response.status_code != 200:
+            raise self._make_error(response)
+        self.registry.remove(data_node)
+        if self.history_cache is not None:
+            self.history_cache.clear(data_node)
+        return True
+
+    def save_data_node_value(self, data_node_value):
+        if data_node_value.id and isinstance(data_node_value.id, int):
+            self.logger.debug("updating existing data node value with id: %s", data_node_value.id)
+            self.update_data_node_value(data_node_value)
+
+        if not data_node_value.data_node:
+            raise ValueError("data-node of value cannot be none")
+
+        if self.aggregation.is_aggregated(data_node_value.data_node):
+            # the raw value only goes into its window, aggregates of the windows it closed are saved instead
+            for aggregate in self._aggregate(data_node_value):
+                self._report(aggregate)
+            return None
+        return self._report(data_node_value)
+
+    def _aggregate(self, data_node_value):
+        policy = self.aggregation.get_policy(data_node_value.data_node)
+        if policy is not None and policy.keep_raw and self.outbox is not None:
+            self.outbox.enqueue(data_node_value)
+        return self.aggregation.add(data_node_value)
+
+    def _report(self, data_node_value):
+        if not self.reporting.should_report(data_node_value):
+            return None
+        try:
+            if self.outbox is not None and self.outbox.has_pending(data_node_value.data_node.id):
+                # keep the order of the data node's values while older ones are still waiting in the outbox
+                self.outbox.enqueue(data_node_value)
+                return None
+            return self._post_data_node_value(data_node_value)
+        except TransientError as e:
+            if self.outbox is None:
+                self.reporting.revert(data_node_value)
+                raise
+            self.logger.warning("api not reachable, storing value in outbox: %s", e)
+            self.outbox.enqueue(data_node_value)
+            return None
+        except Exception:
+            self.reporting.revert(data_node_value)
+            raise
+
+    def _post_data_node_value(self, data_node_value):
+        self.logger.debug("saving data node value..")
+        minimal = self.minimal_responses
+        response = self._request("POST", "datanodes/{0}/values".format(data_node_value.data_node.id),
+                                 content=data_node_value.to_dict(), headers=PREFER_MINIMAL if minimal else None,
+                                 operation="save_data_node_value")
+
+        if not self._is_success(response, 201, minimal):
+            raise self._make_error(response)
+        if minimal:
+            # the api confirmed the write without echoing it, the value is returned as it was sent
+            return data_node_value
+        saved_data_node_value = DataNodeValue.from_dict(self._decode(response), data_node_value.data_node)
+        data_node_value.data_node.values[saved_data_node_value.id] = saved_data_node_value
+
+        self.logger.debug("successfully saved value of data-node. received id: %s", saved_data_node_value.id)
+        return saved_data_node_value
+
+    def save_data_node_values(self, data_node_values):
+        for data_node_value in data_node_values:
+            if not data_node_value.data_node:
+                raise ValueError("data-node of value cannot be none")
+
+        # like single values, aggregated values are replaced by their aggregates and suppressed values are not sent.
+        # both are returned as None, as are values stored in the outbox
+        groups = {}
+        for data_node_value in data_node_values:
+            if self.aggregation.is_aggregated(data_node_value.data_node):
+                reported = self._aggregate(data_node_value)
+            else:
+                reported = [data_node_value]
+            for value in reported:
+                if self.reporting.should_report(value, batched=value.data_node.id in groups):
+                    groups.setdefault(value.data_node.id, []).append(value)
+
+        saved = {}
+        for values in groups.values():
+            for data_node_value, saved_data_node_value in zip(values, self._report_many(values)):
+                saved[id(data_node_value)] = saved_data_node_value
+        return [saved.get(id(data_node_value)) for data_node_value in data_node_values]
+
+    def _report_many(self, data_node_values):
+        # the values of one data node, which passed the reporting filter
+        try:
+            if self.outbox is not None and self.outbox.has_pending(data_node_values[0].data_node.id):
+                self.outbox.enqueue_many(data_node_values)
+                return [None] * len(data_node_values)
+            saved_values = self._save_data_node_values_bulk(data_node_values[0].data_node, data_node_values)
+            if saved_values is None:
+                saved_values = list(self._get_executor().map(self._post_data_node_value, data_node_values))
+            return saved_values
+        except TransientError as e:
+            if self.outbox is None:
+                self._revert(data_node_values)
+                raise
+            self.logger.warning("api not reachable, storing values in outbox: %s", e)
+            self.outbox.enqueue_many(data_node_values)
+            return [None] * len(data_node_values)
+        except Exception:
+            self._revert(data_node_values)
+            raise
+
+    def _revert(self, data_node_values):
+        # newest first. the newest value restores the reporting state from before it, or from before its batch
+        for data_node_value in reversed(data_node_values):
+            self.reporting.revert(data_node_value)
+
+    def buffered(self, max_size=100, max_age=1.0):
+        from remoteclick.value_buffer import ValueBuffer
+        return ValueBuffer(self, max_size=max_size, max_age=max_age).start()
+
+    def _save_data_node_values_bulk(self, data_node, data_node_values):
+        if self.bulk_values_supported is False:
+            return None
+
+        self.logger.debug("saving %s values of data node with id: %s in bulk..", len(data_node_values), data_node.id)
+        minimal = self.minimal_responses
+        response = self._request("POST", "datanodes/{0}/values/bulk".format(data_node.id),
+                                 content=[data_node_value.to_dict() for data_node_value in data_node_values],
+                                 headers=PREFER_MINIMAL if minimal else None, operation="save_data_node_values")
+        if not self.bulk_values_supported and (response.status_code == 405 or (
+                response.status_code == 404 and self._data_node_exists(data_node))):
+            # a 404 is also returned for unknown data nodes, only an existing data node proves the endpoint missing
+            self.logger.debug("api does not support bulk saving of values. falling back to single requests.")
+            self.bulk_values_supported = False
+            return None
+        if not self._is_success(response, 201, minimal):
+            raise self._make_error(response)
+        self.bulk_values_supported = True
+        if minimal:
+            return list(data_node_values)
+
+        saved_data_node_values = DataNodeValue.from_list(self._decode(response)['values'], data_node)
+        for saved_data_node_value in saved_data_node_values:
+            data_node.values[saved_data_node_value.id] = saved_data_node_value
+        if len(saved_data_node_values) != len(data_node_values):
+            raise RequestError("api saved {0} of {1} values".format(len(saved_data_node_values),
+                                                                     len(data_node_values)))
+        return saved_data_node_values
+
+    def _data_node_exists(self, data_node):
+        response = self._request("GET", "datanodes/{0}".format(data_node.id), operation="save_data_node_values")
+        if response.status_code == 404:
+            return False
+        if response.status_code != 200:
+            raise self._make_error(response)
+        return True
+
+    def get_data_node_values(self, data_node, limit=50, offset=0):
+        if not data_node.id or not isinstance(data_node.id, int):
+            self.logger.error("cannot request data node values for data node without id!")
+            return False
+
+        raw_values = None
+        if self.history_cache is not None:
+            raw_values = self.history_cache.query(self, data_node, limit=limit, offset=offset)
+        if raw_values is None:
+            self.logger.debug("requesting values of data node..")
+            response = self._request("GET", "datanodes/{0}/values".format(data_node.id),
+                                     params={'limit': limit, 'offset': offset}, operation="get_data_node_values")
+            if response.status_code != 200:
+                raise self._make_error(response)
+            raw_values = self._decode(response)['values']
+        values = DataNodeValue.from_list(raw_values, data_node)
+        for data_node_value in values:
+            data_node.values[data_node_value.id] = data_node_value
+        self.logger.debug("successfully got %s values for data node with id:%s", len(values), data_node.id)
+        return values
+
+    def iter_data_node_values(self, data_node, since=None, until=None, page_size=50):
+        for raw_value in self._iter_raw_values(data_node, since, until, page_size):
+            yield DataNodeValue.from_dict(raw_value, data_node)
+
+    def get_value_series(self, data_node, since=None, until=None, page_size=500):
+        series = ValueSeries.for_data_node(data_node)
+        series.extend_raw(self._iter_raw_values(data_node, since, until, page_size))
+        return series
+
+    def fetch_history(self, data_node, since=None, until=None, as_frame=False, page_size=1000):
+        from remoteclick import history
+        return history.fetch_history(self, data_node, since=since, until=until, as_frame=as_frame,
+                                     page_size=page_size)
+
+    def _iter_raw_values(self, data_node, since, until, page_size):
+        if not data_node.id or not isinstance(data_node.id, int):
+            raise ValueError("cannot request data node values for data node without id!")
+        if self.history_cache is not None:
+            raw_values = self.history_cache.query(self, data_node, since=since, until=until)
+            if raw_values is not None:
+                yield from raw_values
+                return
+        since = parse_timestamp(since) if since is not None else None
+        until = parse_timestamp(until) if until is not None else None
+
+        # the api returns the newest values first
+        for raw_value in self._iter_pages("datanodes/{0}/values".format(data_node.id), "values", page_size,
+                                          "iter_data_node_values"):
+            if since is not None or until is not None:
+                timestamp = parse_timestamp(raw_value["timestamp"])
+                if until is not None and timestamp > until:
+                    continue
+                if since is not None and timestamp < since:
+                    return
+            yield raw_value
+
+    def get_current_data_node_value(self, data_node):
+        if not data_node.id or not isinstance(data_node.id, int):
+            self.logger.error("cannot request data node values for data node without id!")
+            return False
+        self.logger.debug("requesting current value of data node..")
+        response = self._request("GET", "datanodes/{0}/values/current".format(data_node.id),
+                                 operation="get_current_data_node_value")
+        if response.status_code != 200:
+            raise self._make_error(response)
+
+        return DataNodeValue.from_dict(self._decode(response))
+
+    def get_current_values(self, data_nodes):
+        data_nodes = list(data_nodes)
+        for data_node in data_nodes:
+            if not data_node.id or not isinstance(data_node.id, int):
+                raise ValueError("cannot request data node values for data node without id!")
+
+        self.logger.debug("requesting current values of %s data nodes..", len(data_nodes))
+        results = self._get_current_values_bulk(data_nodes)
+        if results is None:
+            results = list(self._get_executor().map(self._get_current_value_conditional, data_nodes))
+
+        values = {}
+        changed = set()
+        for data_node, (data_node_value, has_changed) in zip(data_nodes, results):
+            values[data_node] = data_node_value
+            if has_changed:
+                changed.add(data_node)
+        self.logger.debug("%s of %s current values changed.", len(changed), len(data_nodes))
+        return values, changed
+
+    def _get_current_value_conditional(self, data_node):
+        cached = self._current_values.get(data_node.id)
+        headers = {}
+        if cached and cached.etag:
+            headers['If-None-Match'] = cached.etag
+        elif cached and cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+
+        response = self._request("GET", "datanodes/{0}/values/current".format(data_node.id), headers=headers,
+                                 operation="get_current_values")
+        if response.status_code == 304 and cached:
+            return cached.value, False
+        if response.status_code != 200:
+            raise self._make_error(response)
+
+        data_node_value = DataNodeValue.from_dict(self._decode(response), data_node)
+        return data_node_value, self._remember_current_value(data_node, data_node_value, response.headers.get('ETag'),
+                                                             response.headers.get('Last-Modified'))
+
+    def _get_current_values_bulk(self, data_nodes):
+        if self.bulk_current_values_supported is False or len(data_nodes) < 2:
+            return None
+
+        response = self._request("GET", "datanodes/values/current",
+                                 params={'ids': ",".join(str(data_node.id) for data_node in data_nodes)},
+                                 operation="get_current_values")
+        if response.status_code in (400, 404, 405) and not self.bulk_current_values_supported:
+            self.logger.debug("api does not support bulk requests of current values. falling back to single requests.")
+            self.bulk_current_values_supported = False
+            return None
+        if response.status_code != 200:
+            raise self._make_error(response)
+        self.bulk_current_values_supported = True
+
+        raw_values = {raw_value.get('dataNodeId'): raw_value for raw_value in self._decode(response)['values']}
+        results = []
+        for data_node in data_nodes:
+            raw_value = raw_values.get(data_node.id)
+            if raw_value is None:
+                results.append((None, False))
+                continue
+            data_node_value = DataNodeValue.from_dict(raw_value, data_node)
+            results.append((data_node_value, self._remember_current_value(data_node, data_node_value)))
+        return results
+
+    def _remember_current_value(self, data_node, data_node_value, etag=None, last_modified=None):
+        cached = self._current_values.get(data_node.id)
+        has_changed = cached is None or cached.value.value != data_node_value.value \
+            or cached.value.timestamp != data_node_value.timestamp
+        self._current_values[data_node.id] = _CurrentValue(data_node_value, etag, last_modified)
+        return has_changed
+
+    def subscribe(self, target, callback, min_interval=0.1, max_interval=30.0, queue_size=1000, streaming=True,
+                  loop=None):
+        from remoteclick.subscriptions import Subscription
+        return Subscription(self, target, callback, min_interval=min_interval, max_interval=max_interval,
+                            queue_size=queue_size, streaming=streaming, loop=loop).start()
+
+    def update_data_node_value(self, data_node_value):
+        if not data_node_value.data_node or not data_node_value.data_node or not isinstance(
+                data_node_value.data_node.id, int):
+            self.logger.error("invalid parameters! data_node_value must belong to existing data_node with an id!")
+            return False
+        self.logger.debug("updating current value of data node..")
+        minimal = self.minimal_responses
+        response = self._request("PATCH", "datanodes/{0}/values/current".format(data_node_value.data_node.id),
+                                 content=data_node_value.to_dict(), headers=PREFER_MINIMAL if minimal else None,
+                                 operation="update_data_node_value")
+        if not self._is_success(response, 200, minimal):
+            raise self._make_error(response)
+        if minimal:
+            return data_node_value
+
+        updated_data_node_value = DataNodeValue.from_dict(self._decode(response), data_node_value.data_node)
+        return updated_data_node_value
+
+    def _authenticate(self, refresh=False):
+        with self._auth_lock:
+            if refresh and self.refresh_token:
+                grant = {'grant_type': 'refresh_token', 'refresh_token': self.refresh_token}
+            else:
+                grant = {'username': self.username, 'password': self.password, 'grant_type': 'password'}
+            if self.auth_limiter is not None:
+                self.auth_limiter.acquire()
+            response = self._request("POST", "oauth/device/token", urllib.parse.urlencode(grant), authenticate=False,
+                                     operation="authenticate")
+            if response.status_code != 200 and 'refresh_token' in grant:
+                self.logger.debug("refreshing token failed, requesting new token with password grant..")
+                self.refresh_token = ""
+                return self._authenticate()
+            if response.status_code != 200:
+                raise ConnectionError(self._make_error_message(response))
+
+            response_content = self._decode(response)
+            self.name = response_content.get("name", self.name)
+            self.device_type = response_content.get("deviceType", self.device_type)
+            self.manufacturer = response_content.get("manufacturer", self.manufacturer)
+            self.id = response_content.get("id", self.id)
+            self.token = response_content["access_token"]
+            self.refresh_token = response_content.get("refresh_token", self.refresh_token)
+            self._auth = OAuth2(self.token)
+            expires_in = response_content.get("expires_in")
+            self.token_expires_at = time.time() + expires_in if expires_in else None
+            self._schedule_refresh(expires_in)
+
+    def _schedule_refresh(self, expires_in):
+        self._cancel_refresh()
+        if not expires_in:
+            return
+        # spread refreshes of many devices so they do not hit the auth endpoint at the same time
+        jitter = random.uniform(0, self.refresh_jitter * expires_in)
+        delay = expires_in - min(self.refresh_margin, expires_in / 2) - jitter
+        self._refresh_timer = threading.Timer(max(delay, 1.0), self._refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _cancel_refresh(self):
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+    def _refresh(self):
+        if not self.connected:
+            return
+        self.logger.debug("refreshing access token..")
+        try:
+            self._authenticate(refresh=True)
+        except Exception as e:
+            self.logger.warning("refreshing access token failed, retrying: %s", e)
+            self._refresh_timer = threading.Timer(min(self.refresh_margin, 30.0) * random.uniform(0.5, 1.0),
+                                                  self._refresh)
+            self._refresh_timer.daemon = True
+            self._refresh_timer.start()
+
+    def _reauthenticate(self, rejected_auth):
+        with self._auth_lock:
+            # another thread may already have replaced the rejected token
+            if self._auth is rejected_auth:
+                self.logger.debug("access token was rejected, authenticating again..")
+                self._authenticate(refresh=True)
+
+    def _ensure_registry(self):
+        if self.registry.is_stale():
+            with self._registry_lock:
+                # threads which waited for the lock find the registry refreshed by the first one
+                if self.registry.is_stale():
+                    self.refresh_data_nodes()
+
+    def _get_executor(self):
+        executor = self._executor
+        if executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.pool_size)
+                executor = self._executor
+        return executor
+
+    def _get_workers(self):
+        with self._executor_lock:
+            if self._workers is None:
+                self._workers = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="remoteclick-client")
+            return self._workers
+
+    def _iter_pages(self, endpoint, key, page_size, operation=None):
+        for page in self._iter_page_lists(endpoint, key, page_size, operation):
+            for item in page:
+                yield item
+
+    def _iter_page_lists(self, endpoint, key, page_size, operation=None):
+        offset = 0
+        page = self._get_page(endpoint, key, page_size, offset, operation)
+        while page:
+            offset += len(page)
+            next_page = None
+            if not self._is_last_page(key, page, page_size):
+                next_page = self._get_executor().submit(self._get_page, endpoint, key, page_size, offset, operation)
+            try:
+                yield page
+            except GeneratorExit:
+                if next_page is not None:
+                    next_page.cancel()
+                raise
+            if next_page is None:
+                return
+            page = next_page.result()
+
+    def _is_last_page(self, key, page, page_size):
+        # a server which caps the page size returns fewer items than requested although more follow. a short page is
+        # only the last one if the api returned longer pages of the same list before
+        largest = self._page_sizes.get(key, 0)
+        if len(page) > largest:
+            self._page_sizes[key] = len(page)
+        return len(page) < page_size and len(page) < largest
+
+    def _get_page(self, endpoint, key, limit, offset, operation=None):
+        self.logger.debug("requesting page of %s.. (limit=%s, offset=%s)", endpoint, limit, offset)
+        response = self._request("GET", endpoint, params={'limit': limit, 'offset': offset},
+                                 operation=operation or "get_page")
+        if response.status_code != 200:
+            raise self._make_error(response)
+        return self._decode(response)[key]
+
+    def _request(self, method, endpoint, data=None, params=None, headers=None, timeout=None, stream=False,
+                 authenticate=True, operation="request", content=None):
+        uncompressed = None
+        if content is not None:
+            data = self.codec.encode(content)
+            headers = dict(headers, **JSON_HEADERS) if headers else JSON_HEADERS
+            if self.compression is not None and self.compression_supported is not False \
+                    and len(data) >= self.compression_threshold:
+                uncompressed, data = data, compress(data, self.compression)
+                headers = dict(headers, **{'Content-Encoding': self.compression})
+
+        response = self._send_instrumented(method, endpoint, data, params, headers, timeout, stream, authenticate,
+                                           operation)
+        if uncompressed is not None and response.status_code == 415 and not self.compression_supported:
+            self.logger.debug("api does not accept compressed requests. sending them uncompressed.")
+            self.compression_supported = False
+            response.close()
+            headers = {name: value for name, value in headers.items() if name != 'Content-Encoding'}
+            data, uncompressed = uncompressed, None
+            response = self._send_instrumented(method, endpoint, data, params, headers, timeout, stream, authenticate,
+                                               operation)
+        elif uncompressed is not None and response.status_code < 400:
+            self.compression_supported = True
+        self._count_traffic(operation, data, uncompressed, response, stream)
+        return response
+
+    def _send_instrumented(self, method, endpoint, data, params, headers, timeout, stream, authenticate, operation):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return self._send_with_retries(method, endpoint, data, params, headers, timeout, stream, authenticate)[0]
+
+        info = instrumentation.start(operation, method, endpoint, data)
+        try:
+            response, retries = self._send_with_retries(method, endpoint, data, params, headers, timeout, stream,
+                                                        authenticate)
+        except Exception as e:
+            instrumentation.finish(info, error=e)
+            raise
+        instrumentation.finish_response(info, response, retries, stream)
+        return response
+
+    def _send_with_retries(self, method, endpoint, data, params, headers, timeout, stream, authenticate):
+        retries = 0
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            response, replayed = self._send_authenticated(method, endpoint, data, params, headers, timeout, stream,
+                                                          authenticate)
+            retries += replayed
+            status_code = response.status_code
+            retry_after = parse_retry_after(response.headers.get('Retry-After')) \
+                if status_code in THROTTLING_STATUS_CODES else None
+            if self.rate_limiter is not None:
+                if status_code == 429 or retry_after is not None:
+                    self.rate_limiter.on_throttle(retry_after)
+                elif status_code < 500:
+                    self.rate_limiter.on_success()
+
+            # throttled requests were not processed and can always be repeated, others only if they are idempotent
+            if status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries or \
+                    (status_code != 429 and method not in IDEMPOTENT_METHODS):
+                return response, retries
+            delay = self.backoff.delay(attempt, retry_after)
+            if delay is None:
+                return response, retries
+            self.logger.debug("api returned status code %s, retrying in %.2fs..", status_code, delay)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+            retries += 1
+
+    def _send_authenticated(self, method, endpoint, data, params, headers, timeout, stream, authenticate):
+        auth = self._auth if authenticate else None
+        response = self._send(method, endpoint, data, params, headers, timeout, stream, auth)
+        if response.status_code == 401 and auth is not None and self.connected:
+            self._reauthenticate(auth)
+            return self._send(method, endpoint, data, params, headers, timeout, stream, self._auth), 1
+        return response, 0
+
+    def _send(self, method, endpoint, data, params, headers, timeout, stream, auth):
+        try:
+            return self.transport.request(method, self.base_url + endpoint, data=data, params=params,
+                                          headers=headers, auth=auth,
+                                          timeout=timeout if timeout is not None else self.timeout, stream=stream)
+        except self.transport.errors as e:
+            raise TransportError(str(e)) from e
+
+    def _count_traffic(self, operation, data, uncompressed, response, stream):
+        sent = len(data) if data else 0
+        received = decoded = 0
+        if not stream:
+            decoded = len(response.content)
+            # responses are decompressed by the transport, only the content length tells what was transferred
+            content_length = response.headers.get('Content-Length') if response.headers.get('Content-Encoding') \
+                else None
+            received = int(content_length) if content_length else decoded
+        self.traffic.record(operation, sent, len(uncompressed) if uncompressed is not None else sent, received,
+                            decoded)
+
+    def _is_success(self, response, status_code, minimal=False):
+        return response.status_code == status_code or (minimal and response.status_code == 204)
+
+    def _decode(self, response):
+        return self.codec.decode(response.content)
+
+    def _make_error_message(self, response):
+        return "api returned status code: {0} with message: {1}".format(response.status_code, response.content)
+
+    def _make_error(self, response):
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) \
+            if response.status_code in THROTTLING_STATUS_CODES else None
+        return error_for_status(response.status_code, response.content, retry_after)
+
+
+class _CurrentValue:
+    __slots__ = ('value', 'etag', 'last_modified')
+
+    def __init__(self, value, etag=None, last_modified=None):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
@@ -0,0 +1,90 @@
+import importlib
+
+CONTENT_TYPE = "application/json"
+OPTIONAL_MODULES = ("orjson", "ujson")
+_modules = {}
+
+
+def __getattr__(name):
+    # optional codec libraries are only imported once a codec needs them
+    if name in OPTIONAL_MODULES:
+        return _import_optional(name)
+    raise AttributeError("module 'remoteclick.codec' has no attribute '{0}'".format(name))
+
+
+def _import_optional(name):
+    if name not in _modules:
+        try:
+            _modules[name] = importlib.import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
+
+
+class JsonCodec:
+    name = "json"
+
+    def __init__(self):
+        import json
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        self._loads = json.loads
+
+    def encode(self, obj):
+        return self._encoder.encode(obj).encode("utf-8")
+
+    def decode(self, data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8")
+        return self._loads(data)
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def __init__(self):
+        orjson = _import_optional("orjson")
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson. install it with: pip install remoteclick[fast]")
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+
+    def encode(self, obj):
+        return self._dumps(obj)
+
+    def decode(self, data):
+        return self._loads(data)
+
+
+class UjsonCodec:
+    name = "ujson"
+
+    def __init__(self):
+        ujson = _import_optional("ujson")
+        if ujson is None:
+            raise ImportError("UjsonCodec requires ujson. install it with: pip install ujson")
+        self._dumps = ujson.dumps
+        self._loads = ujson.loads
+
+    def encode(self, obj):
+        return self._dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def decode(self, data):
+        return self._loads(data)
+
+
+CODECS = {codec.name: codec for codec in (OrjsonCodec, UjsonCodec, JsonCodec)}
+
+
+def get_codec(codec=None):
+    if codec is None:
+        # prefer the fastest codec that is installed
+        if _import_optional("orjson") is not None:
+            return OrjsonCodec()
+        if _import_optional("ujson") is not None:
+            return UjsonCodec()
+        return JsonCodec()
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError("unknown codec: {0}. available codecs: {1}".format(codec, ", ".join(sorted(CODECS))))
+        return CODECS[codec]()
+    return codec
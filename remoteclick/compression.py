@@ -0,0 +1,37 @@
+import zlib
+
+ENCODINGS = ("gzip", "deflate")
+ACCEPT_ENCODING = "gzip, deflate"
+
+_WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def compress(data, encoding="gzip", level=6):
+    if encoding not in _WBITS:
+        raise ValueError("unknown encoding: {0}. use one of {1}".format(encoding, ", ".join(ENCODINGS)))
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data, encoding):
+    encoding = (encoding or "").strip().lower()
+    if encoding in ("", "identity"):
+        return data
+    if encoding not in _WBITS:
+        raise ValueError("unknown encoding: {0}".format(encoding))
+    try:
+        return zlib.decompress(data, _WBITS[encoding])
+    except zlib.error:
+        if encoding != "deflate":
+            raise
+        # some servers send raw deflate streams without the zlib header
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+
+
+def decompressor(encoding):
+    encoding = (encoding or "").strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    if encoding not in _WBITS:
+        raise ValueError("unknown encoding: {0}".format(encoding))
+    return zlib.decompressobj(_WBITS[encoding])
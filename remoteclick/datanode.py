@@ -1,8 +1,33 @@
+import threading
+from collections import OrderedDict
+
 from remoteclick.datanode_value import DataNodeValue
 from remoteclick.value_type import ValueType
 
 
+class RetainedValues(OrderedDict):
+    def __init__(self, maxlen=None):
+        super().__init__()
+        self.maxlen = maxlen
+        # values of a data node may be saved by several threads at once
+        self._lock = threading.Lock()
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            if self.maxlen is not None and len(self) > self.maxlen:
+                self.popitem(last=False)
+
+    def trim(self, maxlen):
+        with self._lock:
+            self.maxlen = maxlen
+            while maxlen is not None and len(self) > maxlen:
+                self.popitem(last=False)
+
+
 class DataNode:
+    default_value_retention = 100
+
     def __init__(self, name="", value_type=ValueType.NUMBER, unit="", keep_history=True, path="", read_only=True):
         self.name = name
         self.value_type = value_type
@@ -12,7 +37,7 @@ class DataNode:
         self.href = path
         self.read_only = read_only
         self.id = None
-        self.values = {}
+        self.values = RetainedValues(DataNode.default_value_retention)
 
     def from_dict(_dict):
         d = DataNode()
@@ -27,11 +52,11 @@ class DataNode:
         return d
 
     def to_dict(self):
-        _dict = self.__dict__.copy()
-        _dict.pop('id', None)
-        _dict.pop('values', None)
-        _dict.pop('href', None)
-        return _dict
+        return {'name': self.name, 'value_type': self.value_type, 'unit': self.unit, 'keep_history': self.keep_history,
+                'path': self.path, 'read_only': self.read_only}
+
+    def set_value_retention(self, maxlen):
+        self.values.trim(maxlen)
 
     def full_name(self):
         return self.path.strip("/") + "/" + self.name
@@ -1,7 +1,30 @@
 import datetime
 
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def parse_timestamp(timestamp):
+    if isinstance(timestamp, datetime.datetime):
+        parsed = timestamp
+    else:
+        parsed = datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed
+
+
+def timestamp_to_ns(timestamp):
+    delta = parse_timestamp(timestamp) - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000000 + delta.microseconds * 1000
+
+
+def ns_to_datetime(timestamp_ns):
+    return EPOCH + datetime.timedelta(microseconds=timestamp_ns // 1000)
+
 
 class DataNodeValue:
+    __slots__ = ('id', 'value', 'timestamp', 'data_node')
+
     def __init__(self, value=None, timestamp=None, data_node=None):
         self.id = None
         self.value = value
@@ -11,21 +34,27 @@ class DataNodeValue:
             self.timestamp = datetime.datetime.now().isoformat()
         self.data_node = data_node
 
-    def timestamp(self):
-        return datetime.datetime.strptime(''.join(self.timestamp.rsplit(':', 1)), '%Y-%m-%dT%H:%M:%S%z')
+    def get_datetime(self):
+        return parse_timestamp(self.timestamp)
 
-    def from_dict(_dict):
-        d = DataNodeValue()
+    def from_dict(_dict, data_node=None):
+        # skip __init__, its default timestamp would be overwritten right away
+        d = _new_value(DataNodeValue)
         d.value = _dict.get("value", None)
         d.timestamp = _dict.get("timestamp", None)
         d.id = _dict.get('id', None)
+        d.data_node = data_node
         return d
 
+    def from_list(raw_values, data_node=None):
+        from_dict = DataNodeValue.from_dict
+        return [from_dict(raw_value, data_node) for raw_value in raw_values]
+
     def to_dict(self):
-        _dict = self.__dict__.copy()
-        _dict.pop('id', None)
-        _dict.pop('data_node', None)
-        return _dict
+        return {'value': self.value, 'timestamp': self.timestamp}
 
     def __str__(self):
         return self.to_dict().__str__()
+
+
+_new_value = object.__new__
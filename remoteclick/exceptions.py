@@ -0,0 +1,57 @@
+class RequestError(Exception):
+    def __init__(self, message="", status_code=None, content=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.content = content
+        self.retry_after = retry_after
+
+
+class TransientError(RequestError):
+    pass
+
+
+class TransportError(TransientError, ConnectionError):
+    pass
+
+
+class ThrottlingError(TransientError):
+    pass
+
+
+class ServerError(TransientError):
+    pass
+
+
+class ClientError(RequestError):
+    pass
+
+
+class AuthenticationError(ClientError):
+    pass
+
+
+class NotFoundError(ClientError):
+    pass
+
+
+class OutboxFullError(Exception):
+    pass
+
+
+def error_for_status(status_code, content=None, retry_after=None):
+    message = "api returned status code: {0} with message: {1}".format(status_code, content)
+    if status_code == 429:
+        error_class = ThrottlingError
+    elif status_code == 503 and retry_after is not None:
+        error_class = ThrottlingError
+    elif status_code >= 500:
+        error_class = ServerError
+    elif status_code in (401, 403):
+        error_class = AuthenticationError
+    elif status_code == 404:
+        error_class = NotFoundError
+    elif status_code >= 400:
+        error_class = ClientError
+    else:
+        error_class = RequestError
+    return error_class(message, status_code=status_code, content=content, retry_after=retry_after)
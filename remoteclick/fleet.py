@@ -0,0 +1,144 @@
+import http.cookiejar
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from remoteclick import RemoteClickClient
+from remoteclick.ratelimit import AdaptiveRateLimiter, TokenBucket
+from remoteclick.session import create_session
+
+
+class FleetResult:
+    def __init__(self):
+        self.results = OrderedDict()
+        self.errors = OrderedDict()
+
+    def is_successful(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {
+            'succeeded': list(self.results),
+            'failed': {device: str(error) for device, error in self.errors.items()},
+        }
+
+    def __str__(self):
+        return "{0} succeeded, {1} failed".format(len(self.results), len(self.errors))
+
+
+class FleetClient:
+    def __init__(self, base_url=None, max_concurrency=20, max_workers=10, pool_size=None, auth_rate=5.0, auth_burst=5,
+                 rate_limit=None, timeout=(5, 30), max_retries=3, backoff_factor=0.3, keep_alive=True,
+                 **client_options):
+        self.logger = logging.getLogger("RemoteclickFleetClient")
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.client_options = client_options
+        self.session, self.stats = create_session(pool_size=pool_size or max_concurrency + max_workers,
+                                                  max_retries=max_retries, backoff_factor=backoff_factor,
+                                                  keep_alive=keep_alive)
+        # devices must never see each other's cookies, tokens are sent per request by each client
+        self.session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        # device operations fan out on their own threads; the work clients parallelize internally (page prefetching,
+        # single value fallbacks) shares the worker pool, so fanned out operations never wait for their own pool
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="remoteclick-worker")
+        self._fan_out = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="remoteclick-fleet")
+        self.auth_limiter = TokenBucket(auth_rate, auth_burst)
+        # all devices talk to the same api, so they adapt to its throttling together
+        self.rate_limiter = AdaptiveRateLimiter(rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._devices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_device(self, username, password, name=None):
+        name = name or username
+        client = RemoteClickClient(timeout=self.timeout, max_retries=self.max_retries,
+                                   backoff_factor=self.backoff_factor, session=self.session, executor=self.executor,
+                                   rate_limit=self.rate_limiter, **self.client_options)
+        if self.base_url:
+            client.set_base_url(self.base_url)
+        client.set_credentials(username, password)
+        client.auth_limiter = self.auth_limiter
+        with self._lock:
+            if name in self._devices:
+                raise ValueError("device {0} already exists".format(name))
+            self._devices[name] = client
+        return client
+
+    def remove_device(self, name):
+        with self._lock:
+            client = self._devices.pop(name)
+        client.close()
+
+    def get_device(self, name):
+        return self._devices[name]
+
+    def devices(self):
+        return list(self._devices)
+
+    def connection_stats(self):
+        return self.stats.to_dict()
+
+    def connect(self, names=None):
+        return self.map(lambda client: client.connect(), names)
+
+    def disconnect(self, names=None):
+        return self.map(lambda client: client.disconnect(), names)
+
+    def save_values(self, readings):
+        # readings maps device names to the values that should be saved for the device
+        return self.map_items(lambda client, values: client.save_data_node_values(values), readings)
+
+    def map(self, function, names=None):
+        names = self.devices() if names is None else names
+        return self.map_items(lambda client, _: function(client), OrderedDict((name, None) for name in names))
+
+    def map_items(self, function, items):
+        futures = OrderedDict()
+        result = FleetResult()
+        for name, item in items.items():
+            client = self._devices.get(name)
+            if client is None:
+                result.errors[name] = KeyError("unknown device: {0}".format(name))
+                continue
+            futures[name] = self._fan_out.submit(function, client, item)
+
+        # a failing device must not affect the others, its error is reported with the result
+        for name, future in futures.items():
+            try:
+                result.results[name] = future.result()
+            except Exception as e:
+                self.logger.warning("operation failed for device %s: %s", name, e)
+                result.errors[name] = e
+        return result
+
+    def close(self):
+        with self._lock:
+            clients = list(self._devices.values())
+            self._devices.clear()
+        for client in clients:
+            client.close()
+        self._fan_out.shutdown(wait=True)
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __contains__(self, name):
+        return name in self._devices
+
+    def __getitem__(self, name):
+        return self._devices[name]
+
+    def __iter__(self):
+        return iter(self.devices())
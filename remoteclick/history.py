@@ -0,0 +1,150 @@
+import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from remoteclick.datanode_value import timestamp_to_ns
+from remoteclick.value_type import ValueType
+
+MISSING_BOOLEAN = -1
+
+
+def fetch_history(client, data_node, since=None, until=None, as_frame=False, page_size=1000):
+    if np is None:
+        raise ImportError("fetch_history requires numpy. install it with: pip install remoteclick[numpy]")
+    if as_frame and pd is None:
+        raise ImportError("fetch_history(as_frame=True) requires pandas. "
+                          "install it with: pip install remoteclick[pandas]")
+    if not data_node.id or not isinstance(data_node.id, int):
+        raise ValueError("cannot request data node values for data node without id!")
+
+    since_ns = np.datetime64(timestamp_to_ns(since), 'ns') if since is not None else None
+    until_ns = np.datetime64(timestamp_to_ns(until), 'ns') if until is not None else None
+    columns = _Columns(_value_dtype(data_node.value_type), page_size)
+
+    # the api returns the newest values first
+    for page in client._iter_page_lists("datanodes/{0}/values".format(data_node.id), "values", page_size,
+                                        "fetch_history"):
+        timestamps = parse_iso_timestamps([raw_value["timestamp"] for raw_value in page])
+        mask = None
+        if until_ns is not None:
+            mask = timestamps <= until_ns
+        if since_ns is not None:
+            newer = timestamps >= since_ns
+            mask = newer if mask is None else mask & newer
+        columns.append(page, timestamps, mask, data_node.value_type)
+        if since_ns is not None and not newer.all():
+            break
+
+    history = columns.to_array()[::-1]
+    if not as_frame:
+        return history
+    values = history['value']
+    if data_node.value_type == ValueType.BOOLEAN:
+        values = pd.array(np.where(values == MISSING_BOOLEAN, None, values == 1), dtype="boolean")
+    return pd.DataFrame({'id': history['id'], 'value': values},
+                        index=pd.DatetimeIndex(history['timestamp'], tz='UTC', name='timestamp'))
+
+
+def parse_iso_timestamps(timestamps):
+    if np is None:
+        raise ImportError("parse_iso_timestamps requires numpy. install it with: pip install remoteclick[numpy]")
+    strings = np.asarray(timestamps, dtype='U')
+    if not len(strings):
+        return np.empty(0, dtype='datetime64[ns]')
+    width = strings.dtype.itemsize // 4
+    # iso timestamps are ascii, and byte strings parse considerably faster than unicode strings
+    codes = strings.view(np.uint32).reshape(len(strings), width).astype(np.uint8)
+    rows = np.arange(len(strings))
+    lengths = np.char.str_len(strings)
+
+    # split 'Z' and '+HH:MM' / '-HH:MM' suffixes off and parse the rest as naive datetimes
+    is_utc = codes[rows, lengths - 1] == ord('Z')
+    sign_at = np.clip(lengths - 6, 0, width - 1)
+    signs = codes[rows, sign_at]
+    has_offset = (lengths >= 6) & ((signs == ord('+')) | (signs == ord('-'))) \
+        & (codes[rows, np.clip(lengths - 3, 0, width - 1)] == ord(':'))
+    offset_digits = codes[rows[:, None], np.clip(sign_at[:, None] + [1, 2, 4, 5], 0, width - 1)].astype(np.int64)
+    offset_digits -= ord('0')
+    offset_minutes = (offset_digits[:, 0] * 10 + offset_digits[:, 1]) * 60 + offset_digits[:, 2] * 10 \
+        + offset_digits[:, 3]
+    offset_minutes = np.where(has_offset, np.where(signs == ord('-'), -offset_minutes, offset_minutes), 0)
+
+    base_lengths = np.where(is_utc, lengths - 1, np.where(has_offset, lengths - 6, lengths))
+    codes *= np.arange(width)[None, :] < base_lengths[:, None]
+    naive = codes.view('S{0}'.format(width)).reshape(len(strings)).astype('datetime64[ns]')
+    local = ~(is_utc | has_offset)
+    if local.any():
+        # timestamps without offset are local time, like parse_timestamp reads them
+        offset_minutes[local] = _local_offset_minutes(naive[local])
+    return naive - offset_minutes.astype('timedelta64[m]')
+
+
+def _local_offset_minutes(naive):
+    # the offset only changes at whole minutes, so it is looked up once per distinct minute
+    minutes, inverse = np.unique(naive.astype('datetime64[m]'), return_inverse=True)
+    offsets = np.array([minute.astimezone().utcoffset() // datetime.timedelta(minutes=1)
+                        for minute in minutes.astype(datetime.datetime)], dtype=np.int64)
+    return offsets[inverse.reshape(-1)]
+
+
+def _value_dtype(value_type):
+    if value_type == ValueType.BOOLEAN:
+        return np.int8
+    if value_type == ValueType.STRING:
+        return object
+    return np.float64
+
+
+class _Columns:
+    def __init__(self, value_dtype, capacity):
+        self.size = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.timestamps = np.empty(capacity, dtype='datetime64[ns]')
+        self.values = np.empty(capacity, dtype=value_dtype)
+
+    def append(self, page, timestamps, mask, value_type):
+        ids = np.fromiter((raw_value.get("id", -1) for raw_value in page), dtype=np.int64, count=len(page))
+        values = np.array([_value(raw_value.get("value"), value_type) for raw_value in page],
+                          dtype=self.values.dtype)
+        if mask is not None:
+            ids, timestamps, values = ids[mask], timestamps[mask], values[mask]
+        self._reserve(self.size + len(ids))
+        end = self.size + len(ids)
+        self.ids[self.size:end] = ids
+        self.timestamps[self.size:end] = timestamps
+        self.values[self.size:end] = values
+        self.size = end
+
+    def to_array(self):
+        history = np.empty(self.size, dtype=[('id', np.int64), ('timestamp', 'datetime64[ns]'),
+                                             ('value', self.values.dtype)])
+        history['id'] = self.ids[:self.size]
+        history['timestamp'] = self.timestamps[:self.size]
+        history['value'] = self.values[:self.size]
+        return history
+
+    def _reserve(self, size):
+        capacity = len(self.ids)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        self.ids = np.resize(self.ids, capacity)
+        self.timestamps = np.resize(self.timestamps, capacity)
+        self.values = np.resize(self.values, capacity)
+
+
+def _value(value, value_type):
+    if value_type == ValueType.BOOLEAN:
+        return MISSING_BOOLEAN if value is None else int(bool(value))
+    if value_type == ValueType.STRING:
+        return value
+    return np.nan if value is None else value
@@ -0,0 +1,241 @@
+import logging
+import sqlite3
+import threading
+import time
+
+from remoteclick.datanode_value import timestamp_to_ns
+from remoteclick.storage import Transaction
+from remoteclick.value_type import ValueType
+
+
+class HistoryCache:
+    def __init__(self, path=":memory:", max_age=None, max_values=None, sync_interval=0.0, page_size=1000,
+                 increment_size=50):
+        self.logger = logging.getLogger("RemoteclickHistoryCache")
+        self.path = path
+        self.max_age = max_age
+        self.max_values = max_values
+        self.sync_interval = sync_interval
+        self.page_size = page_size
+        self.increment_size = increment_size
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self.evicted = 0
+        self._lock = threading.RLock()
+        self._syncing = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS history_values ("
+            "data_node_id INTEGER NOT NULL, id INTEGER NOT NULL, timestamp_ns INTEGER NOT NULL, timestamp TEXT, "
+            "value, PRIMARY KEY (data_node_id, id)) WITHOUT ROWID"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS history_values_by_time ON history_values (data_node_id, timestamp_ns)"
+        )
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(history_sync)")]
+        if columns and "last_id" not in columns:
+            # caches written by older versions are rebuilt from the api
+            self._connection.execute("DROP TABLE history_sync")
+            self._connection.execute("DELETE FROM history_values")
+        # last_id is the newest value the cache has seen. complete_since is the oldest timestamp from which on the
+        # cache holds every value, null if it holds all
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS history_sync ("
+            "data_node_id INTEGER PRIMARY KEY, last_id INTEGER, complete_since INTEGER, synced_at REAL)"
+        )
+
+    def sync(self, client, data_node, force=False):
+        with self._sync_lock(data_node.id):
+            state = self._get_state(data_node.id)
+            if state is not None and not force and time.time() - state[2] < self.sync_interval:
+                return 0
+            if state is None or state[0] is None:
+                fetched = self._sync_initial(client, data_node)
+            else:
+                fetched = self._sync_increment(client, data_node, state[0])
+            self.fetched += fetched
+            self._evict(data_node.id)
+            self.logger.debug("synced %s new values of data node with id: %s", fetched, data_node.id)
+            return fetched
+
+    def query(self, client, data_node, since=None, until=None, limit=None, offset=0):
+        # returns the raw values newest first like the api does, or None if the cache does not reach back far enough
+        self.sync(client, data_node)
+        since_ns = timestamp_to_ns(since) if since is not None else None
+        until_ns = timestamp_to_ns(until) if until is not None else None
+        with self._lock:
+            state = self._get_state(data_node.id)
+            complete_since = state[1] if state is not None else None
+            sql = "SELECT id, timestamp, value FROM history_values WHERE data_node_id = ?"
+            params = [data_node.id]
+            if since_ns is not None:
+                sql += " AND timestamp_ns >= ?"
+                params.append(since_ns)
+            if until_ns is not None:
+                sql += " AND timestamp_ns <= ?"
+                params.append(until_ns)
+            # the api lists values in the order they were stored, newest first, whatever their timestamps
+            sql += " ORDER BY id DESC"
+            if limit is not None:
+                sql += " LIMIT ? OFFSET ?"
+                params.extend((limit, offset))
+            rows = self._connection.execute(sql, params).fetchall()
+
+        if complete_since is not None and (since_ns is None or since_ns < complete_since) \
+                and (limit is None or len(rows) < limit):
+            self.misses += 1
+            return None
+        self.hits += 1
+        is_boolean = data_node.value_type == ValueType.BOOLEAN
+        return [{'id': value_id, 'timestamp': timestamp,
+                 'value': bool(value) if is_boolean and value is not None else value}
+                for value_id, timestamp, value in rows]
+
+    def clear(self, data_node=None):
+        with self._lock, self._transaction():
+            if data_node is None:
+                self._connection.execute("DELETE FROM history_values")
+                self._connection.execute("DELETE FROM history_sync")
+            else:
+                self._connection.execute("DELETE FROM history_values WHERE data_node_id = ?", (data_node.id,))
+                self._connection.execute("DELETE FROM history_sync WHERE data_node_id = ?", (data_node.id,))
+
+    def stats(self):
+        with self._lock:
+            counts = self._connection.execute(
+                "SELECT data_node_id, COUNT(*) FROM history_values GROUP BY data_node_id"
+            ).fetchall()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'fetched': self.fetched,
+            'evicted': self.evicted,
+            'data_nodes': dict(counts),
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _sync_initial(self, client, data_node):
+        # the first sync pages through the history once, with the next page prefetched, until the limits are reached
+        cutoff = self._cutoff()
+        fetched = 0
+        oldest = None
+        complete = True
+        newest = None
+        for page in client._iter_page_lists(self._endpoint(data_node), "values", self.page_size, "sync_history"):
+            rows = self._rows(data_node, page)
+            if newest is None and rows:
+                newest = max(row[1] for row in rows)
+            if cutoff is not None and rows and rows[-1][2] < cutoff:
+                rows = [row for row in rows if row[2] >= cutoff]
+                complete = False
+            if self.max_values is not None and fetched + len(rows) >= self.max_values:
+                rows = rows[:self.max_values - fetched]
+                complete = False
+            fetched += self._insert(rows)
+            if rows:
+                oldest = rows[-1][2]
+            if not complete:
+                break
+        complete_since = None if complete else (oldest if oldest is not None else cutoff)
+        self._set_state(data_node.id, newest, complete_since)
+        return fetched
+
+    def _sync_increment(self, client, data_node, last_id):
+        # only values stored after the last synced one are missing. they are listed first, also when they were
+        # backfilled with older timestamps. pages grow while none of them is known yet
+        endpoint = self._endpoint(data_node)
+        fetched = 0
+        offset = 0
+        page_size = self.increment_size
+        newest = last_id
+        while True:
+            page = client._get_page(endpoint, "values", page_size, offset, "sync_history")
+            rows = self._rows(data_node, page)
+            new_rows = [row for row in rows if row[1] > last_id]
+            known = len(new_rows) < len(rows)
+            fetched += self._insert(new_rows)
+            if new_rows:
+                newest = max(newest, max(row[1] for row in new_rows))
+            if known or not page or client._is_last_page("values", page, page_size):
+                break
+            offset += len(page)
+            page_size = min(page_size * 2, self.page_size)
+        self._set_state(data_node.id, newest, self._get_state(data_node.id)[1])
+        return fetched
+
+    def _evict(self, data_node_id):
+        cutoff = self._cutoff()
+        with self._lock, self._transaction():
+            evicted = 0
+            complete_since = self._get_state(data_node_id)[1]
+            if cutoff is not None:
+                evicted += self._connection.execute(
+                    "DELETE FROM history_values WHERE data_node_id = ? AND timestamp_ns < ?", (data_node_id, cutoff)
+                ).rowcount
+                complete_since = max(complete_since or cutoff, cutoff)
+            if self.max_values is not None:
+                deleted = self._connection.execute(
+                    "DELETE FROM history_values WHERE data_node_id = ? AND id NOT IN (SELECT id FROM history_values "
+                    "WHERE data_node_id = ? ORDER BY id DESC LIMIT ?)",
+                    (data_node_id, data_node_id, self.max_values)
+                ).rowcount
+                if deleted:
+                    oldest = self._connection.execute(
+                        "SELECT MIN(timestamp_ns) FROM history_values WHERE data_node_id = ?", (data_node_id,)
+                    ).fetchone()[0]
+                    complete_since = max(complete_since or oldest, oldest)
+                evicted += deleted
+            self._connection.execute("UPDATE history_sync SET complete_since = ? WHERE data_node_id = ?",
+                                     (complete_since, data_node_id))
+        self.evicted += evicted
+
+    def _rows(self, data_node, page):
+        return [(data_node.id, raw_value["id"], timestamp_to_ns(raw_value["timestamp"]), raw_value["timestamp"],
+                 raw_value.get("value")) for raw_value in page]
+
+    def _insert(self, rows):
+        if not rows:
+            return 0
+        with self._lock, self._transaction():
+            return self._connection.executemany("INSERT OR IGNORE INTO history_values (data_node_id, id, timestamp_ns, "
+                                                "timestamp, value) VALUES (?, ?, ?, ?, ?)", rows).rowcount
+
+    def _get_state(self, data_node_id):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT last_id, complete_since, synced_at FROM history_sync WHERE data_node_id = ?",
+                (data_node_id,)
+            ).fetchone()
+
+    def _set_state(self, data_node_id, last_id, complete_since):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO history_sync (data_node_id, last_id, complete_since, synced_at) "
+                "VALUES (?, ?, ?, ?)", (data_node_id, last_id, complete_since, time.time())
+            )
+
+    def _sync_lock(self, data_node_id):
+        # concurrent readers of the same data node wait for one sync instead of downloading the same values
+        with self._lock:
+            lock = self._syncing.get(data_node_id)
+            if lock is None:
+                lock = self._syncing[data_node_id] = threading.Lock()
+            return lock
+
+    def _cutoff(self):
+        if self.max_age is None:
+            return None
+        return int((time.time() - self.max_age) * 1e9)
+
+    def _endpoint(self, data_node):
+        return "datanodes/{0}/values".format(data_node.id)
+
+    def _transaction(self):
+        return Transaction(self._connection)
@@ -0,0 +1,298 @@
+import bisect
+import logging
+import threading
+import time
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestInfo:
+    __slots__ = ('operation', 'method', 'endpoint', 'request_bytes', 'response_bytes', 'status_code', 'retries',
+                 'error', 'started_at', 'duration', 'context')
+
+    def __init__(self, operation, method, endpoint, request_bytes):
+        self.operation = operation
+        self.method = method
+        self.endpoint = endpoint
+        self.request_bytes = request_bytes
+        self.response_bytes = None
+        self.status_code = None
+        self.retries = 0
+        self.error = None
+        self.started_at = time.time()
+        self.duration = None
+        self.context = {}
+
+    def is_error(self):
+        return self.error is not None or (self.status_code is not None and self.status_code >= 400)
+
+
+class Instrumentation:
+    def __init__(self):
+        self.logger = logging.getLogger("RemoteclickInstrumentation")
+        self._lock = threading.Lock()
+        # hooks are replaced instead of modified so that requests can iterate them without locking
+        self._pre_hooks = ()
+        self._post_hooks = ()
+
+    def add_hooks(self, pre=None, post=None):
+        with self._lock:
+            if pre is not None:
+                self._pre_hooks += (pre,)
+            if post is not None:
+                self._post_hooks += (post,)
+
+    def remove_hooks(self, pre=None, post=None):
+        with self._lock:
+            self._pre_hooks = tuple(hook for hook in self._pre_hooks if hook != pre)
+            self._post_hooks = tuple(hook for hook in self._post_hooks if hook != post)
+
+    def is_enabled(self):
+        return bool(self._pre_hooks or self._post_hooks)
+
+    def start(self, operation, method, endpoint, data):
+        info = RequestInfo(operation, method, endpoint, _size(data))
+        self._call(self._pre_hooks, info)
+        info.context['started'] = time.perf_counter()
+        return info
+
+    def finish(self, info, status_code=None, response_bytes=None, retries=0, error=None):
+        info.duration = time.perf_counter() - info.context.pop('started')
+        info.status_code = status_code
+        info.response_bytes = response_bytes
+        info.retries = retries
+        info.error = error
+        self._call(self._post_hooks, info)
+
+    def finish_response(self, info, response, retries=0, stream=False):
+        # requests' responses know how often urllib3 retried them
+        history = getattr(getattr(response.raw, 'retries', None), 'history', None)
+        if stream:
+            content_length = response.headers.get('Content-Length')
+            response_bytes = int(content_length) if content_length else None
+        else:
+            response_bytes = len(response.content)
+        self.finish(info, response.status_code, response_bytes, retries + len(history or ()))
+
+    def _call(self, hooks, info):
+        for hook in hooks:
+            try:
+                hook(info)
+            except Exception:
+                self.logger.exception("instrumentation hook %r failed", hook)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+    def quantile(self, quantile):
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        for bound, total in zip(self.buckets + (float('inf'),), self.cumulative_counts()):
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+class OperationMetrics:
+    def __init__(self, buckets):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.status_codes = {}
+        self.latency = Histogram(buckets)
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'status_codes': dict(self.status_codes),
+            'latency': {'count': self.latency.count, 'sum': self.latency.sum,
+                        'p50': self.latency.quantile(0.5), 'p99': self.latency.quantile(0.99)},
+        }
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, info):
+        self.record(info)
+
+    def record(self, info):
+        with self._lock:
+            metrics = self._operations.get(info.operation)
+            if metrics is None:
+                metrics = self._operations[info.operation] = OperationMetrics(self.buckets)
+            metrics.requests += 1
+            metrics.retries += info.retries
+            metrics.request_bytes += info.request_bytes or 0
+            metrics.response_bytes += info.response_bytes or 0
+            if info.is_error():
+                metrics.errors += 1
+            status = str(info.status_code) if info.status_code is not None else type(info.error).__name__
+            metrics.status_codes[status] = metrics.status_codes.get(status, 0) + 1
+            metrics.latency.observe(info.duration)
+
+    def get(self, operation):
+        return self._operations.get(operation)
+
+    def operations(self):
+        return sorted(self._operations)
+
+    def reset(self):
+        with self._lock:
+            self._operations = {}
+
+    def to_dict(self):
+        with self._lock:
+            return {operation: metrics.to_dict() for operation, metrics in self._operations.items()}
+
+    def to_prometheus(self, prefix="remoteclick"):
+        counters = (
+            ('requests_total', "API requests by client method.", 'requests'),
+            ('request_errors_total', "Failed API requests by client method.", 'errors'),
+            ('request_retries_total', "Retried API requests by client method.", 'retries'),
+            ('request_sent_bytes_total', "Bytes sent in request bodies.", 'request_bytes'),
+            ('request_received_bytes_total', "Bytes received in response bodies.", 'response_bytes'),
+        )
+        with self._lock:
+            operations = sorted(self._operations.items())
+            lines = []
+            for name, description, attribute in counters:
+                lines.append("# HELP {0}_{1} {2}".format(prefix, name, description))
+                lines.append("# TYPE {0}_{1} counter".format(prefix, name))
+                for operation, metrics in operations:
+                    lines.append('{0}_{1}{{operation="{2}"}} {3}'.format(prefix, name, _escape(operation),
+                                                                         getattr(metrics, attribute)))
+
+            lines.append("# HELP {0}_responses_total API responses by client method and status.".format(prefix))
+            lines.append("# TYPE {0}_responses_total counter".format(prefix))
+            for operation, metrics in operations:
+                for status, count in sorted(metrics.status_codes.items()):
+                    lines.append('{0}_responses_total{{operation="{1}",status="{2}"}} {3}'.format(
+                        prefix, _escape(operation), _escape(status), count))
+
+            lines.append("# HELP {0}_request_duration_seconds API request latency by client method.".format(prefix))
+            lines.append("# TYPE {0}_request_duration_seconds histogram".format(prefix))
+            for operation, metrics in operations:
+                histogram = metrics.latency
+                labels = 'operation="{0}"'.format(_escape(operation))
+                bounds = [repr(float(bound)) for bound in histogram.buckets] + ["+Inf"]
+                for bound, total in zip(bounds, histogram.cumulative_counts()):
+                    lines.append('{0}_request_duration_seconds_bucket{{{1},le="{2}"}} {3}'.format(
+                        prefix, labels, bound, total))
+                lines.append("{0}_request_duration_seconds_sum{{{1}}} {2!r}".format(prefix, labels, histogram.sum))
+                lines.append("{0}_request_duration_seconds_count{{{1}}} {2}".format(prefix, labels,
+                                                                                   histogram.count))
+        return "\n".join(lines) + "\n"
+
+
+class TrafficCounters:
+    # bytes on the wire next to the bytes before compression, by client method
+    FIELDS = ('requests', 'sent_bytes', 'sent_uncompressed_bytes', 'received_bytes', 'received_decoded_bytes')
+
+    def __init__(self):
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, sent_bytes, sent_uncompressed_bytes, received_bytes=0, received_decoded_bytes=0):
+        with self._lock:
+            counters = self._operations.get(operation)
+            if counters is None:
+                counters = self._operations[operation] = [0, 0, 0, 0, 0]
+            counters[0] += 1
+            counters[1] += sent_bytes
+            counters[2] += sent_uncompressed_bytes
+            counters[3] += received_bytes
+            counters[4] += received_decoded_bytes
+
+    def get(self, operation):
+        with self._lock:
+            counters = self._operations.get(operation)
+            return dict(zip(self.FIELDS, counters)) if counters is not None else None
+
+    def totals(self):
+        with self._lock:
+            return dict(zip(self.FIELDS, [sum(column) for column in zip(*self._operations.values())] or [0] * 5))
+
+    def reset(self):
+        with self._lock:
+            self._operations = {}
+
+    def to_dict(self):
+        with self._lock:
+            return {operation: dict(zip(self.FIELDS, counters)) for operation, counters in self._operations.items()}
+
+
+class OpenTelemetryHooks:
+    def __init__(self, tracer=None):
+        if trace is None:
+            raise ImportError("OpenTelemetryHooks requires opentelemetry-api. "
+                              "install it with: pip install remoteclick[opentelemetry]")
+        self.tracer = tracer if tracer is not None else trace.get_tracer("remoteclick")
+
+    def pre(self, info):
+        info.context['span'] = self.tracer.start_span("remoteclick." + info.operation, kind=trace.SpanKind.CLIENT,
+                                                      attributes={'http.request.method': info.method,
+                                                                  'remoteclick.endpoint': info.endpoint})
+
+    def post(self, info):
+        span = info.context.pop('span', None)
+        if span is None:
+            return
+        if info.status_code is not None:
+            span.set_attribute('http.response.status_code', info.status_code)
+        if info.retries:
+            span.set_attribute('http.request.resend_count', info.retries)
+        if info.request_bytes is not None:
+            span.set_attribute('http.request.body.size', info.request_bytes)
+        if info.response_bytes is not None:
+            span.set_attribute('http.response.body.size', info.response_bytes)
+        if info.error is not None:
+            span.record_exception(info.error)
+        if info.is_error():
+            span.set_status(trace.Status(trace.StatusCode.ERROR))
+        span.end()
+
+
+def _size(data):
+    if data is None:
+        return None
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return None
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
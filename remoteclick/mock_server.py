@@ -0,0 +1,376 @@
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from urllib.parse import parse_qs, urlparse
+
+from remoteclick.compression import compress, decompress
+
+_DATA_NODE = re.compile(r"/datanodes/(\d+)$")
+_VALUES = re.compile(r"/datanodes/(\d+)/values(/bulk|/current)?$")
+# response bodies from this size on are gzipped for clients which accept it
+_COMPRESS_RESPONSES_FROM = 512
+
+
+class MockRemoteClickServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, error_status=503, max_page_size=None,
+                 bulk=True, streaming=True, conditional=True, token_ttl=3600, seed=None, compression=True):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_page_size = max_page_size
+        self.bulk = bulk
+        self.streaming = streaming
+        # closes event streams after this many seconds, like a proxy with an idle timeout
+        self.stream_timeout = None
+        self.conditional = conditional
+        self.token_ttl = token_ttl
+        self.compression = compression
+        self.data_nodes = {}
+        self.values = {}
+        self.tokens = set()
+        self.refresh_tokens = set()
+        self.grants = []
+        self.credentials = {}
+        self.requests = []
+        self.connections = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.stream_connected = threading.Event()
+        self._failures = []
+        self._random = random.Random(seed)
+        self._next_id = 1
+        self._condition = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return "http://{0}:{1}/api/".format(*self._server.server_address[:2])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="remoteclick-mock-server",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self.streaming = False
+            self._condition.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def client(self, client_class=None, username="device", password="password", **kwargs):
+        # a client for this server, which still has to be connected
+        if client_class is None:
+            from remoteclick.client import RemoteClickClient as client_class
+        client = client_class(**kwargs)
+        client.set_base_url(self.base_url)
+        client.set_credentials(username, password)
+        return client
+
+    def fail_next(self, count=1, status=503, headers=None):
+        with self._condition:
+            self._failures.extend([(status, headers or {})] * count)
+
+    def add_device(self, username, password):
+        # once devices are added only their credentials are accepted
+        with self._condition:
+            self.credentials[username] = password
+
+    def revoke_tokens(self, refresh_tokens=False):
+        with self._condition:
+            self.tokens.clear()
+            if refresh_tokens:
+                self.refresh_tokens.clear()
+
+    def add_data_node(self, name, path="", value_type="number", unit="", keep_history=True, read_only=False):
+        with self._condition:
+            data_node_id = self._new_id()
+            self.data_nodes[data_node_id] = {'id': data_node_id, 'name': name, 'path': path, 'valueType': value_type,
+                                             'unit': unit, 'keepHistory': keep_history, 'readOnly': read_only,
+                                             'href': "/datanodes/{0}".format(data_node_id)}
+            self.values[data_node_id] = []
+            return data_node_id
+
+    def add_value(self, data_node_id, value, timestamp=None):
+        with self._condition:
+            raw_value = {'id': self._new_id(), 'value': value,
+                         'timestamp': timestamp or time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())}
+            self.values[data_node_id].append(raw_value)
+            self._condition.notify_all()
+            return raw_value
+
+    def request_count(self, method=None, path_suffix=""):
+        return len([1 for request_method, path in list(self.requests)
+                    if (method is None or request_method == method) and path.endswith(path_suffix)])
+
+    def _new_id(self):
+        new_id = self._next_id
+        self._next_id += 1
+        return new_id
+
+    def _next_failure(self):
+        with self._condition:
+            if self._failures:
+                return self._failures.pop(0)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self.error_status, {}
+        return None
+
+    def _page(self, items, query):
+        offset = int(query.get('offset', [0])[0])
+        limit = int(query.get('limit', [50])[0])
+        if self.max_page_size is not None:
+            limit = min(limit, self.max_page_size)
+        return items[offset:offset + limit]
+
+    def _handle(self, method, path, query, headers, body):
+        if path.endswith("/oauth/device/token"):
+            grant = parse_qs(body.decode("utf-8"))
+            grant_type = grant.get('grant_type', [""])[0]
+            with self._condition:
+                self.grants.append(grant_type)
+            if self.credentials and grant_type == "password" and \
+                    self.credentials.get(grant.get('username', [""])[0]) != grant.get('password', [""])[0]:
+                return 400, {'error': "invalid_grant"}, {}
+            if grant_type == "refresh_token" and grant.get('refresh_token', [""])[0] not in self.refresh_tokens:
+                return 400, {'error': "invalid_grant"}, {}
+            token = "Bearer mock-{0}".format(self._random.getrandbits(64))
+            refresh_token = "mock-refresh-{0}".format(self._random.getrandbits(64))
+            with self._condition:
+                self.tokens.add(token)
+                self.refresh_tokens.add(refresh_token)
+            return 200, {'name': "mock device", 'deviceType': "mock", 'manufacturer': "remoteclick", 'id': 1,
+                         'access_token': token, 'refresh_token': refresh_token, 'expires_in': self.token_ttl}, {}
+        if headers.get("Authorization") not in self.tokens:
+            return 401, {'error': "invalid token"}, {}
+
+        if path.endswith("/datanodes"):
+            if method == "POST":
+                raw = json.loads(body.decode("utf-8"))
+                data_node_id = self.add_data_node(raw['name'], raw.get('path', ""), raw.get('value_type', "number"),
+                                                  raw.get('unit', ""), raw.get('keep_history', True),
+                                                  raw.get('read_only', True))
+                return 201, self.data_nodes[data_node_id], {}
+            with self._condition:
+                data_nodes = [self.data_nodes[data_node_id] for data_node_id in sorted(self.data_nodes)]
+            return 200, {'dataNodes': self._page(data_nodes, query)}, {}
+
+        if path.endswith("/datanodes/values/current") and method == "GET":
+            if not self.bulk:
+                return 404, {'error': "not found"}, {}
+            data_node_ids = [int(data_node_id) for data_node_id in query['ids'][0].split(",")]
+            with self._condition:
+                values = [dict(self.values[data_node_id][-1], dataNodeId=data_node_id)
+                          for data_node_id in data_node_ids if self.values.get(data_node_id)]
+            return 200, {'values': values}, {}
+
+        match = _DATA_NODE.search(path)
+        if match:
+            data_node_id = int(match.group(1))
+            with self._condition:
+                data_node = self.data_nodes.get(data_node_id)
+                if data_node is None:
+                    return 404, {'error': "not found"}, {}
+                if method == "GET":
+                    return 200, data_node, {}
+                if method == "DELETE":
+                    del self.data_nodes[data_node_id]
+                    del self.values[data_node_id]
+                    return 200, {}, {}
+                if method == "PATCH":
+                    raw = json.loads(body.decode("utf-8"))
+                    data_node.update({'name': raw.get('name', data_node['name']),
+                                      'path': raw.get('path', data_node['path']),
+                                      'valueType': raw.get('value_type', data_node['valueType']),
+                                      'unit': raw.get('unit', data_node['unit']),
+                                      'keepHistory': raw.get('keep_history', data_node['keepHistory']),
+                                      'readOnly': raw.get('read_only', data_node['readOnly'])})
+                    return 202, data_node, {}
+            return 405, {'error': "method not allowed"}, {}
+
+        match = _VALUES.search(path)
+        if match:
+            data_node_id, kind = int(match.group(1)), match.group(2)
+            if data_node_id not in self.values:
+                return 404, {'error': "not found"}, {}
+            if kind is None and method == "GET":
+                with self._condition:
+                    values = list(reversed(self.values[data_node_id]))
+                return 200, {'values': self._page(values, query)}, {}
+            if kind is None and method == "POST":
+                raw = json.loads(body.decode("utf-8"))
+                return 201, self.add_value(data_node_id, raw.get('value'), raw.get('timestamp')), {}
+            if kind == "/bulk" and method == "POST":
+                if not self.bulk:
+                    return 404, {'error': "not found"}, {}
+                raw_values = json.loads(body.decode("utf-8"))
+                return 201, {'values': [self.add_value(data_node_id, raw.get('value'), raw.get('timestamp'))
+                                        for raw in raw_values]}, {}
+            if kind == "/current":
+                with self._condition:
+                    values = self.values[data_node_id]
+                    if not values:
+                        return 404, {'error': "no value"}, {}
+                    if method == "PATCH":
+                        values[-1]['value'] = json.loads(body.decode("utf-8")).get('value')
+                        self._condition.notify_all()
+                        return 200, values[-1], {}
+                    current = values[-1]
+                    etag = '"{0}-{1}"'.format(current['id'], hash(json.dumps(current['value'])))
+                if self.conditional and headers.get("If-None-Match") == etag:
+                    with self._condition:
+                        self.not_modified += 1
+                    return 304, None, {'ETag': etag}
+                return 200, current, {'ETag': etag} if self.conditional else {}
+        return 404, {'error': "not found"}, {}
+
+
+class MockServerTestCase(TestCase):
+    # starts a mock server and connects a client for every test, both are stopped once the test is done
+    server_options = {'streaming': False}
+    client_options = {}
+
+    def setUp(self):
+        self.server = self.start_server()
+        self.client = self.connect_client()
+
+    def start_server(self, server_class=MockRemoteClickServer, **kwargs):
+        server = server_class(**dict(self.server_options, **kwargs)).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def connect_client(self, server=None, **kwargs):
+        client = (server or self.server).client(**dict(self.client_options, **kwargs))
+        client.connect()
+        self.addCleanup(client.close)
+        return client
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with server._condition:
+                server.connections += 1
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+        def _dispatch(self, method):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            server.requests.append((method, url.path))
+            with server._condition:
+                server.bytes_received += len(body)
+            if self.headers.get("Content-Encoding"):
+                if not server.compression:
+                    return self._reply(415, {'error': "unsupported content encoding"})
+                try:
+                    body = decompress(body, self.headers.get("Content-Encoding"))
+                except (ValueError, zlib.error):
+                    return self._reply(400, {'error': "invalid content encoding"})
+            if server.latency:
+                time.sleep(server.latency)
+
+            failure = server._next_failure()
+            if failure is not None:
+                return self._reply(failure[0], {'error': "injected failure"}, failure[1])
+            if url.path.endswith("/datanodes/values/events") and method == "GET":
+                if not server.streaming:
+                    return self._reply(404, {'error': "not found"})
+                if self.headers.get("Authorization") not in server.tokens:
+                    return self._reply(401, {'error': "invalid token"})
+                return self._stream([int(i) for i in query['ids'][0].split(",")])
+            status, content, headers = server._handle(method, url.path, query, self.headers, body)
+            if method in ("POST", "PATCH") and status in (200, 201, 202) and \
+                    "return=minimal" in (self.headers.get("Prefer") or ""):
+                status, content = 204, None
+            self._reply(status, content, headers)
+
+        def _stream(self, data_node_ids):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.close_connection = True
+            with server._condition:
+                sent = {data_node_id: len(server.values.get(data_node_id, [])) for data_node_id in data_node_ids}
+            server.stream_connected.set()
+            started = time.monotonic()
+            while True:
+                with server._condition:
+                    if server.stream_timeout is not None and time.monotonic() - started >= server.stream_timeout:
+                        break
+                    server._condition.wait(0.05)
+                    if not server.streaming:
+                        break
+                    events = []
+                    for data_node_id in data_node_ids:
+                        values = server.values.get(data_node_id, [])
+                        events.extend(dict(raw_value, dataNodeId=data_node_id)
+                                      for raw_value in values[sent[data_node_id]:])
+                        sent[data_node_id] = len(values)
+                try:
+                    for event in events:
+                        self._write_chunk("data: {0}\n\n".format(json.dumps(event)).encode("utf-8"))
+                except OSError:
+                    return
+            try:
+                self._write_chunk(b"")
+            except OSError:
+                pass
+
+        def _write_chunk(self, data):
+            self.wfile.write("{0:x}\r\n".format(len(data)).encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def _reply(self, status, content, headers=None):
+            body = json.dumps(content).encode("utf-8") if content is not None and status not in (204, 304) else b""
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if server.compression and len(body) >= _COMPRESS_RESPONSES_FROM and \
+                    "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                body = compress(body)
+                self.send_header("Content-Encoding", "gzip")
+            if status not in (204, 304):
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with server._condition:
+                server.bytes_sent += len(body)
+
+    return Handler
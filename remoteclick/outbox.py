@@ -0,0 +1,227 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue
+from remoteclick.exceptions import AuthenticationError, ClientError, NotFoundError, OutboxFullError, TransientError
+from remoteclick.storage import Transaction
+
+
+class Outbox:
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+    def __init__(self, path, max_values=100000, overflow=DROP_OLDEST, block_timeout=None):
+        if overflow not in (Outbox.DROP_OLDEST, Outbox.BLOCK):
+            raise ValueError("overflow must be either '{0}' or '{1}'".format(Outbox.DROP_OLDEST, Outbox.BLOCK))
+        self.logger = logging.getLogger("RemoteclickOutbox")
+        self.path = path
+        self.max_values = max_values
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._condition = threading.Condition()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, data_node_id INTEGER NOT NULL, payload TEXT NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS outbox_by_data_node ON outbox (data_node_id)")
+        self._count = self._connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def enqueue(self, data_node_value):
+        self.enqueue_many([data_node_value])
+
+    def enqueue_many(self, data_node_values):
+        rows = [(data_node_value.data_node.id, json.dumps(data_node_value.to_dict()))
+                for data_node_value in data_node_values]
+        with self._condition:
+            self._make_room(len(rows))
+            with self._transaction():
+                self._connection.executemany("INSERT INTO outbox (data_node_id, payload) VALUES (?, ?)", rows)
+            self._count += len(rows)
+            self._condition.notify_all()
+
+    def peek(self, limit=500):
+        with self._condition:
+            rows = self._connection.execute(
+                "SELECT seq, data_node_id, payload FROM outbox ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [(seq, data_node_id, json.loads(payload)) for seq, data_node_id, payload in rows]
+
+    def acknowledge(self, seqs):
+        if not seqs:
+            return 0
+        with self._condition:
+            with self._transaction():
+                deleted = self._connection.executemany("DELETE FROM outbox WHERE seq = ?",
+                                                       [(seq,) for seq in seqs]).rowcount
+            self._count -= deleted
+            self._condition.notify_all()
+        return deleted
+
+    def has_pending(self, data_node_id):
+        if not self._count:
+            return False
+        with self._condition:
+            return self._connection.execute("SELECT 1 FROM outbox WHERE data_node_id = ? LIMIT 1",
+                                            (data_node_id,)).fetchone() is not None
+
+    def wait(self, timeout=None):
+        with self._condition:
+            if not self._count:
+                self._condition.wait(timeout)
+            return self._count
+
+    def close(self):
+        with self._condition:
+            self._connection.close()
+
+    def __len__(self):
+        return self._count
+
+    def _make_room(self, needed):
+        if self._count + needed <= self.max_values:
+            return
+        if self.overflow == Outbox.BLOCK:
+            deadline = time.monotonic() + self.block_timeout if self.block_timeout is not None else None
+            while self._count + needed > self.max_values:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise OutboxFullError("outbox is full ({0} values)".format(self._count))
+                self._condition.wait(remaining)
+            return
+        excess = self._count + needed - self.max_values
+        with self._transaction():
+            dropped = self._connection.execute(
+                "DELETE FROM outbox WHERE seq IN (SELECT seq FROM outbox ORDER BY seq LIMIT ?)", (excess,)
+            ).rowcount
+        self._count -= dropped
+        self.dropped += dropped
+        self.logger.warning("outbox is full. dropped %s oldest values.", dropped)
+
+    def _transaction(self):
+        return Transaction(self._connection)
+
+
+class OutboxDrainer:
+    def __init__(self, client, outbox, batch_size=500, retry_interval=5.0):
+        self.logger = logging.getLogger("RemoteclickOutboxDrainer")
+        self.client = client
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.sent = 0
+        self.rejected = 0
+        self._stopped = threading.Event()
+        self._draining = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="remoteclick-outbox-drainer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        with self.outbox._condition:
+            self.outbox._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def drain(self):
+        # the drainer thread and explicit calls must not replay the same values twice
+        with self._draining:
+            while not self._stopped.is_set():
+                batch = self.outbox.peek(self.batch_size)
+                if not batch:
+                    return True
+                if not self._send(batch):
+                    return False
+            return False
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if not self.outbox.wait(self.retry_interval):
+                continue
+            if not self.drain():
+                self._stopped.wait(self.retry_interval)
+
+    def _send(self, batch):
+        groups = {}
+        for seq, data_node_id, payload in batch:
+            groups.setdefault(data_node_id, []).append((seq, payload))
+
+        for data_node_id, entries in groups.items():
+            data_node = self.client.data_nodes.get(data_node_id)
+            if data_node is None:
+                data_node = DataNode()
+                data_node.id = data_node_id
+            values = [DataNodeValue(value=payload.get("value"), timestamp=payload.get("timestamp"),
+                                    data_node=data_node) for seq, payload in entries]
+            try:
+                self._replay(values, entries)
+            except TransientError as e:
+                self.logger.debug("api not reachable, retrying later: %s", e)
+                return False
+            except AuthenticationError as e:
+                self.logger.warning("not authorized to replay values, retrying later: %s", e)
+                return False
+            except ClientError as e:
+                # the data node does not exist anymore, replaying its values again would block the outbox forever.
+                # values saved before are already acknowledged
+                rejected = self.outbox.acknowledge([seq for seq, payload in entries])
+                self.rejected += rejected
+                self.logger.error("api rejected %s values of data node with id: %s, dropping them: %s", rejected,
+                                  data_node_id, e)
+                continue
+            except Exception as e:
+                self.logger.error("could not replay %s values of data node with id: %s: %s", len(values),
+                                  data_node_id, e)
+                return False
+        self.logger.debug("replayed %s values from outbox. %s values left.", len(batch), len(self.outbox))
+        return True
+
+    def _replay(self, values, entries):
+        try:
+            saved_values = self.client._save_data_node_values_bulk(values[0].data_node, values)
+        except (AuthenticationError, NotFoundError):
+            raise
+        except ClientError as e:
+            # a single invalid value rejects the whole request. posted one by one, only that value is dropped
+            self.logger.warning("api rejected %s values of data node with id: %s, replaying them one by one: %s",
+                                len(values), values[0].data_node.id, e)
+            saved_values = None
+        if saved_values is not None:
+            self._acknowledge(entries)
+            return
+        # without the bulk endpoint the values are posted one after another to keep their order. values which were
+        # saved or rejected before a failure are acknowledged, so they are not replayed twice
+        posted = []
+        rejected = []
+        try:
+            for data_node_value, entry in zip(values, entries):
+                try:
+                    self.client._post_data_node_value(data_node_value)
+                except (AuthenticationError, NotFoundError):
+                    raise
+                except ClientError as e:
+                    self.logger.error("api rejected value of data node with id: %s, dropping it: %s",
+                                      data_node_value.data_node.id, e)
+                    rejected.append(entry)
+                    continue
+                posted.append(entry)
+        finally:
+            self._acknowledge(posted)
+            self.rejected += self.outbox.acknowledge([seq for seq, payload in rejected])
+
+    def _acknowledge(self, entries):
+        self.outbox.acknowledge([seq for seq, payload in entries])
+        self.sent += len(entries)
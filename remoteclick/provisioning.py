@@ -0,0 +1,115 @@
+import copy
+import json
+import logging
+
+from remoteclick.datanode import DataNode
+
+logger = logging.getLogger("RemoteclickProvisioning")
+
+COMPARED_FIELDS = ('value_type', 'unit', 'keep_history', 'read_only')
+
+
+class SyncReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.created = []
+        self.updated = []
+        self.deleted = []
+        self.unchanged = []
+        self.errors = []
+
+    def is_successful(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'created': [data_node.full_name() for data_node in self.created],
+            'updated': [data_node.full_name() for data_node in self.updated],
+            'deleted': [data_node.full_name() for data_node in self.deleted],
+            'unchanged': [data_node.full_name() for data_node in self.unchanged],
+            'errors': [(data_node.full_name(), str(error)) for data_node, error in self.errors],
+        }
+
+    def __str__(self):
+        return "{0}{1} created, {2} updated, {3} deleted, {4} unchanged, {5} errors".format(
+            "(dry run) " if self.dry_run else "", len(self.created), len(self.updated), len(self.deleted),
+            len(self.unchanged), len(self.errors))
+
+
+def load_spec(spec):
+    if isinstance(spec, str):
+        with open(spec, 'r') as f:
+            if spec.endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("yaml specs require PyYAML. install it with: pip install remoteclick[yaml]")
+                spec = yaml.safe_load(f)
+            else:
+                spec = json.load(f)
+    if isinstance(spec, dict):
+        spec = spec.get('dataNodes', [])
+
+    data_nodes = []
+    for item in spec:
+        if isinstance(item, DataNode):
+            data_nodes.append(item)
+        elif 'valueType' in item:
+            data_nodes.append(DataNode.from_dict(item))
+        else:
+            data_nodes.append(DataNode(**item))
+    return data_nodes
+
+
+def plan(remote_data_nodes, data_nodes, delete_missing=False):
+    report = SyncReport(dry_run=True)
+    remote = {data_node.full_name(): data_node for data_node in remote_data_nodes}
+    wanted = set()
+    for data_node in data_nodes:
+        full_name = data_node.full_name()
+        if full_name in wanted:
+            raise ValueError("data node {0} is specified more than once".format(full_name))
+        wanted.add(full_name)
+        existing = remote.get(full_name)
+        if existing is None:
+            report.created.append(data_node)
+        elif any(getattr(existing, field) != getattr(data_node, field) for field in COMPARED_FIELDS):
+            data_node = copy.copy(data_node)
+            data_node.id = existing.id
+            report.updated.append(data_node)
+        else:
+            report.unchanged.append(existing)
+    if delete_missing:
+        report.deleted = [data_node for full_name, data_node in remote.items() if full_name not in wanted]
+    return report
+
+
+def sync_data_nodes(client, spec, delete_missing=False, dry_run=False):
+    data_nodes = load_spec(spec)
+    report = plan(client.refresh_data_nodes(), data_nodes, delete_missing=delete_missing)
+    logger.debug("sync plan: %s", report)
+    if dry_run:
+        return report
+
+    report.dry_run = False
+    executor = client._get_executor()
+    results = {'created': [], 'updated': [], 'deleted': []}
+    operations = [('created', data_node, executor.submit(client._create_data_node, data_node))
+                  for data_node in report.created]
+    operations += [('updated', data_node, executor.submit(client.update_data_node, data_node))
+                   for data_node in report.updated]
+    operations += [('deleted', data_node, executor.submit(client.delete_data_node, data_node))
+                   for data_node in report.deleted]
+
+    for kind, data_node, future in operations:
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error("could not sync data node %s: %s", data_node.full_name(), e)
+            report.errors.append((data_node, e))
+            continue
+        results[kind].append(data_node if kind == 'deleted' else result)
+    report.created, report.updated, report.deleted = results['created'], results['updated'], results['deleted']
+    logger.debug("synced data nodes: %s", report)
+    return report
@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH', 'DELETE'])
+RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+THROTTLING_STATUS_CODES = frozenset([429, 503])
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1, timeout=None):
+        # takes the tokens right away and returns how long the caller has to wait before using them. the balance may
+        # become negative, which queues later callers behind earlier ones
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(self._delay(now), (tokens - self._tokens) / self.rate, 0.0)
+            if timeout is not None and wait > timeout:
+                return None
+            self._tokens -= tokens
+            return wait
+
+    def try_acquire(self, tokens=1):
+        return self.reserve(tokens, timeout=0) is not None
+
+    def acquire(self, tokens=1, timeout=None):
+        wait = self.reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def _delay(self, now):
+        return 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    def __init__(self, rate, burst=None, min_rate=0.5, max_rate=None, increase=1.0, decrease=0.5):
+        super().__init__(rate, burst if burst is not None else max(int(rate), 1))
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase = increase
+        self.decrease = decrease
+        self.throttled = 0
+        self._decreased_at = None
+        self._paused_until = 0.0
+
+    def on_success(self):
+        # additive increase: about `increase` requests per second more for every second without throttling
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            # responses to requests that were sent at the old rate must not decrease the rate again
+            if self._decreased_at is not None and now - self._decreased_at < 1.0 / self.rate:
+                return
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            self._decreased_at = now
+
+    def _delay(self, now):
+        return self._paused_until - now
+
+
+class Backoff:
+    def __init__(self, base=0.3, max_delay=30.0, max_retry_after=120.0):
+        self.base = base
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            # the server knows best. None tells the caller not to wait that long
+            return retry_after if retry_after <= self.max_retry_after else None
+        # full jitter keeps many clients from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base * (2 ** attempt)))
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    import email.utils
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
@@ -0,0 +1,111 @@
+import gzip
+import json
+import threading
+import time
+import urllib.parse
+
+from remoteclick.compression import decompress
+from remoteclick.transport import Transport, create_transport
+
+FORMAT = "remoteclick-recording"
+VERSION = 1
+# request headers which change what the api does with a request. authorization is never recorded
+RECORDED_HEADERS = ('Content-Type', 'Content-Encoding', 'Prefer')
+
+
+class RecordedRequest:
+    # one line of a recording: a json array with the fields in this order
+    __slots__ = ('offset', 'duration', 'method', 'target', 'status', 'sent', 'received', 'headers', 'body')
+
+    def __init__(self, offset, duration, method, target, status, sent=0, received=0, headers=None, body=None):
+        self.offset = offset
+        self.duration = duration
+        self.method = method
+        self.target = target
+        self.status = status
+        self.sent = sent
+        self.received = received
+        self.headers = headers
+        self.body = body
+
+    def from_list(fields):
+        return RecordedRequest(*fields)
+
+    def to_list(self):
+        return [getattr(self, field) for field in self.__slots__]
+
+    def __repr__(self):
+        return "RecordedRequest({0} {1} -> {2})".format(self.method, self.target, self.status)
+
+
+class RecordingTransport(Transport):
+    name = "recording"
+
+    def __init__(self, transport, path):
+        if not isinstance(transport, Transport):
+            transport = create_transport(transport)
+        super().__init__(transport.stats)
+        self.transport = transport
+        self.errors = transport.errors
+        self.path = path
+        self.recorded = 0
+        self._lock = threading.Lock()
+        # gzipped json lines with one array per request keep recordings of long runs small
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._file.write(json.dumps({'format': FORMAT, 'version': VERSION, 'started': time.time()}) + "\n")
+        self._started = time.monotonic()
+
+    def request(self, method, url, data=None, params=None, headers=None, auth=None, timeout=None, stream=False):
+        start = time.monotonic()
+        try:
+            response = self.transport.request(method, url, data=data, params=params, headers=headers, auth=auth,
+                                              timeout=timeout, stream=stream)
+        except Exception:
+            self._record(start, method, url, params, headers, data, None, 0)
+            raise
+        self._record(start, method, url, params, headers, data, response.status_code,
+                     0 if stream else len(response.content))
+        return response
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        self.transport.close()
+
+    def _record(self, start, method, url, params, headers, data, status, received):
+        duration = time.monotonic() - start
+        parts = urllib.parse.urlsplit(url)
+        query = parts.query
+        if params:
+            query = (query + "&" if query else "") + urllib.parse.urlencode(params)
+        target = parts.path + ("?" + query if query else "")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        headers = {name: value for name, value in (headers or {}).items() if name in RECORDED_HEADERS}
+        body = None
+        if data and "/oauth/" not in parts.path:
+            # bodies are stored decoded, so recordings stay readable and can be replayed with any compression
+            body = decompress(data, headers.pop('Content-Encoding', None)).decode("utf-8", "replace")
+        else:
+            # the token grant carries the device's credentials
+            headers.pop('Content-Encoding', None)
+        entry = RecordedRequest(round(start - self._started, 6), round(duration, 6), method, target, status,
+                                len(data) if data else 0, received, headers or None, body)
+        line = json.dumps(entry.to_list(), separators=(",", ":")) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                self.recorded += 1
+
+
+def read_recording(path):
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header = json.loads(file.readline() or "{}")
+        if header.get('format') != FORMAT:
+            raise ValueError("{0} is not a remoteclick recording".format(path))
+        if header.get('version', 0) > VERSION:
+            raise ValueError("unsupported recording version: {0}".format(header.get('version')))
+        for line in file:
+            if line.strip():
+                yield RecordedRequest.from_list(json.loads(line))
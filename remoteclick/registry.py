@@ -0,0 +1,230 @@
+import fnmatch
+import re
+import threading
+import time
+
+_MAGIC = re.compile(r"[*?[]")
+
+
+class DataNodeRegistry:
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        # readers never lock: writers build a modified copy of the index and publish it with a single assignment
+        self._index = _Index()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def nodes(self):
+        return self._index.by_id
+
+    def is_stale(self):
+        if self._loaded_at is None:
+            return True
+        return self.ttl is not None and time.monotonic() - self._loaded_at > self.ttl
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def clear(self):
+        with self._lock:
+            self._index = _Index()
+            self._loaded_at = None
+
+    def replace(self, data_nodes):
+        index = _Index()
+        for data_node in data_nodes:
+            index.add(data_node)
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def add(self, data_node):
+        return self.add_many([data_node])[0]
+
+    def add_many(self, data_nodes):
+        with self._lock:
+            index = self._index.copy()
+            for data_node in data_nodes:
+                index.add(data_node)
+            self._index = index
+        return data_nodes
+
+    def remove(self, data_node):
+        with self._lock:
+            if data_node.id not in self._index.by_id:
+                return None
+            index = self._index.copy()
+            existing = index.remove(data_node)
+            self._index = index
+        return existing
+
+    def get_by_id(self, data_node_id):
+        return self._count(self._index.by_id.get(data_node_id))
+
+    def get_by_full_name(self, full_name):
+        return self._count(self._index.by_full_name.get(full_name))
+
+    def get_by_prefix(self, prefix):
+        tree = self._count(self._index.tree.get(prefix))
+        return list(tree) if tree else []
+
+    def get_subtree(self, path=""):
+        return self._count(self._index.tree.get(path))
+
+    def match(self, pattern):
+        return self._count(self._index.tree.match(pattern))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'refreshes': self.refreshes, 'size': len(self._index.by_id)}
+
+    def __len__(self):
+        return len(self._index.by_id)
+
+    def __contains__(self, data_node_id):
+        return data_node_id in self._index.by_id
+
+    def __iter__(self):
+        return iter(list(self._index.by_id.values()))
+
+    def _count(self, result):
+        if result:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return result
+
+
+class PathTree:
+    # one node of the path trie. published nodes are never modified, so a tree can be read without locking
+    def __init__(self, path="", children=None, data_nodes=None, size=0, owner=None):
+        self.path = path
+        self.children = children if children is not None else {}
+        self.data_nodes = data_nodes if data_nodes is not None else {}
+        self.size = size
+        self._owner = owner
+
+    @property
+    def name(self):
+        return self.path.rsplit("/", 1)[-1]
+
+    def get(self, path):
+        node = self
+        for segment in _segments(path):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def walk(self):
+        yield from self.data_nodes.values()
+        for child in self.children.values():
+            yield from child.walk()
+
+    def match(self, pattern):
+        # glob per path segment, "**" stands for any number of segments. the last segment matches the node names
+        segments = _segments(pattern)
+        if not segments:
+            return []
+        return list({data_node.id: data_node for data_node in self._match(segments)}.values())
+
+    def _match(self, segments):
+        segment, rest = segments[0], segments[1:]
+        if segment == "**":
+            if not rest:
+                yield from self.walk()
+                return
+            yield from self._match(rest)
+            for child in self.children.values():
+                yield from child._match(segments)
+        elif not rest:
+            for data_node in self.data_nodes.values():
+                if fnmatch.fnmatchcase(data_node.name, segment):
+                    yield data_node
+        elif not _MAGIC.search(segment):
+            child = self.children.get(segment)
+            if child is not None:
+                yield from child._match(rest)
+        else:
+            for name, child in self.children.items():
+                if fnmatch.fnmatchcase(name, segment):
+                    yield from child._match(rest)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return self.walk()
+
+    def __repr__(self):
+        return "PathTree(path={0!r}, size={1}, children={2})".format(self.path, self.size, sorted(self.children))
+
+
+class _Index:
+    def __init__(self, by_id=None, by_full_name=None, tree=None, keys=None):
+        self.by_id = by_id if by_id is not None else {}
+        self.by_full_name = by_full_name if by_full_name is not None else {}
+        self.keys = keys if keys is not None else {}
+        # trie nodes owned by this index may be modified in place, all others are shared and copied before a change
+        self._token = object()
+        self.tree = tree if tree is not None else PathTree(owner=self._token)
+
+    def copy(self):
+        return _Index(dict(self.by_id), dict(self.by_full_name), self.tree, dict(self.keys))
+
+    def add(self, data_node):
+        if data_node.id in self.by_id:
+            self.remove(data_node)
+        # index keys are remembered since callers may rename a registered data node in place
+        full_name, segments = data_node.full_name(), _segments(data_node.path)
+        self.by_id[data_node.id] = data_node
+        self.by_full_name[full_name] = data_node
+        nodes = self._writable_path(segments)
+        nodes[-1].data_nodes[data_node.id] = data_node
+        for node in nodes:
+            node.size += 1
+        self.keys[data_node.id] = (full_name, segments)
+
+    def remove(self, data_node):
+        existing = self.by_id.pop(data_node.id, None)
+        if existing is None:
+            return None
+        full_name, segments = self.keys.pop(data_node.id)
+        if self.by_full_name.get(full_name) is existing:
+            del self.by_full_name[full_name]
+        nodes = self._writable_path(segments)
+        del nodes[-1].data_nodes[existing.id]
+        for node in nodes:
+            node.size -= 1
+        for parent, node, segment in reversed(list(zip(nodes, nodes[1:], segments))):
+            if node.size:
+                break
+            del parent.children[segment]
+        return existing
+
+    def _writable_path(self, segments):
+        node = self.tree = self._own(self.tree)
+        nodes = [node]
+        for index, segment in enumerate(segments):
+            child = node.children.get(segment)
+            if child is None:
+                child = PathTree("/".join(segments[:index + 1]), owner=self._token)
+            else:
+                child = self._own(child)
+            node.children[segment] = child
+            node = child
+            nodes.append(node)
+        return nodes
+
+    def _own(self, node):
+        if node._owner is self._token:
+            return node
+        return PathTree(node.path, dict(node.children), dict(node.data_nodes), node.size, self._token)
+
+
+def _segments(path):
+    return [part for part in (path or "").strip("/").split("/") if part]
@@ -0,0 +1,125 @@
+import threading
+import time
+
+from remoteclick.value_type import ValueType
+
+
+class ReportingPolicy:
+    def __init__(self, deadband=None, deadband_percent=None, min_interval=None, max_silence=None):
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.min_interval = min_interval
+        self.max_silence = max_silence
+
+    def is_significant(self, value_type, last_value, value):
+        if value_type != ValueType.NUMBER or not _is_number(last_value) or not _is_number(value):
+            return value != last_value
+        delta = abs(value - last_value)
+        if self.deadband is None and self.deadband_percent is None:
+            return delta != 0
+        if self.deadband is not None and delta > self.deadband:
+            return True
+        if self.deadband_percent is not None and delta > abs(last_value) * self.deadband_percent / 100.0:
+            return True
+        return False
+
+    def __str__(self):
+        return self.__dict__.__str__()
+
+
+class ReportingFilter:
+    def __init__(self):
+        self.sent = 0
+        self.suppressed = 0
+        self._policies = {}
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def set_policy(self, data_node, policy):
+        with self._lock:
+            self._policies[data_node.id] = policy
+            self._states.pop(data_node.id, None)
+
+    def remove_policy(self, data_node):
+        with self._lock:
+            self._policies.pop(data_node.id, None)
+            self._states.pop(data_node.id, None)
+
+    def get_policy(self, data_node):
+        return self._policies.get(data_node.id)
+
+    def should_report(self, data_node_value, batched=False):
+        # batched values follow other reported values of the same data node which are sent with them. reverting the
+        # last one restores the state from before the batch
+        data_node = data_node_value.data_node
+        policy = self._policies.get(data_node.id)
+        if policy is None:
+            with self._lock:
+                self.sent += 1
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(data_node.id)
+            if state is None:
+                state = self._states[data_node.id] = _ReportingState()
+            elif not self._is_due(policy, data_node.value_type, state, data_node_value.value, now):
+                state.suppressed += 1
+                self.suppressed += 1
+                return False
+            if not batched:
+                state.previous = (state.last_value, state.last_sent_at, state.last_reported)
+            state.last_value = data_node_value.value
+            state.last_sent_at = now
+            state.last_reported = data_node_value
+            state.sent += 1
+            self.sent += 1
+            return True
+
+    def revert(self, data_node_value):
+        # a value which could not be sent must not count as reported, or retrying it would be suppressed
+        data_node = data_node_value.data_node
+        with self._lock:
+            self.sent -= 1
+            state = self._states.get(data_node.id)
+            if state is None:
+                return
+            state.sent -= 1
+            if state.last_reported is not data_node_value or state.previous is None:
+                return
+            if state.previous[1] is None:
+                del self._states[data_node.id]
+            else:
+                state.last_value, state.last_sent_at, state.last_reported = state.previous
+                state.previous = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sent': self.sent,
+                'suppressed': self.suppressed,
+                'data_nodes': {data_node_id: {'sent': state.sent, 'suppressed': state.suppressed}
+                               for data_node_id, state in self._states.items()},
+            }
+
+    def _is_due(self, policy, value_type, state, value, now):
+        elapsed = now - state.last_sent_at
+        if policy.min_interval is not None and elapsed < policy.min_interval:
+            return False
+        if policy.max_silence is not None and elapsed >= policy.max_silence:
+            return True
+        return policy.is_significant(value_type, state.last_value, value)
+
+
+class _ReportingState:
+    def __init__(self):
+        self.last_value = None
+        self.last_sent_at = None
+        self.last_reported = None
+        self.previous = None
+        self.sent = 0
+        self.suppressed = 0
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,83 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from remoteclick.transport import ConnectionStats, Transport
+
+TRANSPORT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+def _counting_pool_class(pool_class, stats):
+    class CountingConnectionPool(pool_class):
+        def _new_conn(self):
+            stats.connection_opened()
+            return super()._new_conn()
+
+    return CountingConnectionPool
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    def __init__(self, stats=None, **kwargs):
+        self.stats = stats if stats is not None else ConnectionStats()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(pool_class, self.stats)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.request_sent()
+        return super().send(request, **kwargs)
+
+
+def create_session(pool_size=10, max_retries=3, backoff_factor=0.3, keep_alive=True, stats=None):
+    # urllib3 only retries failed connections. responses with error status codes are retried by the client, which
+    # honours Retry-After and adapts its rate limit to them
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status=0,
+        status_forcelist=(),
+        allowed_methods=frozenset(['GET', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS']),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = CountingHTTPAdapter(stats=stats, pool_connections=pool_size, pool_maxsize=pool_size,
+                                  max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session, adapter.stats
+
+
+def session_stats(session):
+    for adapter in session.adapters.values():
+        if isinstance(adapter, CountingHTTPAdapter):
+            return adapter.stats
+    return ConnectionStats()
+
+
+class RequestsTransport(Transport):
+    name = "requests"
+    errors = TRANSPORT_ERRORS
+
+    def __init__(self, session=None, pool_size=10, max_retries=3, backoff_factor=0.3, keep_alive=True):
+        if session is None:
+            session, stats = create_session(pool_size=pool_size, max_retries=max_retries,
+                                            backoff_factor=backoff_factor, keep_alive=keep_alive)
+        else:
+            stats = session_stats(session)
+        super().__init__(stats)
+        self.session = session
+
+    def request(self, method, url, data=None, params=None, headers=None, auth=None, timeout=None, stream=False):
+        return self.session.request(method, url, data=data, params=params, headers=headers, auth=auth,
+                                    timeout=timeout, stream=stream)
+
+    def close(self):
+        self.session.close()
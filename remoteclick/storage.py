@@ -0,0 +1,10 @@
+class Transaction:
+    # connections are opened in autocommit mode, writes which belong together are wrapped in an explicit transaction
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue
+from remoteclick.exceptions import RequestError
+
+
+class Subscription:
+    def __init__(self, client, target, callback, min_interval=0.1, max_interval=30.0, backoff=1.5, queue_size=1000,
+                 streaming=True, loop=None):
+        if asyncio.iscoroutinefunction(callback) and loop is None:
+            raise ValueError("coroutine callbacks require the event loop they should run on")
+        self.logger = logging.getLogger("RemoteclickSubscription")
+        self.client = client
+        self.target = target
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.streaming = streaming
+        self.loop = loop
+        self.interval = min_interval
+        self.transport = None
+        self.delivered = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopped = threading.Event()
+        self._last_seen = {}
+        self._response = None
+        self._threads = []
+
+    def start(self):
+        for target, name in ((self._receive, "receiver"), (self._dispatch, "dispatcher")):
+            thread = threading.Thread(target=target, name="remoteclick-subscription-" + name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def cancel(self, timeout=None):
+        self._stopped.set()
+        response = self._response
+        if response is not None:
+            # unblock the receiver thread which may wait for the next event (urllib3 >= 2.3)
+            shutdown = getattr(response.raw, 'shutdown', None)
+            if shutdown is not None:
+                shutdown()
+            response.close()
+        self._enqueue(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def is_active(self):
+        return not self._stopped.is_set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cancel()
+
+    def data_nodes(self):
+        if isinstance(self.target, DataNode):
+            return [self.target]
+        if isinstance(self.target, str):
+            return [data_node for data_node in self.client.get_data_nodes_by_prefix(self.target)
+                    if data_node.id is not None]
+        return list(self.target)
+
+    def _receive(self):
+        while not self._stopped.is_set():
+            try:
+                if self.streaming and self._stream():
+                    continue
+                self.streaming = False
+                self._poll()
+            except RequestError as e:
+                delay = max(self.max_interval, e.retry_after or 0)
+                self.logger.warning("subscription failed, retrying in %.1fs: %s", delay, e)
+                self._stopped.wait(delay)
+            except Exception as e:
+                self.logger.exception("subscription failed: %s", e)
+                self._stopped.wait(self.max_interval)
+
+    def _stream(self):
+        data_nodes = {data_node.id: data_node for data_node in self.data_nodes()}
+        if not data_nodes:
+            self._stopped.wait(self.max_interval)
+            return True
+        response = self.client._request("GET", "datanodes/values/events",
+                                        params={'ids': ",".join(str(data_node_id) for data_node_id in data_nodes)},
+                                        headers={'Accept': 'text/event-stream'}, stream=True, operation="subscribe")
+        if response.status_code in (400, 404, 405, 406) or \
+                not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+            response.close()
+            self.logger.debug("api does not support event streams. falling back to adaptive polling.")
+            return False
+        if response.status_code != 200:
+            response.close()
+            raise self.client._make_error(response)
+
+        self.transport = "stream"
+        self._response = response
+        connected = time.monotonic()
+        received = False
+        try:
+            data = []
+            for line in _iter_lines(response):
+                if self._stopped.is_set():
+                    break
+                if line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    self._on_event(data_nodes, self.client.codec.decode("\n".join(data)))
+                    received = True
+                    data = []
+        except Exception as e:
+            if not self._stopped.is_set():
+                self.logger.debug("event stream interrupted: %s", e)
+        finally:
+            self._response = None
+            response.close()
+
+        # streams which are closed right away, e.g. by a proxy, are reconnected with backoff
+        if received or time.monotonic() - connected >= self.max_interval:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        if not self._stopped.is_set():
+            self.logger.debug("event stream ended, reconnecting in %.1fs", self.interval)
+            self._stopped.wait(self.interval)
+        return True
+
+    def _on_event(self, data_nodes, raw_value):
+        data_node = data_nodes.get(raw_value.get('dataNodeId'))
+        if data_node is None:
+            return
+        self._enqueue(DataNodeValue.from_dict(raw_value, data_node))
+
+    def _poll(self):
+        self.transport = "polling"
+        data_nodes = self.data_nodes()
+        changed = False
+        if data_nodes:
+            values, _ = self.client.get_current_values(data_nodes)
+            for data_node, data_node_value in values.items():
+                if data_node_value is None:
+                    continue
+                current = (data_node_value.value, data_node_value.timestamp)
+                last_seen = self._last_seen.get(data_node.id)
+                self._last_seen[data_node.id] = current
+                if last_seen is not None and last_seen != current:
+                    self._enqueue(data_node_value)
+                    changed = True
+
+        # poll quickly after changes and back off while nothing happens
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        self._stopped.wait(self.interval)
+
+    def _enqueue(self, data_node_value):
+        while True:
+            try:
+                self._queue.put_nowait(data_node_value)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _dispatch(self):
+        while True:
+            data_node_value = self._queue.get()
+            if data_node_value is None or self._stopped.is_set():
+                return
+            try:
+                if asyncio.iscoroutinefunction(self.callback):
+                    asyncio.run_coroutine_threadsafe(self.callback(data_node_value), self.loop).result()
+                else:
+                    self.callback(data_node_value)
+                self.delivered += 1
+            except Exception as e:
+                self.logger.exception("subscription callback failed: %s", e)
+
+
+def _iter_lines(response):
+    # iter_lines() waits for a full chunk, events have to be handled as soon as they arrive
+    read = getattr(response.raw, 'read1', None)
+    if read is None:
+        chunks = response.iter_content(chunk_size=1)
+    else:
+        chunks = iter(lambda: read(65536), b"")
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8")
@@ -0,0 +1,263 @@
+import http.client
+import logging
+import select
+import socket
+import threading
+import time
+import urllib.parse
+import zlib
+
+from remoteclick.compression import ACCEPT_ENCODING, decompress, decompressor
+from remoteclick.exceptions import TransportError
+from remoteclick.ratelimit import IDEMPOTENT_METHODS
+
+TRANSPORTS = ("requests", "http.client")
+
+
+class ConnectionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def request_sent(self):
+        with self._lock:
+            self.requests_sent += 1
+
+    def connections_reused(self):
+        return max(self.requests_sent - self.connections_opened, 0)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'connections_opened': self.connections_opened,
+                'requests_sent': self.requests_sent,
+                'connections_reused': max(self.requests_sent - self.connections_opened, 0),
+            }
+
+    def __str__(self):
+        return self.to_dict().__str__()
+
+
+class Transport:
+    # everything the client needs from http. request() takes the arguments of requests.Session.request() the client
+    # uses and returns a response with status_code, headers, content, iter_content() and close(). failing to reach
+    # the api raises TransportError or one of the exceptions in errors, which the client turns into TransportError
+    name = None
+    errors = ()
+
+    def __init__(self, stats=None):
+        self.stats = stats if stats is not None else ConnectionStats()
+
+    def request(self, method, url, data=None, params=None, headers=None, auth=None, timeout=None, stream=False):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def create_transport(transport="requests", pool_size=10, max_retries=3, backoff_factor=0.3, keep_alive=True):
+    if transport == "http.client":
+        return HttpClientTransport(pool_size=pool_size, max_retries=max_retries, backoff_factor=backoff_factor,
+                                   keep_alive=keep_alive)
+    if transport == "requests":
+        # requests and urllib3 take most of the import time, they are only loaded for the requests transport
+        from remoteclick.session import RequestsTransport
+        return RequestsTransport(pool_size=pool_size, max_retries=max_retries, backoff_factor=backoff_factor,
+                                 keep_alive=keep_alive)
+    raise ValueError("unknown transport: {0}. use one of {1}".format(transport, ", ".join(TRANSPORTS)))
+
+
+class HttpClientTransport(Transport):
+    # a small stand-in for requests.Session built on http.client only. it imports in a few milliseconds and covers
+    # what the client needs: keep-alive pooling, connection retries, timeouts, auth callables and streamed responses
+    name = "http.client"
+
+    def __init__(self, pool_size=10, max_retries=3, backoff_factor=0.3, keep_alive=True, stats=None):
+        super().__init__(stats)
+        self.logger = logging.getLogger("RemoteclickHttpClientTransport")
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.headers = {'User-Agent': 'remoteclick', 'Accept': '*/*', 'Accept-Encoding': ACCEPT_ENCODING}
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._ssl_context = None
+
+    def request(self, method, url, data=None, params=None, headers=None, auth=None, timeout=None, stream=False):
+        parts = urllib.parse.urlsplit(url)
+        target = parts.path or "/"
+        query = parts.query
+        if params:
+            query = (query + "&" if query else "") + urllib.parse.urlencode(params)
+        if query:
+            target += "?" + query
+        request = _Request(method, url, dict(self.headers, **headers) if headers else dict(self.headers))
+        if auth is not None:
+            request = auth(request) or request
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        key = (parts.scheme, parts.hostname, parts.port)
+
+        attempt = 0
+        while True:
+            connection, reused = self._get_connection(key)
+            try:
+                if not reused:
+                    connection.timeout = connect_timeout
+                    connection.connect()
+                    self.stats.connection_opened()
+                connection.sock.settimeout(read_timeout)
+            except OSError as e:
+                connection.close()
+                # nothing was sent yet, so any request can be repeated
+                if attempt >= self.max_retries:
+                    raise TransportError(str(e)) from e
+                time.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+                continue
+            try:
+                connection.request(method, target, body=data, headers=request.headers)
+                self.stats.request_sent()
+                response = _Response(self, key, connection, connection.getresponse(), stream)
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                # the server may have closed an idle connection just before it was used
+                if reused and method in IDEMPOTENT_METHODS:
+                    self.logger.debug("pooled connection failed, retrying on a new one: %s", e)
+                    continue
+                raise TransportError(str(e)) from e
+            return response
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for connections in pools.values():
+            for connection in connections:
+                connection.close()
+
+    def _get_connection(self, key):
+        with self._lock:
+            connections = self._pools.get(key)
+            while connections:
+                connection = connections.pop()
+                if not _is_dropped(connection):
+                    return connection, True
+                connection.close()
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, context=self._get_ssl_context()), False
+        return http.client.HTTPConnection(host, port), False
+
+    def _put_connection(self, key, connection):
+        with self._lock:
+            connections = self._pools.setdefault(key, [])
+            if len(connections) < self.pool_size:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def _get_ssl_context(self):
+        # loading the certificate store is the slow part of the first https request, it is done once per session
+        if self._ssl_context is None:
+            import ssl
+            self._ssl_context = ssl.create_default_context()
+        return self._ssl_context
+
+
+class _Request:
+    def __init__(self, method, url, headers):
+        self.method = method
+        self.url = url
+        self.headers = headers
+
+
+class _Response:
+    def __init__(self, session, key, connection, raw, stream):
+        self.status_code = raw.status
+        self.reason = raw.reason
+        self.headers = raw.msg
+        self.raw = raw
+        self._session = session
+        self._key = key
+        self._connection = connection
+        self._content = None
+        if not stream:
+            self._read()
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._read()
+        return self._content
+
+    def iter_content(self, chunk_size=1):
+        if self._content is not None:
+            yield self._content
+            return
+        decoder = decompressor(self.headers.get('Content-Encoding'))
+        while True:
+            chunk = self.raw.read(chunk_size)
+            if not chunk:
+                self._release()
+                rest = decoder.flush() if decoder is not None else b""
+                if rest:
+                    yield rest
+                return
+            if decoder is not None:
+                chunk = decoder.decompress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if connection.sock is not None:
+            # wakes up a thread which is still waiting for data on the stream
+            try:
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        connection.close()
+
+    def _read(self):
+        try:
+            self._content = decompress(self.raw.read(), self.headers.get('Content-Encoding'))
+        except (OSError, http.client.HTTPException, zlib.error) as e:
+            self.close()
+            raise TransportError(str(e)) from e
+        self._release()
+
+    def _release(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if self.raw.will_close:
+            connection.close()
+        else:
+            self._session._put_connection(self._key, connection)
+
+
+def _is_dropped(connection):
+    # an idle connection becomes readable once the server has closed it
+    if connection.sock is None:
+        return True
+    try:
+        return bool(select.select([connection.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
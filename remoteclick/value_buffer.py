@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from remoteclick.exceptions import TransientError
+
+
+class ValueBuffer:
+    def __init__(self, client, max_size=100, max_age=1.0):
+        self.logger = logging.getLogger("RemoteclickValueBuffer")
+        self.client = client
+        self.max_size = max_size
+        self.max_age = max_age
+        self._pending = []
+        self._oldest = None
+        self._in_flight = set()
+        self._closed = False
+        self._flush_requested = False
+        self._dispatching = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="remoteclick-value-buffer", daemon=True)
+            self._thread.start()
+        return self
+
+    def add(self, data_node_value, callback=None):
+        if not data_node_value.data_node:
+            raise ValueError("data-node of value cannot be none")
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        if self.client.aggregation.is_aggregated(data_node_value.data_node):
+            for aggregate in self.client._aggregate(data_node_value):
+                self._enqueue(aggregate, Future())
+            future.set_result(None)
+            return future
+        self._enqueue(data_node_value, future)
+        return future
+
+    def _enqueue(self, data_node_value, future):
+        if not self.client.reporting.should_report(data_node_value):
+            future.set_result(None)
+            return
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("value buffer is closed")
+            if not self._pending:
+                # the flushing thread waits without a timeout while the buffer is empty
+                self._oldest = time.monotonic()
+                self._condition.notify_all()
+            self._pending.append((data_node_value, future))
+            if len(self._pending) >= self.max_size:
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        with self._condition:
+            while self._pending or self._dispatching:
+                self._flush_requested = True
+                self._condition.notify_all()
+                self._condition.wait()
+            in_flight = list(self._in_flight)
+        for future in in_flight:
+            try:
+                future.exception(timeout=timeout)
+            except Exception:
+                pass
+
+    def close(self, timeout=None):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush(timeout)
+
+    def __len__(self):
+        with self._condition:
+            return len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+            self._dispatch(batch)
+            with self._condition:
+                self._dispatching = False
+                self._flush_requested = False
+                self._condition.notify_all()
+
+    def _next_batch(self):
+        while True:
+            if self._pending:
+                age = time.monotonic() - self._oldest
+                if self._closed or self._flush_requested or len(self._pending) >= self.max_size \
+                        or age >= self.max_age:
+                    batch, self._pending = self._pending, []
+                    self._dispatching = True
+                    return batch
+                self._condition.wait(self.max_age - age)
+            elif self._closed:
+                return None
+            else:
+                self._condition.wait()
+
+    def _dispatch(self, batch):
+        groups = {}
+        for data_node_value, future in batch:
+            groups.setdefault(data_node_value.data_node.id, []).append((data_node_value, future))
+        self.logger.debug("flushing %s values of %s data nodes..", len(batch), len(groups))
+
+        outbox = self.client.outbox
+        executor = self.client._get_executor()
+        for data_node_id, entries in groups.items():
+            if outbox is not None and outbox.has_pending(data_node_id):
+                # older values of the data node are still waiting in the outbox, these are queued behind them
+                self._defer(outbox, entries)
+                continue
+            if self.client.bulk_values_supported is None:
+                self._save_bulk(entries)
+            elif self.client.bulk_values_supported:
+                self._track(executor.submit(self._save_bulk, entries))
+            else:
+                for entry in entries:
+                    self._track(executor.submit(self._save_single, entry))
+
+    def _save_bulk(self, entries):
+        values = [data_node_value for data_node_value, future in entries]
+        try:
+            saved_values = self.client._save_data_node_values_bulk(values[0].data_node, values)
+        except TransientError as e:
+            if self.client.outbox is None:
+                self._fail(entries, e)
+            else:
+                self.logger.warning("api not reachable, storing values in outbox: %s", e)
+                self._defer(self.client.outbox, entries)
+            return
+        except Exception as e:
+            self._fail(entries, e)
+            return
+        if saved_values is None:
+            for entry in entries:
+                self._track(self.client._get_executor().submit(self._save_single, entry))
+            return
+        for (data_node_value, future), saved_value in zip(entries, saved_values):
+            future.set_result(saved_value)
+
+    def _save_single(self, entry):
+        # values were filtered and aggregated when they were added, they are posted as they are
+        data_node_value, future = entry
+        try:
+            future.set_result(self.client._post_data_node_value(data_node_value))
+        except TransientError as e:
+            if self.client.outbox is None:
+                self._fail([entry], e)
+            else:
+                self.logger.warning("api not reachable, storing value in outbox: %s", e)
+                self._defer(self.client.outbox, [entry])
+        except Exception as e:
+            self._fail([entry], e)
+
+    def _fail(self, entries, error):
+        self.client._revert([data_node_value for data_node_value, future in entries])
+        for data_node_value, future in entries:
+            future.set_exception(error)
+
+    def _defer(self, outbox, entries):
+        try:
+            outbox.enqueue_many([data_node_value for data_node_value, future in entries])
+        except Exception as e:
+            self._fail(entries, e)
+            return
+        for data_node_value, future in entries:
+            future.set_result(None)
+
+    def _track(self, future):
+        with self._condition:
+            self._in_flight.add(future)
+        future.add_done_callback(self._untrack)
+
+    def _untrack(self, future):
+        with self._condition:
+            self._in_flight.discard(future)
@@ -0,0 +1,85 @@
+import math
+from array import array
+
+from remoteclick.datanode_value import DataNodeValue, ns_to_datetime, timestamp_to_ns
+from remoteclick.value_type import ValueType
+
+_MISSING_ID = -1
+_MISSING_BOOLEAN = -1
+_MISSING_STRING = -1
+
+
+class ValueSeries:
+    def __init__(self, value_type=ValueType.NUMBER, data_node=None):
+        if value_type not in (ValueType.NUMBER, ValueType.BOOLEAN, ValueType.STRING):
+            raise ValueError("unsupported value type: {0}".format(value_type))
+        self.value_type = value_type
+        self.data_node = data_node
+        self.ids = array('q')
+        self.timestamps = array('q')
+        if value_type == ValueType.NUMBER:
+            self.values = array('d')
+        elif value_type == ValueType.BOOLEAN:
+            self.values = array('b')
+        else:
+            self.values = array('i')
+        self.strings = []
+        self._string_index = {}
+
+    def for_data_node(data_node):
+        return ValueSeries(data_node.value_type or ValueType.NUMBER, data_node=data_node)
+
+    def append(self, value, timestamp, value_id=None):
+        self.ids.append(_MISSING_ID if value_id is None else value_id)
+        self.timestamps.append(timestamp if isinstance(timestamp, int) else timestamp_to_ns(timestamp))
+        self.values.append(self._encode(value))
+
+    def append_raw(self, raw_value):
+        self.append(raw_value.get("value"), raw_value["timestamp"], raw_value.get("id"))
+
+    def extend_raw(self, raw_values):
+        for raw_value in raw_values:
+            self.append_raw(raw_value)
+
+    def value_at(self, index):
+        return self._decode(self.values[index])
+
+    def datetime_at(self, index):
+        return ns_to_datetime(self.timestamps[index])
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in (self.ids, self.timestamps, self.values))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        data_node_value = DataNodeValue(value=self.value_at(index), timestamp=self.datetime_at(index).isoformat(),
+                                        data_node=self.data_node)
+        if self.ids[index] != _MISSING_ID:
+            data_node_value.id = self.ids[index]
+        return data_node_value
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def _encode(self, value):
+        if self.value_type == ValueType.NUMBER:
+            return float('nan') if value is None else float(value)
+        if self.value_type == ValueType.BOOLEAN:
+            return _MISSING_BOOLEAN if value is None else int(bool(value))
+        if value is None:
+            return _MISSING_STRING
+        index = self._string_index.get(value)
+        if index is None:
+            index = self._string_index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def _decode(self, value):
+        if self.value_type == ValueType.NUMBER:
+            return None if math.isnan(value) else value
+        if self.value_type == ValueType.BOOLEAN:
+            return None if value == _MISSING_BOOLEAN else bool(value)
+        return None if value == _MISSING_STRING else self.strings[value]
@@ -1,11 +1,16 @@
+import re
 from setuptools import setup, find_packages
 from os import path
 
 here = path.abspath(path.dirname(__file__))
 
+# the version is defined once, in the package, which does not have to be importable here
+with open(path.join(here, 'remoteclick', '__init__.py')) as f:
+    version = re.search(r"^__version__ = '([^']+)'", f.read(), re.M).group(1)
+
 setup(
     name='remoteclick',
-    version='0.1.2',
+    version=version,
     description='Remoteclick REST API Client.',
     author='www.remoteclick.ch',
     author_email='info@remoteclick.ch',
@@ -14,10 +19,23 @@ setup(
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.6'
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12'
     ],
     keywords='remoteclick.ch remoteclick rest api client',
-    packages=find_packages(exclude=['test', 'examples']),
+    packages=find_packages(exclude=['test', 'examples', 'benchmarks', 'benchmarks.*']),
+    python_requires='>=3.8',
     install_requires=['requests'],
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson'],
+        'numpy': ['numpy'],
+        'pandas': ['numpy', 'pandas'],
+        'yaml': ['PyYAML'],
+        'opentelemetry': ['opentelemetry-api'],
+    },
 )
@@ -0,0 +1,118 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from remoteclick.aggregation import AggregationPolicy, Aggregator, RingBuffer
+from remoteclick.datanode import DataNode
+from remoteclick.mock_server import MockServerTestCase
+from remoteclick.outbox import OutboxDrainer
+
+
+def make_data_node(data_node_id, name="Temperature"):
+    data_node = DataNode(name=name, path="Plant")
+    data_node.id = data_node_id
+    return data_node
+
+
+class TestAggregation(TestCase):
+    def setUp(self):
+        self.aggregator = Aggregator()
+        self.temperature = make_data_node(1)
+
+    def add(self, value, second):
+        return self.aggregator.add(self.temperature.new_value(value, "2024-05-01T12:00:{0:06.3f}+00:00".format(second)))
+
+    def test_ring_buffer(self):
+        samples = RingBuffer(3)
+        for timestamp in range(5):
+            samples.append(timestamp, timestamp * 10.0)
+        self.assertEqual(len(samples), 3)
+        self.assertEqual(samples.overwritten, 2)
+        self.assertEqual(samples.statistics(0, 10), {'min': 20.0, 'max': 40.0, 'mean': 30.0, 'sum': 90.0,
+                                                     'count': 3, 'first': 20.0, 'last': 40.0})
+        samples.drop_before(4)
+        self.assertEqual(samples.oldest(), 4)
+
+    def test_tumbling_window(self):
+        self.aggregator.set_policy(self.temperature, AggregationPolicy(window=1.0))
+        emitted = []
+        for index, value in enumerate([1, 2, 3, 4, 5, 6]):
+            emitted.extend(self.add(value, index * 0.25))
+        self.assertEqual(len(emitted), 1)
+        self.assertEqual(emitted[0].value, 2.5)
+        self.assertIs(emitted[0].data_node, self.temperature)
+        self.assertEqual(emitted[0].timestamp, "2024-05-01T12:00:01+00:00")
+        self.assertEqual([aggregate.value for aggregate in self.aggregator.flush()], [5.5])
+        # values older than the open window cannot change what was already sent
+        self.add(7, 3.0)
+        self.add(8, 0.5)
+        self.assertEqual(self.aggregator.late, 1)
+
+    def test_sliding_window_per_statistic(self):
+        targets = {name: make_data_node(index + 2, name) for index, name in enumerate(["min", "max", "last"])}
+        self.aggregator.set_policy(self.temperature, AggregationPolicy(window=2.0, step=1.0, statistics=targets))
+        emitted = []
+        for second, value in enumerate([4, 1, 9, 2]):
+            emitted.append(self.add(value, second))
+        self.assertEqual(emitted[0], [])
+        self.assertEqual({aggregate.data_node.name: aggregate.value for aggregate in emitted[2]},
+                         {'min': 1.0, 'max': 4.0, 'last': 1.0})
+        self.assertEqual({aggregate.data_node.name: aggregate.value for aggregate in emitted[3]},
+                         {'min': 1.0, 'max': 9.0, 'last': 9.0})
+
+    def test_invalid_policies(self):
+        with self.assertRaises(ValueError):
+            AggregationPolicy(window=1.0, statistics="median")
+        with self.assertRaises(ValueError):
+            self.aggregator.set_policy(self.temperature, AggregationPolicy(window=1.0, keep_raw=True))
+
+
+class TestClientAggregation(MockServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw_id = self.server.add_data_node("Temperature", "Plant")
+        self.mean_id = self.server.add_data_node("TemperatureMean", "Plant")
+        self.temperature = self.client.get_data_node_by_id(self.raw_id)
+        self.mean = self.client.get_data_node_by_id(self.mean_id)
+
+    def test_only_aggregates_are_saved(self):
+        self.client.set_aggregation_policy(self.temperature, AggregationPolicy(window=1.0))
+        for index in range(40):
+            second = index * 0.1
+            value = self.temperature.new_value(index, "2024-05-01T12:00:{0:06.3f}+00:00".format(second))
+            self.assertIsNone(self.client.save_data_node_value(value))
+        self.assertEqual([value["value"] for value in self.server.values[self.raw_id]], [4.5, 14.5, 24.5])
+        self.client.flush_aggregates()
+        self.assertEqual(self.server.values[self.raw_id][-1]["value"], 34.5)
+
+    def test_raw_values_are_kept_in_outbox(self):
+        self.client.enable_outbox(os.path.join(tempfile.mkdtemp(), "outbox.db"))
+        self.client.set_aggregation_policy(self.temperature, AggregationPolicy(window=1.0, target=self.mean,
+                                                                               keep_raw=True))
+        with self.client.buffered(max_size=10, max_age=0.05) as buffer:
+            for index in range(15):
+                buffer.add(self.temperature.new_value(index, "2024-05-01T12:00:{0:06.3f}+00:00".format(index * 0.1)))
+        self.assertTrue(self.client._outbox_drainer.drain())
+        self.assertEqual(len(self.server.values[self.raw_id]), 15)
+        self.assertEqual([value["value"] for value in self.server.values[self.mean_id]], [4.5])
+        self.assertEqual(self.client.aggregation.stats()['emitted'], 1)
+
+    def test_raw_values_do_not_hold_back_other_data_nodes(self):
+        pressure_id = self.server.add_data_node("Pressure", "Plant")
+        pressure = self.client.get_data_node_by_id(pressure_id)
+        self.client.enable_outbox(os.path.join(tempfile.mkdtemp(), "outbox.db"))
+        self.client._outbox_drainer.stop()
+        self.client.set_aggregation_policy(self.temperature, AggregationPolicy(window=1.0, target=self.mean,
+                                                                               keep_raw=True))
+        for index in range(15):
+            self.client.save_data_node_value(
+                self.temperature.new_value(index, "2024-05-01T12:00:{0:06.3f}+00:00".format(index * 0.1)))
+        self.assertEqual(len(self.client.outbox), 15)
+        # aggregates and values of other data nodes are sent right away while the raw values wait in the outbox
+        self.assertEqual([value["value"] for value in self.server.values[self.mean_id]], [4.5])
+        self.assertEqual(self.client.save_data_node_value(pressure.new_value(1.5)).value, 1.5)
+        with self.client.buffered(max_size=10, max_age=0.05) as buffer:
+            self.assertEqual(buffer.add(pressure.new_value(2.5)).result(timeout=5).value, 2.5)
+        self.assertEqual(len(self.client.outbox), 15)
+        self.assertTrue(OutboxDrainer(self.client, self.client.outbox).drain())
+        self.assertEqual(len(self.server.values[self.raw_id]), 15)
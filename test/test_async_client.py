@@ -0,0 +1,163 @@
+import asyncio
+import socket
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from remoteclick.async_client import AsyncRemoteClickClient
+from remoteclick.datanode import DataNode
+from remoteclick.exceptions import (AuthenticationError, ClientError, NotFoundError, ServerError, ThrottlingError,
+                                    TransportError)
+from remoteclick.mock_server import MockRemoteClickServer
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestAsyncClient(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = MockRemoteClickServer(streaming=False).start()
+        self.data_node_id = self.server.add_data_node("Temperature", "Plant")
+
+    async def asyncSetUp(self):
+        self.client = self.server.client(AsyncRemoteClickClient, backoff_factor=0.01, timeout=0.5)
+        await self.client.connect()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    def tearDown(self):
+        self.server.stop()
+
+    async def test_connect(self):
+        self.assertTrue(self.client.is_connected())
+        self.assertEqual(self.client.name, "mock device")
+        self.assertTrue(self.client.token.startswith("Bearer "))
+
+        self.server.add_device("device", "secret")
+        client = self.server.client(AsyncRemoteClickClient, password="wrong")
+        try:
+            with self.assertRaises(ConnectionError):
+                await client.connect()
+            self.assertFalse(client.is_connected())
+        finally:
+            await client.close()
+
+    async def test_data_nodes(self):
+        pressure = await self.client.save_data_node(DataNode(name="Pressure", path="Plant", unit="bar"))
+        self.assertIsInstance(pressure.id, int)
+        # data nodes are not saved twice
+        duplicate = await self.client.save_data_node(DataNode(name="Pressure", path="Plant"))
+        self.assertEqual(duplicate.id, pressure.id)
+        self.assertEqual(self.server.request_count("POST", "/datanodes"), 1)
+
+        pressure.unit = "Pa"
+        updated = await self.client.update_data_node(pressure)
+        self.assertEqual(updated.unit, "Pa")
+        self.assertEqual(self.server.data_nodes[pressure.id]['unit'], "Pa")
+        self.assertEqual((await self.client.get_data_node_by_name("Plant", "Pressure")).id, pressure.id)
+        self.assertEqual([data_node.name for data_node in await self.client.get_data_nodes()],
+                         ["Temperature", "Pressure"])
+
+        self.assertTrue(await self.client.delete_data_node(pressure))
+        self.assertNotIn(pressure.id, self.server.data_nodes)
+        self.assertIsNone(await self.client.get_data_node_by_name("Plant", "Pressure"))
+
+    async def test_values(self):
+        temperature = await self.client.get_data_node_by_id(self.data_node_id)
+        saved = await self.client.save_data_node_values([temperature.new_value(float(value)) for value in range(5)])
+        self.assertEqual([value.value for value in saved], [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(len({value.id for value in saved}), 5)
+
+        # the values are posted concurrently, in no particular order
+        values = await self.client.get_data_node_values(temperature, limit=10)
+        self.assertEqual(sorted(value.id for value in values), sorted(value.id for value in saved))
+        current = await self.client.get_current_data_node_value(temperature)
+        self.assertEqual(current.value, values[0].value)
+        current.data_node = temperature
+        current.value = 40.0
+        self.assertEqual((await self.client.update_data_node_value(current)).value, 40.0)
+        self.assertEqual(self.server.values[self.data_node_id][-1]['value'], 40.0)
+
+    async def test_paging(self):
+        for index in range(11):
+            self.server.add_data_node("Node{0}".format(index), "Plant/Paging")
+        names = [data_node.name async for data_node in self.client.iter_data_nodes(page_size=4)]
+        self.assertEqual(names, ["Temperature"] + ["Node{0}".format(index) for index in range(11)])
+        self.assertEqual(self.server.request_count("GET", "/datanodes"), 4)
+        self.server.max_page_size = 5
+        self.assertEqual(len([data_node async for data_node in self.client.iter_data_nodes(page_size=50)]), 12)
+
+        for minute in range(20):
+            self.server.add_value(self.data_node_id, float(minute), "2024-05-01T12:{0:02d}:00+00:00".format(minute))
+        temperature = await self.client.get_data_node_by_id(self.data_node_id)
+        values = [value.value async for value in self.client.iter_data_node_values(
+            temperature, since="2024-05-01T12:05:00Z", until="2024-05-01T12:14:00Z", page_size=3)]
+        self.assertEqual(values, [float(minute) for minute in range(14, 4, -1)])
+
+    async def test_concurrency(self):
+        client = self.server.client(AsyncRemoteClickClient, max_concurrency=2)
+        try:
+            await client.connect()
+            temperature = await client.get_data_node_by_id(self.data_node_id)
+            self.server.latency = 0.2
+            start = time.monotonic()
+            await asyncio.gather(*[client.get_data_node_values(temperature) for _ in range(6)])
+            # no more than two requests are in flight at once
+            self.assertGreaterEqual(time.monotonic() - start, 0.6)
+        finally:
+            await client.close()
+
+    async def test_errors(self):
+        self.client.max_retries = 0
+        with self.assertRaises(NotFoundError):
+            await self.client.get_data_node_by_id(self.data_node_id + 100)
+        temperature = await self.client.get_data_node_by_id(self.data_node_id)
+        for status, error_class in ((400, ClientError), (429, ThrottlingError), (500, ServerError),
+                                    (503, ServerError)):
+            self.server.fail_next(1, status)
+            with self.assertRaises(error_class) as context:
+                await self.client.get_data_node_values(temperature)
+            self.assertEqual(context.exception.status_code, status)
+        self.server.revoke_tokens()
+        with self.assertRaises(AuthenticationError):
+            await self.client.get_data_node_values(temperature)
+
+    async def test_retries(self):
+        temperature = await self.client.get_data_node_by_id(self.data_node_id)
+        self.server.fail_next(2, 503)
+        self.assertEqual(await self.client.get_data_node_values(temperature), [])
+        self.assertEqual(self.server.request_count("GET", "/values"), 3)
+        # values are not posted twice, unless the api throttled the request
+        self.server.fail_next(1, 503)
+        with self.assertRaises(ServerError):
+            await self.client.save_data_node_value(temperature.new_value(1.0))
+        self.server.fail_next(1, 429)
+        self.assertEqual((await self.client.save_data_node_value(temperature.new_value(2.0))).value, 2.0)
+        self.assertEqual(self.server.request_count("POST", "/values"), 3)
+
+    async def test_transport_errors(self):
+        temperature = await self.client.get_data_node_by_id(self.data_node_id)
+        self.server.latency = 1.0
+        # timed out requests are repeated if they are idempotent
+        with self.assertRaises(TransportError):
+            await self.client.get_data_node_values(temperature)
+        self.assertEqual(self.server.request_count("GET", "/values"), 4)
+        with self.assertRaises(TransportError):
+            await self.client.save_data_node_value(temperature.new_value(1.0))
+        self.assertEqual(self.server.request_count("POST", "/values"), 1)
+
+    async def test_connection_refused(self):
+        client = AsyncRemoteClickClient(max_retries=2, backoff_factor=0.01)
+        client.set_base_url("http://127.0.0.1:{0}/api/".format(unused_port()))
+        try:
+            # nothing was sent, so even the token request is repeated
+            with self.assertLogs("AsyncRemoteclickClient", "DEBUG") as logs, \
+                    self.assertRaises(TransportError) as context:
+                await client.connect()
+            self.assertIsInstance(context.exception, ConnectionError)
+            self.assertEqual(len([line for line in logs.output if "retrying" in line]), 2)
+        finally:
+            await client.close()
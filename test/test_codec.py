@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from remoteclick.codec import CODECS, JsonCodec, get_codec, orjson
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue
+
+
+class TestCodec(TestCase):
+    def test_round_trip(self):
+        payload = {'values': [{'id': 1, 'value': 21.5, 'timestamp': "2019-01-01T00:00:00+00:00"},
+                              {'id': 2, 'value': "über", 'timestamp': "2019-01-01T00:01:00+00:00"}]}
+        for name in CODECS:
+            try:
+                codec = get_codec(name)
+            except ImportError:
+                continue
+            encoded = codec.encode(payload)
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(codec.decode(encoded), payload)
+            self.assertEqual(JsonCodec().decode(encoded), payload)
+
+    def test_default_codec(self):
+        if orjson is not None:
+            self.assertEqual(get_codec().name, "orjson")
+        codec = JsonCodec()
+        self.assertIs(get_codec(codec), codec)
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
+
+    def test_models(self):
+        data_node = DataNode(name="Temperature", path="Plant", unit="°C")
+        self.assertEqual(data_node.to_dict(), {'name': "Temperature", 'value_type': "number", 'unit': "°C",
+                                               'keep_history': True, 'path': "Plant", 'read_only': True})
+        values = DataNodeValue.from_list([{'id': 1, 'value': 3, 'timestamp': "2019-01-01T00:00:00+00:00"}], data_node)
+        self.assertEqual((values[0].id, values[0].value, values[0].data_node), (1, 3, data_node))
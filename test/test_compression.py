@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from remoteclick.compression import compress, decompress
+from remoteclick.mock_server import MockServerTestCase
+
+
+class TestCompression(MockServerTestCase):
+    def setUp(self):
+        self.server = self.start_server()
+        self.data_node_id = self.server.add_data_node("Temperature", "Plant", read_only=False)
+
+    def connect(self, **kwargs):
+        client = self.connect_client(**kwargs)
+        return client, client.get_data_node_by_id(self.data_node_id)
+
+    def test_round_trip(self):
+        data = b'{"value": 21.5}' * 100
+        for encoding in ("gzip", "deflate"):
+            self.assertEqual(decompress(compress(data, encoding), encoding), data)
+        self.assertEqual(decompress(data, None), data)
+        with self.assertRaises(ValueError):
+            compress(data, "br")
+
+    def test_compressed_bulk(self):
+        for round, transport in enumerate(("requests", "http.client"), 1):
+            client, data_node = self.connect(compression="gzip", compression_threshold=256, transport=transport)
+            values = [data_node.new_value(float(index)) for index in range(200)]
+            saved = client.save_data_node_values(values)
+            self.assertEqual([value.value for value in saved], [float(index) for index in range(200)])
+            self.assertTrue(client.compression_supported)
+
+            traffic = client.traffic.get("save_data_node_values")
+            self.assertLess(traffic['sent_bytes'] * 3, traffic['sent_uncompressed_bytes'])
+            # the echoed values are large enough for the mock api to gzip them
+            self.assertLess(traffic['received_bytes'], traffic['received_decoded_bytes'])
+            self.assertEqual(len(client.get_data_node_values(data_node, limit=500)), 200 * round)
+
+    def test_fallback_when_not_supported(self):
+        self.server.compression = False
+        client, data_node = self.connect(compression="deflate", compression_threshold=0)
+        client.save_data_node_value(data_node.new_value(1.0))
+        client.save_data_node_value(data_node.new_value(2.0))
+        self.assertIs(client.compression_supported, False)
+        self.assertEqual([value['value'] for value in self.server.values[self.data_node_id]], [1.0, 2.0])
+        self.assertEqual(self.server.request_count("POST", "/values"), 3)
+
+    def test_minimal_responses(self):
+        client, data_node = self.connect(minimal_responses=True)
+        data_node_value = data_node.new_value(21.5)
+        self.assertIs(client.save_data_node_value(data_node_value), data_node_value)
+        self.assertEqual(client.save_data_node_values([data_node.new_value(1.0), data_node.new_value(2.0)])[1].value,
+                         2.0)
+        data_node.unit = "°C"
+        self.assertIs(client.update_data_node(data_node), data_node)
+        self.assertEqual(self.server.data_nodes[self.data_node_id]['unit'], "°C")
+        self.assertEqual(client.traffic.get("save_data_node_value")['received_bytes'], 0)
+        self.assertEqual(len(self.server.values[self.data_node_id]), 3)
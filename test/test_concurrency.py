@@ -0,0 +1,74 @@
+import threading
+
+from remoteclick.datanode import DataNode
+from remoteclick.mock_server import MockServerTestCase
+from remoteclick.registry import DataNodeRegistry
+
+
+class TestConcurrency(MockServerTestCase):
+    client_options = {'pool_size': 8, 'registry_ttl': 0.01}
+
+    def setUp(self):
+        super().setUp()
+        self.data_node_ids = [self.server.add_data_node("Sensor{0}".format(index), "Plant/Line{0}".format(index % 4))
+                              for index in range(16)]
+
+    def test_shared_client(self):
+        errors = []
+
+        def produce(index):
+            try:
+                data_node = self.client.get_data_node_by_name("Plant/Line{0}".format(index % 4),
+                                                              "Sensor{0}".format(index))
+                for value in range(25):
+                    self.client.save_data_node_value(data_node.new_value(float(value)))
+                    self.client.get_data_nodes_by_prefix("Plant")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=produce, args=(index,)) for index in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual([len(self.server.values[data_node_id]) for data_node_id in self.data_node_ids], [25] * 16)
+        self.assertEqual(self.server.request_count("POST", "/token"), 1)
+
+    def test_submit(self):
+        data_node = self.client.get_data_node_by_name("Plant/Line0", "Sensor0")
+        futures = [self.client.submit(self.client.save_data_node_value, data_node.new_value(float(value)))
+                   for value in range(20)]
+        saved = sorted(future.result().value for future in futures)
+        self.assertEqual(saved, [float(value) for value in range(20)])
+        self.assertEqual(len(self.client.submit("get_data_node_values", data_node, limit=100).result()), 20)
+
+    def test_registry_copy_on_write(self):
+        registry = DataNodeRegistry()
+        stopped = threading.Event()
+        errors = []
+
+        def read():
+            while not stopped.is_set():
+                try:
+                    for data_node in registry.get_by_prefix("Plant/Line1"):
+                        self.assertEqual(data_node.path, "Plant/Line1")
+                    list(registry)
+                except Exception as e:
+                    errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for index in range(2000):
+            data_node = DataNode(name="Node{0}".format(index % 50), path="Plant/Line{0}".format(index % 5))
+            data_node.id = index % 50
+            if index % 3:
+                registry.add(data_node)
+            else:
+                registry.remove(data_node)
+        stopped.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(registry.get_by_prefix("")), len(registry))
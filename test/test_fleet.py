@@ -0,0 +1,52 @@
+import time
+from unittest import TestCase
+
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue
+from remoteclick.fleet import FleetClient
+from remoteclick.mock_server import MockRemoteClickServer
+from remoteclick.ratelimit import TokenBucket
+
+
+class TestFleetClient(TestCase):
+    def setUp(self):
+        self.server = MockRemoteClickServer(streaming=False).start()
+        self.fleet = FleetClient(self.server.base_url, max_concurrency=8, max_workers=4, auth_rate=1000)
+        for index in range(20):
+            self.server.add_device("device{0}".format(index), "secret")
+            self.fleet.add_device("device{0}".format(index), "secret")
+
+    def tearDown(self):
+        self.fleet.close()
+        self.server.stop()
+
+    def test_failures_are_isolated(self):
+        self.fleet.add_device("intruder", "wrong")
+        result = self.fleet.connect()
+        self.assertEqual(len(result.results), 20)
+        self.assertEqual(list(result.errors), ["intruder"])
+        self.assertFalse(self.fleet["intruder"].is_connected())
+        self.assertEqual(len({self.fleet[name].token for name in result.results}), 20)
+
+    def test_save_values_shares_connections(self):
+        self.fleet.connect()
+        data_node_id = self.server.add_data_node("Temperature", "Plant")
+        data_node = DataNode.from_dict(self.server.data_nodes[data_node_id])
+        readings = {name: [DataNodeValue(value=index, data_node=data_node) for index in range(5)]
+                    for name in self.fleet}
+        readings["unknown"] = []
+        result = self.fleet.save_values(readings)
+        self.assertEqual(len(result.results), 20)
+        self.assertIsInstance(result.errors["unknown"], KeyError)
+        self.assertEqual(len(self.server.values[data_node_id]), 100)
+        self.assertLessEqual(self.fleet.connection_stats()['connections_opened'], 12)
+
+    def test_authentication_is_rate_limited(self):
+        limiter = TokenBucket(50, burst=1)
+        for name in self.fleet:
+            self.fleet[name].auth_limiter = limiter
+        start = time.monotonic()
+        result = self.fleet.connect()
+        self.assertTrue(result.is_successful())
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertEqual(self.server.request_count("POST", "/oauth/device/token"), 20)
@@ -0,0 +1,103 @@
+import os
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from remoteclick.datanode_value import timestamp_to_ns
+from remoteclick.history import parse_iso_timestamps
+from remoteclick.mock_server import MockServerTestCase
+from remoteclick.value_type import ValueType
+
+
+def as_ns(timestamps):
+    return [int(timestamp) for timestamp in parse_iso_timestamps(timestamps).astype(np.int64)]
+
+
+class LocalTimeTestCase(TestCase):
+    def setUp(self):
+        self.tz = os.environ.get('TZ')
+        # naive timestamps are local time, in a zone with daylight saving time and a non-zero offset
+        os.environ['TZ'] = "Europe/Berlin"
+        time.tzset()
+        super().setUp()
+
+    def tearDown(self):
+        if self.tz is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = self.tz
+        time.tzset()
+        super().tearDown()
+
+
+class TestParseIsoTimestamps(LocalTimeTestCase):
+    def test_offsets(self):
+        timestamps = ["2024-05-01T12:00:00Z", "2024-05-01T12:00:00+00:00", "2024-05-01T14:30:00+02:30",
+                      "2024-05-01T06:15:00-05:45"]
+        self.assertEqual(as_ns(timestamps), [timestamp_to_ns("2024-05-01T12:00:00+00:00")] * 2
+                         + [timestamp_to_ns("2024-05-01T12:00:00+00:00")] * 2)
+
+    def test_fractional_seconds(self):
+        timestamps = ["2024-05-01T12:00:00.5Z", "2024-05-01T12:00:00.123456+01:00", "2024-05-01T12:00:00.000001"]
+        self.assertEqual(as_ns(timestamps), [timestamp_to_ns(timestamp) for timestamp in timestamps])
+        self.assertEqual(as_ns(["2024-05-01T12:00:00.123456789Z"]),
+                         [timestamp_to_ns("2024-05-01T12:00:00Z") + 123456789])
+
+    def test_naive(self):
+        # winter and summer time, and both sides of the switch to summer time
+        timestamps = ["2024-01-15T12:00:00", "2024-07-15T12:00:00", "2024-03-31T01:59:00", "2024-03-31T03:00:00",
+                      "2024-07-15T12:00:00Z"]
+        self.assertEqual(as_ns(timestamps), [timestamp_to_ns(timestamp) for timestamp in timestamps])
+        self.assertEqual(as_ns(timestamps[:2]), [timestamp_to_ns("2024-01-15T11:00:00Z"),
+                                                 timestamp_to_ns("2024-07-15T10:00:00Z")])
+
+    def test_empty(self):
+        self.assertEqual(len(parse_iso_timestamps([])), 0)
+
+
+class TestFetchHistory(LocalTimeTestCase, MockServerTestCase):
+    def test_fetch_history(self):
+        data_node_id = self.server.add_data_node("Temperature", "Plant")
+        for minute in range(30):
+            self.server.add_value(data_node_id, float(minute), "2024-05-01T12:{0:02d}:00+00:00".format(minute))
+        self.server.add_value(data_node_id, 30.0, "2024-05-01T12:30:00Z")
+        self.server.add_value(data_node_id, 31.0, "2024-05-01T14:31:00+02:00")
+        temperature = self.client.get_data_node_by_id(data_node_id)
+        # a server may return fewer values per page than requested
+        self.server.max_page_size = 5
+        self.assertEqual(len(self.client.fetch_history(temperature, page_size=1000)), 32)
+
+        history = self.client.fetch_history(temperature, since="2024-05-01T12:10:00Z", until="2024-05-01T12:31:00Z",
+                                            page_size=7)
+        self.assertEqual(list(history['value']), [float(minute) for minute in range(10, 32)])
+        self.assertEqual(history['timestamp'][0], np.datetime64("2024-05-01T12:10:00", 'ns'))
+        self.assertEqual(history['timestamp'][-1], np.datetime64("2024-05-01T12:31:00", 'ns'))
+
+    def test_naive_timestamps(self):
+        data_node_id = self.server.add_data_node("Temperature", "Plant")
+        timestamps = ["2024-01-15T12:00:00", "2024-07-15T12:00:00"]
+        for value, timestamp in enumerate(timestamps):
+            self.server.add_value(data_node_id, float(value), timestamp)
+        temperature = self.client.get_data_node_by_id(data_node_id)
+
+        history = self.client.fetch_history(temperature)
+        self.assertEqual([int(timestamp) for timestamp in history['timestamp'].astype(np.int64)],
+                         [timestamp_to_ns(timestamp) for timestamp in timestamps])
+        since = self.client.fetch_history(temperature, since=timestamps[1])
+        self.assertEqual(list(since['value']), [1.0])
+
+    def test_as_frame(self):
+        data_node_id = self.server.add_data_node("Running", "Plant", value_type=ValueType.BOOLEAN)
+        self.server.add_value(data_node_id, True, "2024-05-01T12:00:00Z")
+        self.server.add_value(data_node_id, None, "2024-05-01T12:01:00Z")
+        self.server.add_value(data_node_id, False, "2024-05-01T14:02:00+02:00")
+        running = self.client.get_data_node_by_id(data_node_id)
+
+        frame = self.client.fetch_history(running, as_frame=True)
+        self.assertEqual(str(frame.index.tz), "UTC")
+        self.assertEqual([timestamp.isoformat() for timestamp in frame.index],
+                         ["2024-05-01T12:00:00+00:00", "2024-05-01T12:01:00+00:00", "2024-05-01T12:02:00+00:00"])
+        self.assertEqual(frame['value'].tolist()[0], True)
+        self.assertTrue(frame['value'].isna().tolist()[1])
+        self.assertEqual(frame['value'].tolist()[2], False)
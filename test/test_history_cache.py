@@ -0,0 +1,56 @@
+import datetime
+
+from remoteclick.mock_server import MockServerTestCase
+
+
+def timestamp(minutes_ago):
+    moment = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=minutes_ago)
+    return moment.replace(microsecond=0).isoformat()
+
+
+class TestHistoryCache(MockServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data_node_id = self.server.add_data_node("Temperature", "Plant")
+        for minutes_ago in range(300, 0, -1):
+            self.server.add_value(self.data_node_id, float(minutes_ago), timestamp(minutes_ago))
+        self.temperature = self.client.get_data_node_by_id(self.data_node_id)
+
+    def test_incremental_sync(self):
+        cache = self.client.enable_history_cache(page_size=100)
+        values = self.client.get_data_node_values(self.temperature, limit=10)
+        self.assertEqual([value.value for value in values], [float(minutes) for minutes in range(1, 11)])
+        self.assertEqual(cache.fetched, 300)
+
+        self.server.add_value(self.data_node_id, -1.0, timestamp(0))
+        before = self.server.request_count("GET", "/values")
+        history = list(self.client.iter_data_node_values(self.temperature, since=timestamp(30.5)))
+        self.assertEqual(self.server.request_count("GET", "/values"), before + 1)
+        self.assertEqual(len(history), 31)
+        self.assertEqual(history[0].value, -1.0)
+        self.assertEqual(cache.fetched, 301)
+        self.assertEqual(cache.hits, 2)
+
+    def test_backfilled_values(self):
+        cache = self.client.enable_history_cache()
+        self.assertEqual([value.value for value in self.client.get_data_node_values(self.temperature, limit=2)],
+                         [1.0, 2.0])
+        # stored after the sync, but with a timestamp between two cached values, as outbox replays do
+        self.server.add_value(self.data_node_id, 99.0, timestamp(1.5))
+        values = self.client.get_data_node_values(self.temperature, limit=3)
+        self.assertEqual([value.value for value in values], [99.0, 1.0, 2.0])
+        self.client.disable_history_cache()
+        self.assertEqual([value.value for value in self.client.get_data_node_values(self.temperature, limit=3)],
+                         [99.0, 1.0, 2.0])
+        self.assertEqual(cache.fetched, 301)
+
+    def test_eviction(self):
+        cache = self.client.enable_history_cache(max_age=3600, max_values=50)
+        self.assertEqual(len(self.client.get_data_node_values(self.temperature, limit=50)), 50)
+        self.assertEqual(cache.stats()['data_nodes'], {self.data_node_id: 50})
+        # older values are no longer cached, they are requested from the api
+        self.assertEqual(len(self.client.get_data_node_values(self.temperature, limit=10, offset=45)), 10)
+        self.assertEqual(cache.misses, 1)
+        series = self.client.get_value_series(self.temperature, since=timestamp(40.5))
+        self.assertEqual(len(series), 40)
+        self.assertEqual(cache.misses, 1)
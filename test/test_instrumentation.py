@@ -0,0 +1,53 @@
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue
+from remoteclick.exceptions import RequestError
+from remoteclick.mock_server import MockServerTestCase
+
+
+class TestInstrumentation(MockServerTestCase):
+    client_options = {'backoff_factor': 0}
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(self.client.instrumentation)
+        self.client.get_data_nodes()
+        self.assertIsNone(self.client.metrics)
+
+    def test_hooks_receive_timing(self):
+        started, finished = [], []
+        self.client.add_request_hooks(pre=started.append, post=finished.append)
+        self.client.get_data_nodes()
+        self.assertEqual([info.operation for info in started], ["get_data_nodes"])
+        self.assertEqual(finished[0].status_code, 200)
+        self.assertGreater(finished[0].duration, 0)
+        self.assertGreater(finished[0].response_bytes, 0)
+
+        self.client.remove_request_hooks(pre=started.append, post=finished.append)
+        self.assertIsNone(self.client.instrumentation)
+
+    def test_metrics_per_operation(self):
+        metrics = self.client.enable_metrics()
+        data_node = self.client.save_data_node(DataNode(name="Temperature", path="Plant", read_only=False))
+        for value in range(3):
+            self.client.save_data_node_value(DataNodeValue(value=value, data_node=data_node))
+        self.server.fail_next(1, status=503)
+        self.client.get_data_nodes()
+        self.server.fail_next(1, status=500)
+        with self.assertRaises(RequestError):
+            self.client.get_data_node_values(data_node)
+
+        saves = metrics.get("save_data_node_value")
+        self.assertEqual(saves.requests, 3)
+        self.assertEqual(saves.status_codes, {'201': 3})
+        self.assertEqual(saves.latency.count, 3)
+        self.assertGreater(saves.request_bytes, 0)
+        self.assertEqual(metrics.get("get_data_nodes").retries, 1)
+        self.assertEqual(metrics.get("get_data_node_values").errors, 1)
+
+    def test_prometheus_export(self):
+        metrics = self.client.enable_metrics(buckets=(0.5, 1.0))
+        self.client.get_data_nodes()
+        text = metrics.to_prometheus()
+        self.assertIn('remoteclick_requests_total{operation="get_data_nodes"} 1\n', text)
+        self.assertIn('remoteclick_responses_total{operation="get_data_nodes",status="200"} 1\n', text)
+        self.assertIn('remoteclick_request_duration_seconds_bucket{operation="get_data_nodes",le="+Inf"} 1\n', text)
+        self.assertIn("# TYPE remoteclick_request_duration_seconds histogram\n", text)
@@ -0,0 +1,58 @@
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue
+from remoteclick.exceptions import RequestError
+from remoteclick.mock_server import MockServerTestCase
+
+
+class TestMockServer(MockServerTestCase):
+    server_options = {'max_page_size': 20, 'streaming': False, 'seed': 1}
+    client_options = {'max_retries': 0}
+
+    def test_data_nodes_and_values(self):
+        data_node = self.client.save_data_node(DataNode(name="Temperature", path="Plant", read_only=False))
+        saved = self.client.save_data_node_value(DataNodeValue(value=21.5, data_node=data_node))
+        self.assertEqual(self.client.get_current_data_node_value(data_node).value, 21.5)
+        self.assertEqual(self.client.get_data_node_by_id(data_node.id).name, "Temperature")
+        self.assertEqual(self.server.values[data_node.id][-1]['id'], saved.id)
+
+    def test_pagination_is_capped(self):
+        for index in range(45):
+            self.server.add_data_node("Node{0}".format(index), "Plant")
+        self.assertEqual(len(self.client.get_data_nodes(limit=50)), 20)
+        self.assertEqual(len(list(self.client.iter_data_nodes(page_size=20))), 45)
+        # pages are not cut short by requesting more than the server returns
+        self.assertEqual(len(self.client.refresh_data_nodes(page_size=50)), 45)
+
+    def test_value_pages_are_capped(self):
+        data_node_id = self.server.add_data_node("Temperature", "Plant")
+        for index in range(300):
+            self.server.add_value(data_node_id, float(index))
+        temperature = self.client.get_data_node_by_id(data_node_id)
+        self.assertEqual(len(list(self.client.iter_data_node_values(temperature, page_size=50))), 300)
+        self.assertEqual(len(self.client.get_value_series(temperature, page_size=500)), 300)
+
+        cache = self.client.enable_history_cache(page_size=1000)
+        values = self.client.get_data_node_values(temperature, limit=300)
+        self.assertEqual([value.value for value in values], [float(index) for index in range(299, -1, -1)])
+        self.assertEqual(cache.fetched, 300)
+        for index in range(300, 330):
+            self.server.add_value(data_node_id, float(index))
+        self.assertEqual(len(self.client.get_data_node_values(temperature, limit=500)), 330)
+        self.assertEqual(cache.misses, 0)
+
+    def test_bulk_values(self):
+        data_node = self.client.save_data_node(DataNode(name="Pressure", path="Plant", read_only=False))
+        self.client.save_data_node_values([DataNodeValue(value=index, data_node=data_node) for index in range(10)])
+        self.assertEqual(len(self.server.values[data_node.id]), 10)
+        self.assertEqual(self.server.request_count("POST", "/values/bulk"), 1)
+
+    def test_error_injection(self):
+        self.server.fail_next(1, status=500)
+        with self.assertRaises(RequestError):
+            self.client.get_data_nodes()
+        self.assertEqual(self.client.get_data_nodes(), [])
+
+    def test_revoked_tokens_are_renewed(self):
+        self.server.revoke_tokens()
+        self.assertEqual(self.client.get_data_nodes(), [])
+        self.assertEqual(self.server.request_count("POST", "/oauth/device/token"), 2)
@@ -0,0 +1,68 @@
+import json
+import os
+import shutil
+import tempfile
+
+from remoteclick.mock_server import MockRemoteClickServer, MockServerTestCase
+
+
+class RejectingServer(MockRemoteClickServer):
+    # rejects requests which save one of the given values, as the api does with invalid values
+    def __init__(self, rejected_values, **kwargs):
+        super().__init__(**kwargs)
+        self.rejected_values = rejected_values
+
+    def _handle(self, method, path, query, headers, body):
+        if method == "POST" and "/values" in path:
+            raw = json.loads(body)
+            if any(raw_value.get('value') in self.rejected_values for raw_value in
+                   (raw if isinstance(raw, list) else [raw])):
+                return 400, {'error': "invalid value"}, {}
+        return super()._handle(method, path, query, headers, body)
+
+
+class TestOutbox(MockServerTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def connect(self, bulk, rejected_values=()):
+        server = self.start_server(RejectingServer, rejected_values=rejected_values, bulk=bulk)
+        data_node_id = server.add_data_node("Temperature", "Plant")
+        client = self.connect_client(server)
+        client.enable_outbox(os.path.join(self.directory, "outbox{0}.db".format(int(bulk))), retry_interval=60)
+        return server, client, client.get_data_node_by_id(data_node_id)
+
+    def test_replay_after_outage(self):
+        for bulk in (True, False):
+            server, client, data_node = self.connect(bulk)
+            server.fail_next(3)
+            for index in range(20):
+                self.assertIsNone(client.save_data_node_value(data_node.new_value(float(index))))
+            drainer = client._outbox_drainer
+            for _ in range(5):
+                if drainer.drain():
+                    break
+            self.assertEqual(len(client.outbox), 0)
+            self.assertEqual((drainer.sent, drainer.rejected), (20, 0))
+            # values arrive in the order they were saved, also when they are posted one by one
+            self.assertEqual([value['value'] for value in server.values[data_node.id]],
+                             [float(index) for index in range(20)])
+
+    def test_rejected_values(self):
+        for bulk in (True, False):
+            server, client, data_node = self.connect(bulk, rejected_values=(3.0, 7.0))
+            server.fail_next(1)
+            for index in range(10):
+                self.assertIsNone(client.save_data_node_value(data_node.new_value(float(index))))
+            drainer = client._outbox_drainer
+            with self.assertLogs("RemoteclickOutboxDrainer", "ERROR") as logs:
+                self.assertTrue(drainer.drain())
+            # only the rejected values are dropped, the values after them are replayed
+            self.assertEqual(len(client.outbox), 0)
+            self.assertEqual((drainer.sent, drainer.rejected), (8, 2))
+            self.assertEqual([value['value'] for value in server.values[data_node.id]],
+                             [0.0, 1.0, 2.0, 4.0, 5.0, 6.0, 8.0, 9.0])
+            self.assertEqual(len(logs.output), 2)
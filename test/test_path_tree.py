@@ -0,0 +1,83 @@
+from unittest import TestCase
+
+from remoteclick.datanode import DataNode
+from remoteclick.mock_server import MockServerTestCase
+from remoteclick.registry import DataNodeRegistry
+
+
+def make_data_node(data_node_id, path, name):
+    data_node = DataNode(name=name, path=path)
+    data_node.id = data_node_id
+    return data_node
+
+
+class TestPathTree(TestCase):
+    def setUp(self):
+        self.registry = DataNodeRegistry()
+        self.registry.replace([make_data_node(1, "Plant/Line1", "Motor1"), make_data_node(2, "Plant/Line1", "Motor2"),
+                               make_data_node(3, "Plant/Line1", "Pump"),
+                               make_data_node(4, "Plant/Line2/Cell", "Motor1"), make_data_node(5, "Plant", "Power"),
+                               make_data_node(6, "Office", "Temperature")])
+
+    def ids(self, data_nodes):
+        return sorted(data_node.id for data_node in data_nodes)
+
+    def test_subtree(self):
+        tree = self.registry.get_subtree("Plant")
+        self.assertEqual((tree.path, tree.name, len(tree)), ("Plant", "Plant", 5))
+        self.assertEqual(sorted(tree.children), ["Line1", "Line2"])
+        self.assertEqual(self.ids(tree.data_nodes.values()), [5])
+        self.assertEqual(self.ids(tree.get("Line2/Cell")), [4])
+        self.assertEqual(self.ids(self.registry.get_by_prefix("/Plant/Line1/")), [1, 2, 3])
+        self.assertEqual(len(self.registry.get_by_prefix("")), 6)
+        self.assertIsNone(self.registry.get_subtree("Plant/Line3"))
+
+    def test_match(self):
+        self.assertEqual(self.ids(self.registry.match("Plant/Line1/Motor*")), [1, 2])
+        self.assertEqual(self.ids(self.registry.match("Plant/*/Motor1")), [1])
+        self.assertEqual(self.ids(self.registry.match("Plant/**/Motor1")), [1, 4])
+        self.assertEqual(self.ids(self.registry.match("**/P*")), [3, 5])
+        self.assertEqual(self.ids(self.registry.match("Plant/Line[12]/**")), [1, 2, 3, 4])
+        self.assertEqual(self.registry.match("Plant/Line1"), [])
+
+    def test_copy_on_write(self):
+        before = self.registry.get_subtree("")
+        self.registry.remove(make_data_node(4, "Plant/Line2/Cell", "Motor1"))
+        moved = self.registry.get_by_id(1)
+        moved.path = "Plant/Line3"
+        self.registry.add(moved)
+        after = self.registry.get_subtree("")
+        self.assertEqual(sorted(after.get("Plant").children), ["Line1", "Line3"])
+        self.assertEqual(self.ids(after.get("Plant/Line1")), [2, 3])
+        self.assertEqual(len(after), 5)
+        # a tree handed out earlier is a consistent snapshot
+        self.assertEqual(sorted(before.get("Plant").children), ["Line1", "Line2"])
+        self.assertEqual(self.ids(before.get("Plant/Line1")), [1, 2, 3])
+        self.assertEqual(len(before), 6)
+
+
+class TestSubtreeOperations(MockServerTestCase):
+    client_options = {'pool_size': 4}
+
+    def setUp(self):
+        super().setUp()
+        for line in range(3):
+            for motor in range(20):
+                data_node_id = self.server.add_data_node("Motor{0}".format(motor), "Plant/Line{0}".format(line))
+                self.server.add_value(data_node_id, float(line * 100 + motor))
+
+    def test_current_values(self):
+        values, changed = self.client.get_current_values_by_prefix("Plant/Line1")
+        self.assertEqual(len(changed), 20)
+        self.assertEqual(sorted(value.value for value in values.values()), [100.0 + motor for motor in range(20)])
+        self.assertEqual(len(self.client.get_data_nodes_by_pattern("Plant/*/Motor1?")), 30)
+        self.assertEqual(len(self.client.get_subtree("Plant")), 60)
+
+    def test_delete_subtree(self):
+        with self.assertRaises(ValueError):
+            self.client.delete_subtree("/")
+        deleted = self.client.delete_subtree("Plant/Line2")
+        self.assertEqual(len(deleted), 20)
+        self.assertEqual(len(self.server.data_nodes), 40)
+        self.assertIsNone(self.client.get_subtree("Plant/Line2"))
+        self.assertEqual(sorted(self.client.get_subtree("Plant").children), ["Line0", "Line1"])
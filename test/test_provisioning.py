@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+
+from remoteclick.datanode import DataNode
+from remoteclick.mock_server import MockRemoteClickServer, MockServerTestCase
+from remoteclick.provisioning import load_spec
+from remoteclick.value_type import ValueType
+
+
+def names(data_nodes):
+    return sorted(data_node.full_name() for data_node in data_nodes)
+
+
+class RejectingServer(MockRemoteClickServer):
+    # rejects new data nodes with the given name, the data nodes are still listed
+    def __init__(self, rejected_name, **kwargs):
+        super().__init__(**kwargs)
+        self.rejected_name = rejected_name
+
+    def _handle(self, method, path, query, headers, body):
+        if method == "POST" and path.endswith("/datanodes") and json.loads(body)['name'] == self.rejected_name:
+            return 400, {'error': "invalid data node"}, {}
+        return super()._handle(method, path, query, headers, body)
+
+
+class TestProvisioning(MockServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temperature_id = self.server.add_data_node("Temperature", "Controller", unit="°C", read_only=True)
+        self.pressure_id = self.server.add_data_node("Pressure", "Controller", unit="bar", read_only=True)
+        self.legacy_id = self.server.add_data_node("Legacy", "Controller", read_only=True)
+        self.spec = [
+            DataNode(name="Temperature", path="Controller", unit="°C"),
+            DataNode(name="Pressure", path="Controller", unit="Pa"),
+            DataNode(name="Ventilator", path="Controller", value_type=ValueType.BOOLEAN, unit="", read_only=False),
+        ]
+
+    def test_dry_run(self):
+        report = self.client.sync_data_nodes(self.spec, delete_missing=True, dry_run=True)
+        self.assertTrue(report.dry_run)
+        self.assertEqual(names(report.created), ["Controller/Ventilator"])
+        self.assertEqual(names(report.updated), ["Controller/Pressure"])
+        self.assertEqual(report.updated[0].id, self.pressure_id)
+        self.assertEqual(names(report.deleted), ["Controller/Legacy"])
+        self.assertEqual(names(report.unchanged), ["Controller/Temperature"])
+        self.assertEqual(str(report), "(dry run) 1 created, 1 updated, 1 deleted, 1 unchanged, 0 errors")
+        # nothing is changed
+        self.assertEqual(self.server.request_count("POST", "/datanodes"), 0)
+        self.assertEqual(self.server.request_count("PATCH"), 0)
+        self.assertEqual(self.server.request_count("DELETE"), 0)
+        self.assertEqual(self.server.data_nodes[self.pressure_id]['unit'], "bar")
+        # the spec is not modified by the plan
+        self.assertIsNone(self.spec[1].id)
+
+    def test_sync(self):
+        report = self.client.sync_data_nodes(self.spec)
+        self.assertTrue(report.is_successful())
+        self.assertEqual(names(report.created), ["Controller/Ventilator"])
+        self.assertEqual(names(report.updated), ["Controller/Pressure"])
+        self.assertEqual(report.deleted, [])
+        self.assertEqual(self.server.data_nodes[self.pressure_id]['unit'], "Pa")
+        self.assertIn(self.legacy_id, self.server.data_nodes)
+        ventilator = report.created[0]
+        self.assertEqual(self.server.data_nodes[ventilator.id]['valueType'], ValueType.BOOLEAN)
+        self.assertFalse(self.server.data_nodes[ventilator.id]['readOnly'])
+
+        report = self.client.sync_data_nodes(self.spec, delete_missing=True)
+        self.assertEqual(names(report.unchanged), ["Controller/Pressure", "Controller/Temperature",
+                                                   "Controller/Ventilator"])
+        self.assertEqual(names(report.deleted), ["Controller/Legacy"])
+        self.assertNotIn(self.legacy_id, self.server.data_nodes)
+        self.assertEqual(self.server.request_count("POST", "/datanodes"), 1)
+        self.assertEqual(self.server.request_count("PATCH"), 1)
+
+    def test_errors(self):
+        client = self.connect_client(self.start_server(RejectingServer, rejected_name="Ventilator"))
+        report = client.sync_data_nodes(self.spec + [DataNode(name="Heater", path="Controller")])
+        # the other data nodes are synced anyway
+        self.assertFalse(report.is_successful())
+        self.assertEqual(names(report.created), ["Controller/Heater", "Controller/Pressure", "Controller/Temperature"])
+        self.assertEqual([data_node.full_name() for data_node, error in report.errors], ["Controller/Ventilator"])
+        self.assertEqual(report.errors[0][1].status_code, 400)
+
+    def test_duplicates(self):
+        with self.assertRaises(ValueError):
+            self.client.sync_data_nodes(self.spec + [DataNode(name="Temperature", path="/Controller/")])
+        self.assertEqual(self.server.request_count("POST", "/datanodes"), 0)
+
+    def test_json_spec(self):
+        spec = {'dataNodes': [
+            {'name': "Temperature", 'path': "Controller", 'value_type': "number", 'unit': "°C"},
+            {'name': "Pressure", 'path': "Controller", 'valueType': "number", 'unit': "Pa", 'keepHistory': True,
+             'readOnly': True},
+        ]}
+        fd, path = tempfile.mkstemp(suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(spec, f)
+            data_nodes = load_spec(path)
+            self.assertEqual(names(data_nodes), ["Controller/Pressure", "Controller/Temperature"])
+            self.assertEqual(data_nodes[1].unit, "Pa")
+            self.assertTrue(data_nodes[1].read_only)
+
+            report = self.client.sync_data_nodes(path)
+            self.assertEqual(names(report.updated), ["Controller/Pressure"])
+            self.assertEqual(names(report.unchanged), ["Controller/Temperature"])
+            self.assertEqual(self.server.data_nodes[self.pressure_id]['unit'], "Pa")
+        finally:
+            os.remove(path)
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from remoteclick.datanode import DataNode
+from remoteclick.datanode_value import DataNodeValue
+from remoteclick.exceptions import NotFoundError, ServerError, ThrottlingError
+from remoteclick.mock_server import MockServerTestCase
+from remoteclick.ratelimit import AdaptiveRateLimiter, Backoff, TokenBucket, parse_retry_after
+
+
+class TestRateLimiter(TestCase):
+    def test_token_bucket(self):
+        bucket = TokenBucket(10, burst=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.02)
+        self.assertIsNone(bucket.reserve(timeout=0.05))
+
+    def test_aimd(self):
+        limiter = AdaptiveRateLimiter(10)
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 5)
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 5)
+        for _ in range(10):
+            limiter.on_success()
+        self.assertGreater(limiter.rate, 6)
+        self.assertLessEqual(limiter.rate, 10)
+
+    def test_throttling_pauses(self):
+        limiter = AdaptiveRateLimiter(100)
+        limiter.on_throttle(retry_after=0.5)
+        self.assertGreater(limiter.reserve(), 0.4)
+
+    def test_backoff(self):
+        backoff = Backoff(base=0.1, max_delay=1.0, max_retry_after=10)
+        for attempt in range(10):
+            self.assertLessEqual(backoff.delay(attempt), min(1.0, 0.1 * 2 ** attempt))
+        self.assertEqual(backoff.delay(0, retry_after=3), 3)
+        self.assertIsNone(backoff.delay(0, retry_after=60))
+        self.assertEqual(parse_retry_after("2"), 2.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class TestRetries(MockServerTestCase):
+    client_options = {'backoff_factor': 0.01, 'rate_limit': 100}
+
+    def setUp(self):
+        super().setUp()
+        self.data_node = self.client.save_data_node(DataNode(name="Temperature", path="Plant", read_only=False))
+
+    def test_retry_after_is_honoured(self):
+        self.server.fail_next(1, status=429, headers={'Retry-After': "0.2"})
+        start = time.monotonic()
+        saved = self.client.save_data_node_value(DataNodeValue(value=1, data_node=self.data_node))
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertIsNotNone(saved.id)
+        self.assertEqual(self.client.rate_limiter.throttled, 1)
+
+    def test_typed_errors(self):
+        self.client.max_retries = 0
+        self.client.rate_limiter = None
+        self.server.fail_next(1, status=429, headers={'Retry-After': "7"})
+        with self.assertRaises(ThrottlingError) as context:
+            self.client.get_data_nodes()
+        self.assertEqual((context.exception.status_code, context.exception.retry_after), (429, 7.0))
+        with self.assertRaises(NotFoundError):
+            self.client.get_current_data_node_value(self.data_node)
+
+    def test_only_idempotent_requests_are_retried(self):
+        self.server.fail_next(2, status=503)
+        self.assertEqual(self.client.get_data_nodes()[0].name, "Temperature")
+        self.server.fail_next(1, status=503)
+        with self.assertRaises(ServerError):
+            self.client.save_data_node_value(DataNodeValue(value=1, data_node=self.data_node))
+
+    def test_outbox_drops_rejected_values(self):
+        with tempfile.TemporaryDirectory() as directory:
+            outbox = self.client.enable_outbox(os.path.join(directory, "outbox.db"), retry_interval=60)
+            unknown = DataNode(name="Deleted")
+            unknown.id = 999
+            outbox.enqueue(DataNodeValue(value=1, data_node=unknown))
+            outbox.enqueue(DataNodeValue(value=2, data_node=self.data_node))
+            self.assertTrue(self.client._outbox_drainer.drain())
+            self.assertEqual(self.client._outbox_drainer.rejected, 1)
+            self.assertEqual(len(outbox), 0)
+            self.client.disable_outbox()
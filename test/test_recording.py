@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from benchmarks import replay
+from remoteclick.mock_server import MockRemoteClickServer
+from remoteclick.recording import RecordingTransport, read_recording
+from remoteclick.session import RequestsTransport
+from remoteclick.transport import HttpClientTransport
+
+
+class TestRecording(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "device.rec.gz")
+        self.server = MockRemoteClickServer(streaming=False).start()
+        self.data_node_ids = [self.server.add_data_node("Sensor{0}".format(index), "Plant", read_only=False)
+                              for index in range(3)]
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def record(self, transport):
+        with RecordingTransport(transport, self.path) as recorder:
+            client = self.server.client(transport=recorder, compression="gzip", compression_threshold=512,
+                                        password="secret")
+            client.connect()
+            data_nodes = [client.get_data_node_by_id(data_node_id) for data_node_id in self.data_node_ids]
+            for index in range(5):
+                client.save_data_node_value(data_nodes[index % 3].new_value(float(index)))
+            client.save_data_node_values([data_nodes[0].new_value(float(index)) for index in range(50)])
+            client.get_current_values(data_nodes)
+            client.close()
+        return recorder, list(read_recording(self.path))
+
+    def test_record(self):
+        for transport in (HttpClientTransport(), RequestsTransport()):
+            recorder, requests = self.record(transport)
+            self.assertEqual(len(requests), recorder.recorded)
+            self.assertEqual([request.method for request in requests[:1]], ["POST"])
+            self.assertIsNone(requests[0].body)
+            self.assertNotIn("secret", open(self.path, "rb").read().decode("latin-1"))
+            bulk = [request for request in requests if request.target.endswith("/values/bulk")][0]
+            # compressed on the wire, recorded decoded
+            self.assertLess(bulk.sent, len(bulk.body))
+            self.assertEqual(bulk.status, 201)
+            self.assertEqual(bulk.headers, {'Content-Type': "application/json"})
+            self.assertTrue(all(request.offset >= 0 and request.duration >= 0 for request in requests))
+            self.assertIn("ids=", requests[-1].target)
+
+    def test_replay(self):
+        recorded = [request for request in self.record("http.client")[1] if "/oauth/" not in request.target]
+        report = replay.run(self.path, devices=3, speed=100.0)
+        self.assertEqual(report['requests'], 3 * len(recorded))
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['routes']['POST /api/datanodes/{id}/values']['requests'], 15)
+        self.assertGreater(report['requests_per_sec'], 0)
+        self.assertLessEqual(report['latency_ms']['p50'], report['latency_ms']['p99'])
@@ -0,0 +1,54 @@
+from remoteclick.exceptions import ServerError
+from remoteclick.mock_server import MockServerTestCase
+from remoteclick.reporting import ReportingPolicy
+
+
+class TestReporting(MockServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data_node_id = self.server.add_data_node("Temperature", "Plant")
+        self.data_node = self.client.get_data_node_by_id(self.data_node_id)
+        self.client.set_reporting_policy(self.data_node, ReportingPolicy(min_interval=60))
+
+    def test_policy(self):
+        self.assertEqual(self.client.save_data_node_value(self.data_node.new_value(1.0)).value, 1.0)
+        self.assertIsNone(self.client.save_data_node_value(self.data_node.new_value(2.0)))
+        self.assertEqual(self.client.reporting.stats()['data_nodes'][self.data_node_id],
+                         {'sent': 1, 'suppressed': 1})
+
+    def test_failed_values_are_not_reported(self):
+        value = self.data_node.new_value(21.5)
+        self.server.fail_next(1)
+        with self.assertRaises(ServerError):
+            self.client.save_data_node_value(value)
+        # retrying the same reading is not suppressed as unchanged
+        self.assertEqual(self.client.save_data_node_value(value).value, 21.5)
+
+        self.client.set_reporting_policy(self.data_node, ReportingPolicy(min_interval=60))
+        self.server.fail_next(1)
+        with self.client.buffered(max_size=1, max_age=60) as buffer:
+            with self.assertRaises(ServerError):
+                buffer.add(self.data_node.new_value(22.0)).result(timeout=5)
+            self.assertEqual(buffer.add(self.data_node.new_value(23.0)).result(timeout=5).value, 23.0)
+        self.assertEqual([value['value'] for value in self.server.values[self.data_node_id]], [21.5, 23.0])
+        self.assertEqual(self.client.reporting.stats()['sent'], 2)
+
+    def test_batches(self):
+        self.client.set_reporting_policy(self.data_node, ReportingPolicy(deadband=1.0))
+        saved = self.client.save_data_node_values([self.data_node.new_value(20.0) for _ in range(10)])
+        self.assertEqual(saved[0].value, 20.0)
+        self.assertEqual(saved[1:], [None] * 9)
+        self.assertEqual(self.client.reporting.stats()['data_nodes'][self.data_node_id],
+                         {'sent': 1, 'suppressed': 9})
+
+        values = [self.data_node.new_value(22.0), self.data_node.new_value(22.5), self.data_node.new_value(24.0)]
+        self.server.fail_next(1)
+        with self.assertRaises(ServerError):
+            self.client.save_data_node_values(values)
+        self.assertEqual(self.client.reporting.stats()['data_nodes'][self.data_node_id],
+                         {'sent': 1, 'suppressed': 10})
+        # the failed values do not count as reported, retrying them is compared with the last value sent before
+        self.assertEqual([value and value.value for value in self.client.save_data_node_values(values)],
+                         [22.0, None, 24.0])
+        self.assertEqual([value['value'] for value in self.server.values[self.data_node_id]], [20.0, 22.0, 24.0])
+        self.assertEqual(self.client.reporting.stats()['sent'], 3)
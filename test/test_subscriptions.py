@@ -0,0 +1,87 @@
+import threading
+
+from remoteclick.mock_server import MockServerTestCase
+
+
+class TestSubscriptions(MockServerTestCase):
+    server_options = {'bulk': False, 'streaming': False}
+
+    def setUp(self):
+        super().setUp()
+        self.ventilator_id = self.server.add_data_node("Ventilator", "Plant/Line3", "boolean")
+        self.pump_id = self.server.add_data_node("Pump", "Plant/Line3", "boolean")
+        self.server.add_value(self.ventilator_id, False)
+        self.server.add_value(self.pump_id, False)
+
+        self.received = []
+        self.event = threading.Event()
+
+    def callback(self, data_node_value):
+        self.received.append(data_node_value)
+        self.event.set()
+
+    def test_polling_fallback(self):
+        ventilator = self.client.get_data_node_by_name(path="Plant/Line3", name="Ventilator")
+        with self.client.subscribe(ventilator, self.callback, min_interval=0.01, max_interval=0.05) as subscription:
+            self.wait_for_polls(2)
+            self.server.add_value(self.ventilator_id, True)
+            self.assertTrue(self.event.wait(5))
+            self.assertEqual(subscription.transport, "polling")
+        self.assertEqual(self.received[0].value, True)
+        self.assertIs(self.received[0].data_node, ventilator)
+
+    def test_polling_uses_conditional_requests(self):
+        with self.client.subscribe("Plant", self.callback, min_interval=0.01, max_interval=0.02):
+            self.wait_for_polls(4)
+        self.assertEqual(self.received, [])
+        self.assertGreater(self.server.not_modified, 0)
+
+    def test_streaming(self):
+        self.server.streaming = True
+        with self.client.subscribe("Plant/Line3", self.callback) as subscription:
+            self.assertTrue(self.server.stream_connected.wait(5))
+            self.server.add_value(self.pump_id, True)
+            self.assertTrue(self.event.wait(5))
+            self.assertEqual(subscription.transport, "stream")
+        self.assertEqual(self.received[0].value, True)
+        self.assertEqual(self.received[0].data_node.name, "Pump")
+
+    def test_closed_streams_are_reconnected_with_backoff(self):
+        self.server.streaming = True
+        self.server.stream_timeout = 0
+        with self.client.subscribe("Plant/Line3", self.callback, min_interval=0.05, max_interval=0.2) as subscription:
+            self.assertTrue(self.server.stream_connected.wait(5))
+            threading.Event().wait(1)
+            self.assertEqual(subscription.transport, "stream")
+            self.assertEqual(subscription.interval, 0.2)
+        # 0.075 + 0.1125 + 0.169 + 0.2 + ... rather than a reconnect loop without any delay
+        self.assertLessEqual(self.streams(), 8)
+
+    def test_bounded_queue_drops_oldest_values(self):
+        blocked = threading.Event()
+        self.server.streaming = True
+        with self.client.subscribe("Plant", lambda value: blocked.wait(5), queue_size=2) as subscription:
+            self.assertTrue(self.server.stream_connected.wait(5))
+            for index in range(10):
+                self.server.add_value(self.pump_id, index % 2 == 0)
+            self.wait_until(lambda: subscription.dropped >= 7)
+            blocked.set()
+        self.assertGreaterEqual(subscription.dropped, 7)
+
+    def wait_for_polls(self, count):
+        start = self.polls()
+        self.wait_until(lambda: self.polls() >= start + count)
+
+    def streams(self):
+        return len([path for method, path in self.server.requests if path.endswith("/values/events")])
+
+    def polls(self):
+        return len([path for method, path in self.server.requests if path.endswith("/values/current")])
+
+    def wait_until(self, condition, timeout=5):
+        event = threading.Event()
+        for _ in range(int(timeout / 0.01)):
+            if condition():
+                return
+            event.wait(0.01)
+        self.fail("condition not met within {0}s".format(timeout))
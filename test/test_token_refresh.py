@@ -0,0 +1,64 @@
+import time
+
+from remoteclick.mock_server import MockServerTestCase
+
+
+class TestTokenRefresh(MockServerTestCase):
+    def connect(self, token_ttl, **kwargs):
+        self.server = self.start_server(token_ttl=token_ttl)
+        self.client = self.connect_client(**kwargs)
+        return self.client
+
+    def test_schedule(self):
+        client = self.connect(3600, refresh_margin=60, refresh_jitter=0)
+        self.assertEqual(client._refresh_timer.interval, 3540)
+        self.assertAlmostEqual(client.token_expires_at, time.time() + 3600, delta=5)
+        # short lived tokens are refreshed at half their lifetime, but not more often than every second
+        client._schedule_refresh(10)
+        self.assertEqual(client._refresh_timer.interval, 5)
+        client._schedule_refresh(1)
+        self.assertEqual(client._refresh_timer.interval, 1.0)
+        client.refresh_jitter = 0.1
+        for _ in range(20):
+            client._schedule_refresh(3600)
+            self.assertTrue(3540 - 360 <= client._refresh_timer.interval <= 3540)
+        client.disconnect()
+        self.assertIsNone(client._refresh_timer)
+
+    def test_tokens_without_lifetime(self):
+        client = self.connect(None)
+        self.assertIsNone(client._refresh_timer)
+        self.assertIsNone(client.token_expires_at)
+
+    def test_proactive_refresh(self):
+        client = self.connect(2, refresh_jitter=0)
+        token = client.token
+        self.assertEqual(client._refresh_timer.interval, 1.0)
+        deadline = time.time() + 5
+        while client.token == token and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertNotEqual(client.token, token)
+        self.assertEqual(self.server.grants, ["password", "refresh_token"])
+        # the old token is no longer needed, requests use the new one without being rejected
+        self.server.tokens.discard(token)
+        self.assertEqual(client.get_data_nodes(), [])
+        self.assertEqual(self.server.request_count("POST", "/oauth/device/token"), 2)
+
+    def test_password_grant_fallback(self):
+        client = self.connect(3600)
+        self.server.revoke_tokens(refresh_tokens=True)
+        self.assertEqual(client.get_data_nodes(), [])
+        self.assertEqual(self.server.grants, ["password", "refresh_token", "password"])
+        self.assertIn(client.refresh_token, self.server.refresh_tokens)
+
+    def test_failed_refresh_is_retried(self):
+        client = self.connect(3600, refresh_margin=10)
+        token = client.token
+        self.server.fail_next(2)
+        with self.assertLogs("RemoteclickClient", "WARNING"):
+            client._refresh()
+        self.assertEqual(client.token, token)
+        self.assertTrue(5 <= client._refresh_timer.interval <= 10)
+        client._refresh()
+        self.assertNotEqual(client.token, token)
+        self.assertGreater(client._refresh_timer.interval, 3000)
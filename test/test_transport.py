@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+from remoteclick.datanode import DataNode
+from remoteclick.exceptions import NotFoundError, TransportError
+from remoteclick.mock_server import MockServerTestCase
+
+
+class TestHttpClientTransport(MockServerTestCase):
+    client_options = {'transport': "http.client", 'pool_size': 2}
+
+    def test_requests_share_connections(self):
+        data_node = self.client.save_data_node(DataNode(name="Temperature", path="Plant", read_only=False))
+        for index in range(10):
+            self.client.save_data_node_value(data_node.new_value(float(index)))
+        values = self.client.get_data_node_values(data_node, limit=5)
+        self.assertEqual([value.value for value in values], [9.0, 8.0, 7.0, 6.0, 5.0])
+        self.assertEqual(self.client.connection_stats()['connections_opened'], 1)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_errors(self):
+        data_node = DataNode()
+        data_node.id = 12345
+        with self.assertRaises(NotFoundError):
+            self.client.get_data_node_values(data_node)
+        self.client.set_base_url("http://127.0.0.1:1/api/")
+        self.client.session.max_retries = 0
+        with self.assertRaises(TransportError):
+            self.client.get_data_node_values(data_node)
+
+    def test_import_is_lazy(self):
+        code = ("import sys, remoteclick; assert 'remoteclick.client' not in sys.modules; "
+                "remoteclick.RemoteClickClient(transport='http.client'); assert 'requests' not in sys.modules")
+        subprocess.run([sys.executable, "-c", code], check=True)
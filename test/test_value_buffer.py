@@ -0,0 +1,78 @@
+from remoteclick.aggregation import AggregationPolicy
+from remoteclick.datanode import DataNode
+from remoteclick.exceptions import NotFoundError
+from remoteclick.mock_server import MockServerTestCase
+from remoteclick.reporting import ReportingPolicy
+
+
+class TestValueBuffer(MockServerTestCase):
+    def connect(self, bulk=True):
+        self.server = self.start_server(bulk=bulk)
+        data_node_id = self.server.add_data_node("Temperature", "Plant")
+        self.client = self.connect_client()
+        self.data_node = self.client.get_data_node_by_id(data_node_id)
+        return data_node_id
+
+    def test_flush_on_size(self):
+        data_node_id = self.connect()
+        with self.client.buffered(max_size=10, max_age=60) as buffer:
+            futures = [buffer.add(self.data_node.new_value(float(index))) for index in range(10)]
+            saved = [future.result(timeout=5) for future in futures]
+        self.assertEqual([value.value for value in saved], [float(index) for index in range(10)])
+        self.assertTrue(all(value.id for value in saved))
+        self.assertEqual(self.server.request_count("POST", "/values/bulk"), 1)
+        self.assertEqual(len(self.server.values[data_node_id]), 10)
+
+    def test_flush_on_age(self):
+        self.connect()
+        called = []
+        with self.client.buffered(max_size=1000, max_age=0.05) as buffer:
+            future = buffer.add(self.data_node.new_value(21.5), callback=called.append)
+            self.assertEqual(future.result(timeout=5).value, 21.5)
+            self.assertEqual(len(buffer), 0)
+        self.assertEqual(called, [future])
+
+    def test_single_fallback(self):
+        data_node_id = self.connect(bulk=False)
+        # values were filtered when they were added, the fallback must not filter them again
+        self.client.set_reporting_policy(self.data_node, ReportingPolicy(min_interval=60))
+        with self.client.buffered(max_size=10, max_age=0.05) as buffer:
+            self.assertEqual(buffer.add(self.data_node.new_value(1.0)).result(timeout=5).value, 1.0)
+            self.assertIsNone(buffer.add(self.data_node.new_value(2.0)).result(timeout=5))
+        self.assertIs(self.client.bulk_values_supported, False)
+        self.assertEqual([value['value'] for value in self.server.values[data_node_id]], [1.0])
+        self.assertEqual(self.client.reporting.stats()['sent'], 1)
+
+        self.client.set_reporting_policy(self.data_node, None)
+        with self.client.buffered(max_size=5, max_age=60) as buffer:
+            futures = [buffer.add(self.data_node.new_value(float(index))) for index in range(5)]
+            self.assertEqual([future.result(timeout=5).value for future in futures], [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(self.server.request_count("POST", "/values"), 6)
+
+    def test_aggregates_without_bulk(self):
+        data_node_id = self.connect(bulk=False)
+        self.client.set_aggregation_policy(self.data_node, AggregationPolicy(window=1.0))
+        with self.client.buffered(max_size=100, max_age=0.05) as buffer:
+            for second in range(8):
+                buffer.add(self.data_node.new_value(float(second), "2024-05-01T12:00:{0:02d}+00:00".format(second)))
+        # aggregates are posted as they are and never go back into their window
+        self.assertEqual(sorted(value['value'] for value in self.server.values[data_node_id]),
+                         [float(second) for second in range(7)])
+        self.assertEqual(self.client.aggregation.stats()['late'], 0)
+
+    def test_unknown_data_node(self):
+        data_node_id = self.connect()
+        unknown = DataNode(name="Removed", path="Plant")
+        unknown.id = 12345
+        with self.client.buffered(max_size=100, max_age=0.05) as buffer:
+            future = buffer.add(unknown.new_value(1.0))
+            with self.assertRaises(NotFoundError):
+                future.result(timeout=5)
+            # a missing data node says nothing about the bulk endpoint
+            futures = [buffer.add(self.data_node.new_value(float(index))) for index in range(100)]
+            [future.result(timeout=5) for future in futures]
+        self.assertIsNot(self.client.bulk_values_supported, False)
+        self.assertEqual(self.server.request_count("POST", "/values"), 0)
+        self.assertEqual(len(self.server.values[data_node_id]), 100)
+        with self.assertRaises(NotFoundError):
+            self.client.save_data_node_values([unknown.new_value(2.0)])
@@ -0,0 +1,87 @@
+import math
+from unittest import TestCase
+
+from remoteclick.datanode import DataNode, RetainedValues
+from remoteclick.datanode_value import timestamp_to_ns
+from remoteclick.mock_server import MockServerTestCase
+from remoteclick.value_series import ValueSeries
+from remoteclick.value_type import ValueType
+
+
+def timestamp(second):
+    return "2024-05-01T12:00:{0:02d}+00:00".format(second)
+
+
+class TestValueSeries(TestCase):
+    def test_numbers(self):
+        series = ValueSeries(ValueType.NUMBER)
+        series.append(1.5, timestamp(0), 10)
+        series.append(None, timestamp(1))
+        series.append(3, timestamp_to_ns(timestamp(2)), 12)
+        self.assertEqual(len(series), 3)
+        self.assertEqual([series.value_at(index) for index in range(3)], [1.5, None, 3.0])
+        self.assertTrue(math.isnan(series.values[1]))
+        self.assertEqual(series.timestamps[2], timestamp_to_ns(timestamp(2)))
+        self.assertEqual(series.datetime_at(0).isoformat(), timestamp(0))
+        self.assertEqual(series.nbytes(), 3 * (8 + 8 + 8))
+
+        values = list(series)
+        self.assertEqual([value.value for value in values], [1.5, None, 3.0])
+        self.assertEqual([value.id for value in values], [10, None, 12])
+        self.assertEqual(values[2].get_datetime().isoformat(), timestamp(2))
+
+    def test_booleans(self):
+        series = ValueSeries(ValueType.BOOLEAN)
+        for second, value in enumerate([True, False, None, 1]):
+            series.append(value, timestamp(second))
+        self.assertEqual([value.value for value in series], [True, False, None, True])
+        self.assertEqual(series.nbytes(), 4 * (8 + 8 + 1))
+
+    def test_strings(self):
+        series = ValueSeries(ValueType.STRING)
+        series.extend_raw([{'id': second, 'timestamp': timestamp(second), 'value': value}
+                           for second, value in enumerate(["on", "off", None, "on", "off", "on"])])
+        self.assertEqual([value.value for value in series], ["on", "off", None, "on", "off", "on"])
+        # repeated strings are stored once and referenced by 32 bit indexes
+        self.assertEqual(series.strings, ["on", "off"])
+        self.assertEqual(list(series.values), [0, 1, -1, 0, 1, 0])
+        self.assertEqual(series.nbytes(), 6 * (8 + 8 + 4))
+
+    def test_for_data_node(self):
+        data_node = DataNode(name="Mode", value_type=ValueType.STRING)
+        series = ValueSeries.for_data_node(data_node)
+        series.append("auto", timestamp(0))
+        self.assertIs(series[0].data_node, data_node)
+        self.assertEqual(ValueSeries.for_data_node(DataNode.from_dict({'name': "Unknown"})).value_type,
+                         ValueType.NUMBER)
+        with self.assertRaises(ValueError):
+            ValueSeries("object")
+
+
+class TestValueRetention(MockServerTestCase):
+    def test_retained_values(self):
+        values = RetainedValues(3)
+        for key in range(5):
+            values[key] = key * 10
+        # the oldest values are evicted first
+        self.assertEqual(list(values.items()), [(2, 20), (3, 30), (4, 40)])
+        values.trim(1)
+        self.assertEqual(list(values), [4])
+        values.trim(None)
+        for key in range(5, 10):
+            values[key] = key
+        self.assertEqual(len(values), 6)
+
+    def test_data_node_retention(self):
+        data_node_id = self.server.add_data_node("Temperature", "Plant")
+        temperature = self.client.get_data_node_by_id(data_node_id)
+        self.assertEqual(temperature.values.maxlen, DataNode.default_value_retention)
+
+        temperature.set_value_retention(3)
+        saved = [self.client.save_data_node_value(temperature.new_value(float(index))) for index in range(5)]
+        self.assertEqual(list(temperature.values), [value.id for value in saved[2:]])
+        self.assertEqual(len(self.client.get_data_node_values(temperature, limit=5)), 5)
+        self.assertEqual(len(temperature.values), 3)
+
+        series = self.client.get_value_series(temperature)
+        self.assertEqual([value.value for value in series], [4.0, 3.0, 2.0, 1.0, 0.0])